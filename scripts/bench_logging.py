@@ -0,0 +1,111 @@
+"""Benchmark the cost of structured request logging on the calling thread.
+
+Emits request.end-shaped records through three pipelines and prints
+records/sec as seen by the caller (i.e. the event loop thread):
+
+- legacy: StreamHandler + per-call datetime.isoformat() and json.dumps()
+- sync:   StreamHandler + the current JsonFormatter
+- queue:  the configure_logging() QueueHandler/QueueListener pipeline
+
+    python scripts/bench_logging.py --records 100000 --output /tmp/bench.log
+    python scripts/bench_logging.py --records 20000 --write-latency-us 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from backend.core import logging as core_logging  # noqa: E402
+
+EXTRA = {
+    "event": "request.end",
+    "correlation_id": "6f1c3f0e-3a55-4d0e-9d4e-2f4f0b0c8a11",
+    "method": "GET",
+    "path": "/api/routes",
+    "status_code": 200,
+    "duration_ms": 1.23,
+}
+
+
+class LegacyJsonFormatter(core_logging.JsonFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in EXTRA:
+            if hasattr(record, key):
+                payload[key] = getattr(record, key)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class SlowStream:
+    """File wrapper whose flush() blocks like a congested stdout pipe."""
+
+    def __init__(self, inner, latency: float) -> None:
+        self._inner = inner
+        self._latency = latency
+
+    def write(self, data: str) -> int:
+        return self._inner.write(data)
+
+    def flush(self) -> None:
+        self._inner.flush()
+        if self._latency:
+            time.sleep(self._latency)
+
+
+def _setup(mode: str, stream) -> None:
+    root = logging.getLogger()
+    core_logging._stop_listener()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(LegacyJsonFormatter() if mode == "legacy" else core_logging.JsonFormatter())
+    handler.addFilter(core_logging.CorrelationIdFilter())
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    if mode == "queue":
+        core_logging._install_queue()
+
+
+def _run(mode: str, records: int, output: str, latency: float) -> tuple[float, float]:
+    with open(output, "w", encoding="utf-8") as stream:
+        _setup(mode, SlowStream(stream, latency))
+        logger = logging.getLogger("backend.request")
+        started = time.perf_counter()
+        for _ in range(records):
+            logger.info("request.end", extra=EXTRA)
+        caller = time.perf_counter() - started
+        core_logging._stop_listener()
+        drained = time.perf_counter() - started
+    return records / caller, records / drained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--output", default=os.devnull)
+    parser.add_argument("--write-latency-us", type=float, default=0.0, help="simulated blocking per log write")
+    args = parser.parse_args()
+
+    latency = args.write_latency_us / 1_000_000
+    results = {mode: _run(mode, args.records, args.output, latency) for mode in ("legacy", "sync", "queue")}
+    for mode, (caller, drained) in results.items():
+        print(f"{mode:7s} caller {caller:10.0f} rec/s   end-to-end {drained:10.0f} rec/s")
+    print(f"caller-side speedup vs legacy: {results['queue'][0] / results['legacy'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark request throughput through the dashboard middleware stack.
+
+Serves a trivial endpoint behind AuthMiddleware + CorrelationIdMiddleware and
+drives it in-process over ASGI (no sockets), once with the previous
+BaseHTTPMiddleware implementations and once with the pure ASGI ones, and
+prints requests/sec for both.
+
+    python scripts/bench_middleware.py --requests 5000 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from backend.core import middleware  # noqa: E402
+from backend.core.context import reset_correlation_id, set_correlation_id  # noqa: E402
+
+TOKEN = "bench-token"
+
+
+class LegacyCorrelationIdMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        correlation_id = request.headers.get("X-Correlation-Id") or str(uuid.uuid4())
+        token = set_correlation_id(correlation_id)
+        request.state.correlation_id = correlation_id
+        start = time.perf_counter()
+        middleware.logger.info("request.start", extra={"event": "request.start", "path": request.url.path})
+        response = await call_next(request)
+        response.headers["X-Correlation-Id"] = correlation_id
+        middleware.logger.info(
+            "request.end",
+            extra={"event": "request.end", "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+        )
+        reset_correlation_id(token)
+        return response
+
+
+class LegacyAuthMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        token = request.cookies.get(middleware.settings.AUTH_COOKIE_NAME) or request.headers.get("X-Auth-Token") or ""
+        if middleware.is_session_token_valid(token):
+            return await call_next(request)
+        return JSONResponse({"detail": "Unauthorized"}, status_code=401)
+
+
+def _app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    def ping():
+        return {"ok": True}
+
+    if legacy:
+        app.add_middleware(LegacyAuthMiddleware)
+        app.add_middleware(LegacyCorrelationIdMiddleware)
+    else:
+        app.add_middleware(middleware.AuthMiddleware)
+        app.add_middleware(middleware.CorrelationIdMiddleware)
+    return app
+
+
+async def _run(app: FastAPI, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(jobs) -> None:
+            for _ in jobs:
+                resp = await client.get("/api/ping", headers={"X-Auth-Token": TOKEN})
+                assert resp.status_code == 200, resp.status_code
+
+        await worker(range(200))  # warm-up
+        jobs = iter(range(total))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(jobs) for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--log", action="store_true", help="keep request logging enabled (measures log I/O too)")
+    args = parser.parse_args()
+
+    if not args.log:
+        logging.getLogger("backend.request").setLevel(logging.WARNING)
+    middleware.auth_enabled = lambda: True
+    middleware.is_session_token_valid = lambda token: token == TOKEN
+
+    legacy = asyncio.run(_run(_app(True), args.requests, args.concurrency))
+    asgi = asyncio.run(_run(_app(False), args.requests, args.concurrency))
+    print(f"BaseHTTPMiddleware: {legacy:8.0f} req/s")
+    print(f"pure ASGI:          {asgi:8.0f} req/s")
+    print(f"speedup:            {asgi / legacy:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import fcntl
+import heapq
 import hmac
 import hashlib
+import json
+import logging
 import secrets
 import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from . import settings
@@ -13,17 +21,82 @@ from . import settings
 _cache = {"mtime": None, "value": ""}
 _PASSWORD_SCHEME = "pbkdf2_sha256"
 _PASSWORD_ITERATIONS = 390_000
+# Concurrent verifications allowed per client IP; the rest get 429 instead of
+# queueing CPU work behind the executor.
+_LOGIN_CONCURRENCY_PER_IP = 1
+_LOGIN_MAX_TRACKED_IPS = 4096
 _SESSION_TTL_SECONDS = 24 * 60 * 60
-_sessions_lock = threading.RLock()
+_SESSION_VERSION = "v1"
+# Signing keys of rehashed password hashes that still verify older session tokens.
+_CARRIED_KEYS = 4
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class _Session:
-    token: str
-    expires_at: float
 
+class ExpiringSet:
+    """
+    Set of keys with an expiry each, indexed by a min-heap of ``(expires_at, key)``.
+
+    Membership is a plain dict lookup plus an expiry check (no lock, no scan).
+    Expired entries are popped from the heap top a few at a time on writes;
+    discarded keys leave stale heap entries that are skipped on pop and dropped
+    by an occasional compaction.
+    """
+
+    PRUNE_BATCH = 64
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, float] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at > time.time():
+            return True
+        self.discard(key)
+        return False
+
+    def add(self, key: str, expires_at: float) -> None:
+        with self._lock:
+            self._prune(time.time())
+            self._entries[key] = expires_at
+            heapq.heappush(self._expiry, (expires_at, key))
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._expiry) > 2 * len(self._entries) + self.PRUNE_BATCH:
+                self._compact()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._expiry.clear()
+
+    def _prune(self, now: float) -> None:
+        for _ in range(self.PRUNE_BATCH):
+            if not self._expiry or self._expiry[0][0] > now:
+                return
+            expires_at, key = heapq.heappop(self._expiry)
+            if self._entries.get(key) == expires_at:
+                del self._entries[key]
 
-_sessions: dict[str, _Session] = {}
+    def _compact(self) -> None:
+        self._expiry = [(expires_at, key) for key, expires_at in self._entries.items()]
+        heapq.heapify(self._expiry)
+
+
+# Nonces of revoked session tokens, mirrored from the shared denylist file.
+_revoked = ExpiringSet()
+_revoked_cache: dict[str, float | None] = {"mtime": None}
+_revoked_lock = threading.Lock()
+_keys_cache: dict = {"mtime": None, "value": {}}
 
 
 def _read_password_file(path: Path) -> str:
@@ -42,7 +115,12 @@ def _read_password_file(path: Path) -> str:
     return value
 
 
-def _hash_password(value: str, *, iterations: int = _PASSWORD_ITERATIONS, salt: str | None = None) -> str:
+def _password_iterations() -> int:
+    return max(1, int(settings.AUTH_PASSWORD_ITERATIONS or _PASSWORD_ITERATIONS))
+
+
+def _hash_password(value: str, *, iterations: int | None = None, salt: str | None = None) -> str:
+    iterations = iterations or _password_iterations()
     clean = value.strip()
     salt_hex = salt or secrets.token_hex(16)
     digest = hashlib.pbkdf2_hmac(
@@ -70,37 +148,107 @@ def _verify_password(candidate: str, stored: str) -> bool:
     return hmac.compare_digest(calculated, stored)
 
 
-def _prune_sessions(now: float | None = None) -> None:
-    ts = now or time.time()
-    expired = [token for token, session in _sessions.items() if session.expires_at <= ts]
-    for token in expired:
-        _sessions.pop(token, None)
+def _needs_rehash(stored: str) -> bool:
+    """Plaintext values and hashes made with a different iteration count are upgraded on login."""
+    if not stored.startswith(f"{_PASSWORD_SCHEME}$"):
+        return True
+    try:
+        return int(stored.split("$", 2)[1]) != _password_iterations()
+    except (IndexError, ValueError):
+        return False
+
+
+def _revoked_path() -> Path:
+    # Lives next to the password file so every worker/replica sharing it sees revocations.
+    path = settings.AUTH_PASSWORD_FILE
+    return path.with_name(f"{path.stem}.revoked.json")
+
+
+def _refresh_revoked() -> None:
+    path = _revoked_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        mtime = None
+    if _revoked_cache["mtime"] == mtime:
+        return
+    global _revoked
+    with _revoked_lock:
+        entries = _read_revoked(path) if mtime is not None else {}
+        # Build the new set aside and swap it in: readers never see a half-filled denylist.
+        revoked = ExpiringSet()
+        for nonce, expires_at in entries.items():
+            revoked.add(nonce, expires_at)
+        _revoked = revoked
+        _revoked_cache["mtime"] = mtime
+
+
+def _read_revoked(path: Path) -> dict[str, float]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    now = time.time()
+    return {str(k): float(v) for k, v in data.items() if isinstance(v, (int, float)) and v > now}
+
+
+def _write_revoked(update) -> None:
+    """Apply ``update`` to the denylist file under an exclusive lock; raises OSError on failure."""
+    path = _revoked_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(path.name + ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = update(_read_revoked(path))
+            if entries:
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text(json.dumps(entries), encoding="utf-8")
+                tmp.replace(path)
+            elif path.exists():
+                path.unlink()
+    except OSError:
+        logger.exception("auth.revoked.write_failed")
+        raise
+    _revoked_cache["mtime"] = None
+    _refresh_revoked()
 
 
 def clear_sessions() -> None:
-    with _sessions_lock:
-        _sessions.clear()
+    """
+    Forget revocations. Session tokens are signed with a key derived from the
+    stored password hash, so changing the password already invalidates them.
+    """
+    try:
+        _write_revoked(lambda _entries: {})
+    except OSError:
+        # Stale entries only name nonces of tokens signed with the old key; harmless.
+        pass
 
 
 def get_password() -> str:
     return _read_password_file(settings.AUTH_PASSWORD_FILE)
 
 
+def _write_password_hash(hashed: str) -> None:
+    path = settings.AUTH_PASSWORD_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(hashed, encoding="utf-8")
+    try:
+        stat = path.stat()
+    except OSError:
+        _cache["mtime"] = None
+        _cache["value"] = hashed
+        return
+    _cache["mtime"] = stat.st_mtime
+    _cache["value"] = hashed
+
+
 def set_password(value: str | None) -> None:
     path = settings.AUTH_PASSWORD_FILE
     if value:
-        hashed = _hash_password(value)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(hashed, encoding="utf-8")
-        try:
-            stat = path.stat()
-        except OSError:
-            _cache["mtime"] = None
-            _cache["value"] = hashed
-            clear_sessions()
-            return
-        _cache["mtime"] = stat.st_mtime
-        _cache["value"] = hashed
+        _write_password_hash(_hash_password(value))
         clear_sessions()
         return
 
@@ -127,32 +275,267 @@ def check_password(candidate: str | None) -> bool:
     return _verify_password(candidate, get_password())
 
 
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            workers = max(1, int(settings.AUTH_HASH_WORKERS or 1))
+            _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth-hash")
+        return _hash_executor
+
+
+def _rehash_if_needed(candidate: str, stored: str) -> None:
+    if not settings.AUTH_REHASH or not _needs_rehash(stored):
+        return
+    hashed = _hash_password(candidate)
+    # Skip if the password was changed while we were hashing.
+    if get_password() == stored:
+        # Record the outgoing key first: if that fails the hash is left as is,
+        # rather than signing everyone out.
+        _carry_signing_key(stored, hashed)
+        _write_password_hash(hashed)
+
+
+def _check_and_upgrade(candidate: str, stored: str) -> bool:
+    if not _verify_password(candidate, stored):
+        return False
+    try:
+        _rehash_if_needed(candidate.strip(), stored)
+    except OSError:
+        pass
+    return True
+
+
+async def check_password_async(candidate: str | None) -> bool:
+    """
+    ``check_password`` for request handlers: PBKDF2 runs on a small thread pool
+    (hashlib releases the GIL) so the event loop keeps serving other requests.
+    A successful check upgrades plaintext or outdated-cost hashes when
+    AUTH_REHASH is on.
+    """
+    if not candidate:
+        return False
+    stored = get_password()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), _check_and_upgrade, candidate, stored)
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("Too many login attempts")
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+@dataclass
+class _LoginState:
+    in_flight: int = 0
+    failures: deque = field(default_factory=deque)
+
+
+class LoginLimiter:
+    """Per-IP cap on concurrent password checks and on failed attempts within a sliding window."""
+
+    def __init__(
+        self,
+        attempts: int,
+        window: float,
+        concurrency: int = _LOGIN_CONCURRENCY_PER_IP,
+        max_tracked: int = _LOGIN_MAX_TRACKED_IPS,
+    ) -> None:
+        self.attempts = max(1, int(attempts))
+        self.window = max(1.0, float(window))
+        self.concurrency = max(1, int(concurrency))
+        self.max_tracked = max(1, int(max_tracked))
+        self._lock = threading.Lock()
+        # Least recently active first, so eviction drops the stalest keys.
+        self._states: OrderedDict[str, _LoginState] = OrderedDict()
+
+    def _expire(self, state: _LoginState, now: float) -> None:
+        while state.failures and state.failures[0] <= now - self.window:
+            state.failures.popleft()
+
+    def acquire(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                if len(self._states) >= self.max_tracked:
+                    self._evict(now)
+                state = self._states[key] = _LoginState()
+            else:
+                self._states.move_to_end(key)
+            self._expire(state, now)
+            if len(state.failures) >= self.attempts:
+                raise LoginThrottled(state.failures[0] + self.window - now)
+            if state.in_flight >= self.concurrency:
+                raise LoginThrottled(1)
+            state.in_flight += 1
+
+    def release(self, key: str, success: bool) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            if success:
+                state.failures.clear()
+            else:
+                state.failures.append(time.monotonic())
+            if not state.in_flight and not state.failures:
+                del self._states[key]
+
+    def _evict(self, now: float) -> None:
+        for key, state in list(self._states.items()):
+            self._expire(state, now)
+            if not state.in_flight and not state.failures:
+                del self._states[key]
+        # Still full of recent failures: drop the least recently active keys (leaving
+        # some headroom so this scan does not run on every new address). In-flight
+        # checks are kept; release() tolerates a missing key anyway.
+        target = self.max_tracked - max(1, self.max_tracked // 8)
+        for key in list(self._states):
+            if len(self._states) <= target:
+                break
+            if not self._states[key].in_flight:
+                del self._states[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+_login_limiter: LoginLimiter | None = None
+_login_limiter_lock = threading.Lock()
+
+
+def login_limiter() -> LoginLimiter:
+    global _login_limiter
+    attempts = int(settings.AUTH_LOGIN_ATTEMPTS or 1)
+    window = float(settings.AUTH_LOGIN_WINDOW or 1)
+    with _login_limiter_lock:
+        if _login_limiter is None or (_login_limiter.attempts, _login_limiter.window) != (attempts, window):
+            _login_limiter = LoginLimiter(attempts, window)
+        return _login_limiter
+
+
+def _signing_key(stored: str) -> bytes:
+    return hmac.new(stored.encode("utf-8"), b"janus-session", hashlib.sha256).digest()
+
+
+def _keys_path() -> Path:
+    path = settings.AUTH_PASSWORD_FILE
+    return path.with_name(f"{path.stem}.keys.json")
+
+
+def _read_keys() -> dict:
+    path = _keys_path()
+    try:
+        mtime = (str(path), path.stat().st_mtime)
+    except OSError:
+        return {}
+    if _keys_cache["mtime"] != mtime:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        _keys_cache["mtime"] = mtime
+        _keys_cache["value"] = data if isinstance(data, dict) else {}
+    return _keys_cache["value"]
+
+
+def _carry_signing_key(stored: str, hashed: str) -> None:
+    """
+    Keep sessions alive across a login rehash: the hash changes but the password
+    does not. Keys of earlier hashes stay accepted while the file names the
+    current hash's key, so a password change (via the API or by editing the file)
+    still signs everyone out. Raises OSError if the file cannot be written.
+    """
+    old_key, new_key = _signing_key(stored).hex(), _signing_key(hashed).hex()
+    data = _read_keys()
+    previous = list(data.get("previous") or []) if data.get("current") == old_key else []
+    path = _keys_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"current": new_key, "previous": [old_key, *previous][:_CARRIED_KEYS]}), encoding="utf-8")
+    tmp.replace(path)
+    _keys_cache["mtime"] = None
+
+
+def _verification_keys(stored: str) -> list[bytes]:
+    current = _signing_key(stored)
+    data = _read_keys()
+    if data.get("current") != current.hex():
+        return [current]
+    keys = [current]
+    for value in data.get("previous") or []:
+        try:
+            keys.append(bytes.fromhex(str(value)))
+        except ValueError:
+            continue
+    return keys
+
+
+def _sign(key: bytes, payload: str) -> str:
+    digest = hmac.new(key, payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _parse_session_token(token: str) -> tuple[float, str] | None:
+    """Return ``(expires_at, nonce)`` for a token with a valid signature."""
+    parts = token.split(".")
+    if len(parts) != 4 or parts[0] != _SESSION_VERSION:
+        return None
+    try:
+        expires_at = float(int(parts[1]))
+    except ValueError:
+        return None
+    stored = get_password()
+    if not stored:
+        return None
+    payload = ".".join(parts[:3])
+    if not any(hmac.compare_digest(parts[3], _sign(key, payload)) for key in _verification_keys(stored)):
+        return None
+    return expires_at, parts[2]
+
+
 def issue_session_token() -> str:
-    token = secrets.token_urlsafe(32)
-    expires_at = time.time() + _SESSION_TTL_SECONDS
-    session = _Session(token=token, expires_at=expires_at)
-    with _sessions_lock:
-        _prune_sessions()
-        _sessions[token] = session
-    return token
+    """
+    Stateless token ``v1.<expires_at>.<nonce>.<hmac>``: any worker holding the
+    same password file can verify it without a session lookup.
+    """
+    expires_at = int(time.time() + _SESSION_TTL_SECONDS)
+    payload = f"{_SESSION_VERSION}.{expires_at}.{secrets.token_urlsafe(12)}"
+    return f"{payload}.{_sign(_signing_key(get_password()), payload)}"
 
 
 def is_session_token_valid(token: str | None) -> bool:
     if not token:
         return False
-    with _sessions_lock:
-        _prune_sessions()
-        session = _sessions.get(token)
-        if session is None:
-            return False
-        if session.expires_at <= time.time():
-            _sessions.pop(token, None)
-            return False
-        return True
+    parsed = _parse_session_token(token)
+    if parsed is None:
+        return False
+    expires_at, nonce = parsed
+    if expires_at <= time.time():
+        return False
+    _refresh_revoked()
+    return nonce not in _revoked
 
 
 def revoke_session_token(token: str | None) -> None:
+    """Add the token's nonce to the shared denylist; raises OSError if it cannot be written."""
     if not token:
         return
-    with _sessions_lock:
-        _sessions.pop(token, None)
+    parsed = _parse_session_token(token)
+    if parsed is None or parsed[0] <= time.time():
+        return
+    expires_at, nonce = parsed
+
+    def _add(entries: dict[str, float]) -> dict[str, float]:
+        entries[nonce] = expires_at
+        return entries
+
+    _write_revoked(_add)
@@ -3,6 +3,7 @@ from typing import Dict, List
 
 from . import settings
 from .plugins import default_plugins
+from .tracing import traced
 from .utils import ensure_parent
 
 
@@ -247,6 +248,7 @@ def _options_route(domains, response_headers: dict, status: int, request_body_ma
     return {"match": [match], "handle": handlers}
 
 
+@traced("render.caddy_json")
 def render_caddy_config(data: Dict) -> Dict:
     http_routes = []
     routes = data.get("routes", [])
@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Any
 
 from . import settings
+from .tracing import traced
 from .utils import ensure_parent
 
 
@@ -301,6 +302,7 @@ def _site_lines(route: dict[str, Any], errors_root: str) -> list[str]:
     return lines
 
 
+@traced("render.caddyfile")
 def render_caddyfile(data: dict[str, Any]) -> str:
     plugins = data.get("plugins") or {}
     errors_root = _errors_root()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from ..metrics import CACHE_LOOKUPS
+
+# TTL multipliers over CLOUDFLARE_CACHE_TTL: accounts and zones rarely change,
+# tunnel lists and ingress configs change whenever the panel touches them.
+TTL_FACTORS: dict[str, float] = {
+    "accounts": 10,
+    "zones": 10,
+    "tunnels": 1,
+    "config": 1,
+    "records": 2,
+}
+
+Key = tuple[str, ...]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+
+
+class InventoryCache:
+    """
+    Async TTL cache for Cloudflare inventory lookups.
+
+    Keys are ``(token_fingerprint, kind, *ids)``. A fresh entry is returned as
+    is; an entry older than its TTL but younger than twice the TTL is returned
+    immediately while a background refresh runs (stale-while-revalidate).
+    Concurrent misses for one key share a single in-flight load.
+    """
+
+    def __init__(self, base_ttl: float = 60.0) -> None:
+        self.base_ttl = float(base_ttl)
+        self._lock = threading.Lock()
+        self._entries: dict[Key, _Entry] = {}
+        self._inflight: dict[Key, asyncio.Task] = {}
+
+    def ttl(self, kind: str) -> float:
+        return max(0.0, self.base_ttl * TTL_FACTORS.get(kind, 1))
+
+    async def get(self, key: Key, loader: Callable[[], Awaitable[Any]]) -> tuple[Any, float]:
+        """Return ``(value, age_seconds)``; age is 0 for a value loaded by this call."""
+        ttl = self.ttl(key[1])
+        if ttl <= 0:
+            return await loader(), 0.0
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < ttl:
+                CACHE_LOOKUPS.labels("cloudflare_inventory", key[1], "hit").inc()
+                return entry.value, age
+            if age < ttl * 2:
+                CACHE_LOOKUPS.labels("cloudflare_inventory", key[1], "stale").inc()
+                self._load(key, loader)
+                return entry.value, age
+        CACHE_LOOKUPS.labels("cloudflare_inventory", key[1], "miss").inc()
+        return await self._load(key, loader), 0.0
+
+    def _load(self, key: Key, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._inflight.get(key)
+            if task is not None and not task.done() and task.get_loop() is loop:
+                return task
+            task = loop.create_task(self._run(key, loader))
+            self._inflight[key] = task
+        # A failed background refresh keeps serving the stale value until it expires.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _run(self, key: Key, loader: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            with self._lock:
+                # Skip the store if the key was invalidated while loading.
+                if self._inflight.get(key) is task:
+                    self._entries[key] = _Entry(value, time.monotonic())
+            return value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+    def invalidate(self, kind: str, *ids: str) -> int:
+        """Drop every entry of ``kind`` whose ids start with ``ids`` (for all tokens)."""
+
+        def match(key: Key) -> bool:
+            return key[1] == kind and key[2 : 2 + len(ids)] == ids
+
+        with self._lock:
+            keys = [key for key in self._entries if match(key)]
+            for key in keys:
+                del self._entries[key]
+            for key in [key for key in self._inflight if match(key)]:
+                del self._inflight[key]
+        return len(keys)
+
+    def forget_token(self, fingerprint: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == fingerprint]:
+                del self._entries[key]
+            for key in [key for key in self._inflight if key[0] == fingerprint]:
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+
+
+_cache: InventoryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def inventory_cache() -> InventoryCache:
+    global _cache
+    # Imported lazily: settings -> core -> services -> cloudflare.client -> this module.
+    from .. import settings
+
+    ttl = float(settings.CLOUDFLARE_CACHE_TTL or 0)
+    with _cache_lock:
+        if _cache is None:
+            _cache = InventoryCache(ttl)
+        _cache.base_ttl = ttl
+        return _cache
+
+
+def invalidate_tunnel(account_id: str, tunnel_id: str) -> None:
+    """Forget the tunnel list of the account and the tunnel's ingress config."""
+    cache = inventory_cache()
+    if account_id:
+        cache.invalidate("tunnels", account_id)
+        cache.invalidate("config", account_id, tunnel_id)
+    else:
+        cache.invalidate("tunnels")
+        cache.invalidate("config")
+
+
+def invalidate_zone_records(zone_id: str) -> None:
+    inventory_cache().invalidate("records", zone_id)
@@ -9,7 +9,7 @@ warnings.filterwarnings(
     message="Core Pydantic V1 functionality isn't compatible with Python 3.14 or greater.",
     category=UserWarning,
 )
-from .sdk import AsyncCloudflare
+from .clients import get_cloudflare_client
 
 
 @dataclass
@@ -34,7 +34,7 @@ class CloudflareTokenCheckerSDK:
 
     def __init__(self, token: str) -> None:
         self.token = token
-        self.client = AsyncCloudflare(api_token=token)
+        self.client = get_cloudflare_client(token)
 
         # ЯВНО задаём headers для raw-вызовов
         self._headers = {
@@ -10,17 +10,44 @@ warnings.filterwarnings(
 )
 from .store import TunnelStateStorage
 
+import asyncio
+import hashlib
 import ipaddress
 import json
+import time
 from pathlib import Path
 from typing import Any, Iterable, Optional
 from urllib.parse import quote
 
+from .cache import invalidate_tunnel, invalidate_zone_records
+from .clients import get_cloudflare_client, token_fingerprint
 from .sdk import AsyncCloudflare
 
 from .checker import CloudflareTokenCheckerSDK
-from .constants import PERMISSIONS, TOKEN_NAME, DnsException
+from .constants import PERMISSIONS, TOKEN_NAME, DnsException, DnsRecord
+from .dns_reconcile import plan_dns_changes
 from .exception import CloudflareError
+from .zones import ZoneIndex
+
+
+def _normalize_ingress(rules: Iterable[dict]) -> list[dict]:
+    # Cloudflare echoes empty optional fields (e.g. "originRequest": {}); they carry no meaning.
+    return [{k: v for k, v in sorted(rule.items()) if v not in (None, "", {}, [])} for rule in rules]
+
+
+def _ingress_order(hostname: str) -> tuple[bool, int, str]:
+    # Exact hostnames before wildcards, deeper wildcards before shallower ones.
+    return hostname.startswith("*."), -hostname.count("."), hostname
+
+
+def _ingress_shadows(rule: dict, hostname: str) -> bool:
+    # cloudflared matches ingress top-down; a path-less wildcard swallows every subdomain below it.
+    pattern = str(rule.get("hostname") or "")
+    return pattern.startswith("*.") and not rule.get("path") and hostname.endswith(pattern[1:])
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
 
 
 class CloudFlare:
@@ -37,6 +64,14 @@ class CloudFlare:
     """
 
     DEFAULT_TUNNEL_NAME = "pve-main"
+    DNS_PAGE_SIZE = 1000
+    ZONE_PAGE_SIZE = 50
+    # Zone listings persisted in zones.json are reused across instances for this long.
+    ZONE_INDEX_TTL = 3600
+    # A hostname outside every listed zone re-lists /zones at most this often (across instances).
+    ZONE_MISS_REFRESH = 300
+    # How long a verified tunnel ingress is trusted without re-reading it from Cloudflare.
+    INGRESS_VERIFY_TTL = 300
 
     def __init__(self, *, state_file: Path):
         self._state = TunnelStateStorage(state_file)
@@ -46,6 +81,11 @@ class CloudFlare:
         self._zone_id: Optional[str] = None
         self._account_id: Optional[str] = None
         self._zone_cache: dict[str, dict[str, str]] = {}
+        self._zone_index = ZoneIndex(self._state.path.parent / "zones.json", ttl=self.ZONE_INDEX_TTL)
+        self._zone_index_loaded = False
+        self._zone_index_fetched = False
+        self._zone_index_lock: Optional[asyncio.Lock] = None
+        self._tunnel_locks: dict[str, asyncio.Lock] = {}
 
         self.ready: bool = False
 
@@ -89,7 +129,7 @@ class CloudFlare:
         self._token = token
         self._zone_id = res.chosen_zone_id
         self._account_id = res.chosen_account_id
-        self._cf = AsyncCloudflare(api_token=token)
+        self._cf = get_cloudflare_client(token)
         self.ready = True
 
         if persist:
@@ -143,50 +183,38 @@ class CloudFlare:
         return data
 
     # ======================================================
-    # DNS (SDK)
+    # DNS
     # ======================================================
 
-    async def _dns_upsert(
-        self,
-        *,
-        zone_id: str,
-        record_type: str,
-        name: str,
-        content: str,
-        proxied: bool,
-    ) -> None:
-        self.ensure_ready()
-        cf = self._cf
+    async def _list_zone_records(self, zone_id: str) -> list[dict[str, Any]]:
+        async def page(n: int) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+            data = await self._raw("GET", f"/zones/{zone_id}/dns_records?page={n}&per_page={self.DNS_PAGE_SIZE}")
+            result = data.get("result")
+            return data, [r for r in result if isinstance(r, dict)] if isinstance(result, list) else []
 
-        found = await cf.dns.records.list(
-            zone_id=zone_id,
-            type=record_type,
-            name=name,
-            per_page=100,
-            page=1,
-        )
+        first, records = await page(1)
+        total_pages = int((first.get("result_info") or {}).get("total_pages") or 1)
+        if total_pages > 1:
+            for _, more in await asyncio.gather(*(page(n) for n in range(2, total_pages + 1))):
+                records.extend(more)
+        return records
 
-        if found.result:
-            for rec in found.result:
-                await cf.dns.records.update(
-                    zone_id=zone_id,
-                    dns_record_id=rec.id,
-                    type=record_type,
-                    name=name,
-                    content=content,
-                    proxied=proxied,
-                    ttl=120,
-                )
-            return
+    async def reconcile_dns(self, *, zone_id: str, desired: Iterable[DnsRecord]) -> dict[str, int]:
+        """
+        Привести записи зоны к желаемому состоянию.
 
-        await cf.dns.records.create(
-            zone_id=zone_id,
-            type=record_type,
-            name=name,
-            content=content,
-            proxied=proxied,
-            ttl=120,
-        )
+        Все записи зоны читаются один раз, совпадающие пропускаются, а
+        create/update отправляются одним запросом ``dns_records/batch``.
+        Ничего не удаляется: лишние записи (вторая A с тем же именем, A на
+        месте CNAME) применяются как есть, затем поднимается CloudflareError.
+        """
+        plan = plan_dns_changes(await self._list_zone_records(zone_id), desired)
+        if not plan.empty():
+            await self._raw("POST", f"/zones/{zone_id}/dns_records/batch", plan.batch_payload())
+        if plan.conflicts:
+            details = ", ".join(f"{c['type']} {c['name']} ({c['content']}) blocks {c['blocks']}" for c in plan.conflicts)
+            raise CloudflareError({"success": False, "errors": [{"message": f"DNS record conflicts: {details}"}]})
+        return plan.summary()
 
     async def list_tunnels(self, *, account_id: str) -> list[dict]:
         data = await self._raw("GET", f"/accounts/{account_id}/cfd_tunnel")
@@ -242,32 +270,31 @@ class CloudFlare:
 
         Self-heal:
           - if tunnel not found / config not found -> recreate tunnel and retry once
+
+        PUT пропускается, если собранный ingress совпадает с текущим. Если те же
+        входные параметры уже были применены к туннелю не раньше
+        INGRESS_VERIFY_TTL секунд назад, пропускается и GET.
         """
-        def build_ingress(existing: list[dict]) -> list[dict]:
-            desired = {
-                zone: service,
-                f"*.{zone}": service,
-            }
-            ordered: list[dict] = []
-            seen: set[str] = set()
+        extra_ingress = list(extra_ingress or [])
+        request_hash = _digest([zone, service, fallback_service, [dict(item) for item in extra_ingress]])
+        known = self._state.get_ingress(tunnel_id) or {}
+        if request_hash in (known.get("requests") or []) and time.time() - float(known.get("checked_at") or 0) < self.INGRESS_VERIFY_TTL:
+            return {"tunnel_id": tunnel_id, "recreated": False, "changed": False, "cached": True}
 
+        def build_ingress(existing: list[dict]) -> list[dict]:
+            desired: dict[str, str] = {}
             for item in extra_ingress or []:
                 hostname = (item.get("hostname") or "").strip().lower()
-                if not hostname:
+                if not hostname or hostname in desired:
                     continue
-                svc = (item.get("service") or "").strip() or service
-                if hostname in seen:
-                    continue
-                ordered.append({"hostname": hostname, "service": svc})
-                seen.add(hostname)
-
+                desired[hostname] = (item.get("service") or "").strip() or service
             for hostname in (zone, f"*.{zone}"):
-                if hostname in seen:
-                    continue
-                ordered.append({"hostname": hostname, "service": desired[hostname]})
-                seen.add(hostname)
+                desired.setdefault(hostname, service)
 
-            passthrough: list[dict] = []
+            # Existing rules keep their positions, so tunnels shared by several zones
+            # converge to one ingress no matter which zone is provisioned last.
+            rules: list[dict] = []
+            placed: set[str] = set()
             for rule in (existing or []):
                 hostname = str(rule.get("hostname") or "").strip().lower()
                 svc = str(rule.get("service") or "").strip()
@@ -277,15 +304,23 @@ class CloudFlare:
                     continue
                 if not svc:
                     continue
-                if hostname in desired or hostname in seen:
+                if hostname in desired:
+                    if hostname not in placed:
+                        rules.append({"hostname": hostname, "service": desired[hostname]})
+                        placed.add(hostname)
                     continue
 
                 merged = dict(rule)
                 merged["hostname"] = hostname
                 merged["service"] = svc
-                passthrough.append(merged)
+                rules.append(merged)
 
-            return ordered + passthrough + [{"service": fallback_service}]
+            # New rules go in a fixed order, each ahead of any wildcard that would shadow it.
+            for hostname in sorted(set(desired) - placed, key=_ingress_order):
+                at = next((i for i, rule in enumerate(rules) if _ingress_shadows(rule, hostname)), len(rules))
+                rules.insert(at, {"hostname": hostname, "service": desired[hostname]})
+
+            return rules + [{"service": fallback_service}]
 
         # ---- try #1
         try:
@@ -293,15 +328,19 @@ class CloudFlare:
                 "GET",
                 f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations",
             )
-            ingress = cfg.get("result", {}).get("config", {}).get("ingress", []) or []
-            ingress = build_ingress(ingress)
-
-            await self._raw(
-                "PUT",
-                f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations",
-                {"config": {"ingress": ingress}},
-            )
-            return {"tunnel_id": tunnel_id, "recreated": False}
+            current = cfg.get("result", {}).get("config", {}).get("ingress", []) or []
+            ingress = build_ingress(current)
+            ingress_hash = _digest(_normalize_ingress(ingress))
+            changed = ingress_hash != _digest(_normalize_ingress(current))
+
+            if changed:
+                await self._raw(
+                    "PUT",
+                    f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations",
+                    {"config": {"ingress": ingress}},
+                )
+            self._state.set_ingress(tunnel_id, ingress_hash=ingress_hash, request_hash=request_hash, checked_at=time.time())
+            return {"tunnel_id": tunnel_id, "recreated": False, "changed": changed}
 
         except CloudflareError as e:
             data = e.args[0] if e.args else {}
@@ -327,7 +366,13 @@ class CloudFlare:
             f"/accounts/{account_id}/cfd_tunnel/{new_id}/configurations",
             {"config": {"ingress": ingress}},
         )
-        return {"tunnel_id": new_id, "recreated": True}
+        self._state.set_ingress(
+            new_id,
+            ingress_hash=_digest(_normalize_ingress(ingress)),
+            request_hash=request_hash,
+            checked_at=time.time(),
+        )
+        return {"tunnel_id": new_id, "recreated": True, "changed": True}
 
     # ======================================================
     # Orchestration
@@ -368,35 +413,40 @@ class CloudFlare:
         else:
             name = tunnel_name or self.DEFAULT_TUNNEL_NAME
 
-        tunnel = await self.get_or_create_tunnel(name=name, account_id=account_id)
-        tunnel_id = tunnel["id"]
-
-        ingress_res = await self.ensure_ingress_for_zone(
-            account_id=account_id,
-            tunnel_id=tunnel_id,
-            zone=zone,
-            service=caddy_url,
-            tunnel_name=name,
-            extra_ingress=extra_ingress,
-            fallback_service=fallback_service,
-        )
+        # Zones provisioned concurrently may share a tunnel; its ingress is read-modify-written.
+        async with self._tunnel_locks.setdefault(name, asyncio.Lock()):
+            tunnel = await self.get_or_create_tunnel(name=name, account_id=account_id)
+            tunnel_id = tunnel["id"]
+
+            ingress_res = await self.ensure_ingress_for_zone(
+                account_id=account_id,
+                tunnel_id=tunnel_id,
+                zone=zone,
+                service=caddy_url,
+                tunnel_name=name,
+                extra_ingress=extra_ingress,
+                fallback_service=fallback_service,
+            )
+        if ingress_res.get("changed", True):
+            invalidate_tunnel(account_id, tunnel_id)
         tunnel_id = ingress_res["tunnel_id"]
+        if ingress_res.get("recreated"):
+            invalidate_tunnel(account_id, tunnel_id)
 
         target = f"{tunnel_id}.cfargotunnel.com"
-        await self._dns_upsert(zone_id=zone_id, record_type="CNAME", name=zone, content=target, proxied=True)
-        await self._dns_upsert(zone_id=zone_id, record_type="CNAME", name=f"*.{zone}", content=target, proxied=True)
-
+        desired = [
+            DnsRecord(name=zone, record_type="CNAME", content=target, proxied=True),
+            DnsRecord(name=f"*.{zone}", record_type="CNAME", content=target, proxied=True),
+        ]
         for exc in dns_exceptions:
             if exc.record_type.upper() in ("A", "AAAA"):
                 ipaddress.ip_address(exc.content)
+            desired.append(DnsRecord(name=exc.fqdn, record_type=exc.record_type, content=exc.content, proxied=False))
 
-            await self._dns_upsert(
-                zone_id=zone_id,
-                record_type=exc.record_type,
-                name=exc.fqdn,
-                content=exc.content,
-                proxied=False,
-            )
+        try:
+            dns_res = await self.reconcile_dns(zone_id=zone_id, desired=desired)
+        finally:
+            invalidate_zone_records(zone_id)
 
         # Persist to state (also adds zone to list)
         self._state.upsert_tunnel(
@@ -411,6 +461,7 @@ class CloudFlare:
             "tunnel_id": tunnel_id,
             "zone": zone,
             "recreated": ingress_res.get("recreated", False),
+            "dns": dns_res,
         }
 
     async def _resolve_zone(self, zone: str) -> dict[str, str]:
@@ -418,6 +469,10 @@ class CloudFlare:
         cached = self._zone_cache.get(zone)
         if cached:
             return cached
+        indexed = self._zone_index.lookup(zone)
+        if indexed and indexed[0] == zone and self._zone_index.fresh(token_fingerprint(self._token or "")):
+            self._zone_cache[zone] = indexed[1]
+            return indexed[1]
 
         self.ensure_ready()
         page = await self._cf.zones.list(name=zone, per_page=1, page=1)
@@ -431,14 +486,89 @@ class CloudFlare:
 
         resolved = {"zone_id": zone_id, "account_id": account_id}
         self._zone_cache[zone] = resolved
+        if self._token:
+            self._zone_index.add(token_fingerprint(self._token), zone, resolved)
         return resolved
 
+    async def _load_zone_index(self, *, refresh: bool = False) -> None:
+        """
+        Fill the zone index from one paged ``/zones`` listing.
+
+        A listing persisted in zones.json for the same token is reused while
+        younger than ZONE_INDEX_TTL. Otherwise (or with ``refresh``) the zones
+        are listed once per client; concurrent callers wait for the same
+        listing. If the listing fails, resolution falls back to per-suffix lookups.
+        """
+        token_hash = token_fingerprint(self._token or "")
+        if self._zone_index_loaded and not refresh:
+            return
+        if not refresh and self._zone_index.fresh(token_hash):
+            self._zone_index_loaded = True
+            return
+        if self._zone_index_lock is None:
+            self._zone_index_lock = asyncio.Lock()
+        async with self._zone_index_lock:
+            if self._zone_index_loaded and (not refresh or self._zone_index_fetched):
+                return
+
+            async def page(n: int) -> dict[str, Any]:
+                return await self._raw("GET", f"/zones?page={n}&per_page={self.ZONE_PAGE_SIZE}")
+
+            try:
+                first = await page(1)
+                pages = [first]
+                total_pages = int((first.get("result_info") or {}).get("total_pages") or 1)
+                if total_pages > 1:
+                    pages.extend(await asyncio.gather(*(page(n) for n in range(2, total_pages + 1))))
+            except Exception:
+                return
+            zones: dict[str, dict[str, str]] = {}
+            for data in pages:
+                result = data.get("result")
+                for z in result if isinstance(result, list) else []:
+                    if not isinstance(z, dict):
+                        continue
+                    name = str(z.get("name") or "").strip().lower()
+                    account_id = str((z.get("account") or {}).get("id") or "")
+                    if name and z.get("id") and account_id:
+                        zones[name] = {"zone_id": str(z["id"]), "account_id": account_id}
+            self._zone_cache.update(zones)
+            self._zone_index.replace(token_hash, zones)
+            self._zone_index_loaded = True
+            self._zone_index_fetched = True
+
+    def _lookup_zone(self, hostname: str) -> dict[str, str] | None:
+        found = self._zone_index.lookup(hostname)
+        if found is None:
+            return None
+        zone, info = found
+        self._zone_cache.setdefault(zone, info)
+        return {"zone": zone, **info}
+
     async def resolve_zone_for_hostname(self, hostname: str) -> dict[str, str]:
         hostname = hostname.strip().lower().strip(".")
         if not hostname or "." not in hostname:
             raise CloudflareError({"success": False, "errors": [{"message": f"Invalid hostname: {hostname}"}]})
 
         parts = hostname.split(".")
+        await self._load_zone_index()
+        if self._zone_index_loaded:
+            # Longest matching suffix wins: sub.example.co.uk -> example.co.uk before co.uk.
+            resolved = self._lookup_zone(hostname)
+            token_hash = token_fingerprint(self._token or "")
+            if (
+                resolved is None
+                and not self._zone_index_fetched
+                and not self._zone_index.listed_within(token_hash, self.ZONE_MISS_REFRESH)
+            ):
+                # The persisted listing may predate a newly added zone; hostnames whose zone is
+                # not on the account would otherwise re-list on every sync.
+                await self._load_zone_index(refresh=True)
+                resolved = self._lookup_zone(hostname)
+            if resolved is not None:
+                return resolved
+            raise CloudflareError({"success": False, "errors": [{"message": f"Zone not found for: {hostname}"}]})
+
         # Try longest suffix first
         for i in range(len(parts) - 1):
             candidate = ".".join(parts[i:])
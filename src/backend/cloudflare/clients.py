@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import os
+import threading
+from typing import Any
+
+import httpx
+
+from .ratelimit import ScheduledTransport
+from .sdk import AsyncCloudflare, _sdk
+from .verification import token_verifications
+
+_DEFAULT_BASE_URL = "https://api.cloudflare.com/client/v4"
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_lock = threading.Lock()
+# token fingerprint -> (client, event loop the client's connections belong to)
+_clients: dict[str, tuple[Any, asyncio.AbstractEventLoop | None]] = {}
+
+
+def token_fingerprint(token: str) -> str:
+    return hashlib.sha256((token or "").strip().encode("utf-8")).hexdigest()
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _new_client(token: str) -> Any:
+    # Imported lazily: settings -> core -> services -> cloudflare.client -> this module.
+    from .. import settings
+
+    factory = getattr(_sdk, "DefaultAsyncHttpxClient", None)
+    if not hasattr(_sdk, "AsyncCloudflare") or factory is None:
+        return AsyncCloudflare(api_token=token)
+    concurrency = max(1, int(settings.CLOUDFLARE_API_CONCURRENCY or 1))
+    transport = httpx.AsyncHTTPTransport(
+        http2=_HTTP2,
+        limits=httpx.Limits(
+            max_connections=concurrency * 2,
+            max_keepalive_connections=concurrency * 2,
+            keepalive_expiry=120,
+        ),
+    )
+    http_client = factory(
+        base_url=os.getenv("CLOUDFLARE_BASE_URL") or _DEFAULT_BASE_URL,
+        transport=ScheduledTransport(transport, on_auth_error=lambda: token_verifications.forget(token_fingerprint(token))),
+    )
+    # Retries are owned by ScheduledTransport so they share the rate-limit budget.
+    return AsyncCloudflare(api_token=token, http_client=http_client, max_retries=0)
+
+
+def get_cloudflare_client(token: str) -> Any:
+    """
+    Return the shared SDK client for ``token``.
+
+    One client (and its pooled keep-alive transport) is kept per token
+    fingerprint. httpx connections are bound to the event loop that opened
+    them, so a client created on another (e.g. already closed) loop is replaced.
+    """
+    key = token_fingerprint(token)
+    loop = _running_loop()
+    with _lock:
+        entry = _clients.get(key)
+        if entry is not None and entry[1] is loop:
+            return entry[0]
+        client = _new_client(token)
+        _clients[key] = (client, loop)
+    if entry is not None:
+        _schedule_close(*entry)
+    return client
+
+
+async def _close(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        await close()
+    except Exception:  # noqa: BLE001
+        # Closing is best-effort; the transport may already be gone.
+        pass
+
+
+def _schedule_close(client: Any, loop: asyncio.AbstractEventLoop | None) -> None:
+    if loop is None or loop.is_closed():
+        return
+    if loop is _running_loop():
+        loop.create_task(_close(client))
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close(client), loop)
+
+
+def discard_cloudflare_client(token: str) -> None:
+    """Drop (and close in the background) the shared client for a rotated or cleared token."""
+    with _lock:
+        entry = _clients.pop(token_fingerprint(token), None)
+    if entry is not None:
+        _schedule_close(*entry)
+
+
+async def close_cloudflare_clients() -> None:
+    with _lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    loop = _running_loop()
+    for client, client_loop in entries:
+        if client_loop is loop:
+            await _close(client)
+        else:
+            _schedule_close(client, client_loop)
@@ -15,3 +15,14 @@ class DnsException:
     fqdn: str
     record_type: str = "A"   # A | AAAA | CNAME
     content: str = ""
+
+
+@dataclass(frozen=True)
+class DnsRecord:
+    """Желаемое состояние одной DNS-записи зоны."""
+
+    name: str
+    record_type: str
+    content: str
+    proxied: bool = False
+    ttl: int = 120
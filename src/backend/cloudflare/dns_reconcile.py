@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+from .constants import DnsRecord
+
+# Cloudflare refuses a CNAME next to any A/AAAA/CNAME record with the same name.
+_ADDRESS_TYPES = {"A", "AAAA", "CNAME"}
+_PROXIABLE_TYPES = {"A", "AAAA", "CNAME"}
+
+
+@dataclass
+class DnsPlan:
+    posts: list[dict[str, Any]] = field(default_factory=list)
+    patches: list[dict[str, Any]] = field(default_factory=list)
+    # Existing records that block a desired one; they are never deleted automatically.
+    conflicts: list[dict[str, Any]] = field(default_factory=list)
+    unchanged: int = 0
+
+    def empty(self) -> bool:
+        return not (self.posts or self.patches)
+
+    def batch_payload(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {}
+        if self.patches:
+            payload["patches"] = self.patches
+        if self.posts:
+            payload["posts"] = self.posts
+        return payload
+
+    def summary(self) -> dict[str, int]:
+        return {
+            "created": len(self.posts),
+            "updated": len(self.patches),
+            "unchanged": self.unchanged,
+        }
+
+
+def _name(value: Any) -> str:
+    return str(value or "").strip().lower().rstrip(".")
+
+
+def _content(record_type: str, value: Any) -> str:
+    text = str(value or "").strip()
+    return _name(text) if record_type == "CNAME" else text
+
+
+def _matches(existing: dict[str, Any], want: DnsRecord) -> bool:
+    record_type = want.record_type.upper()
+    if _content(record_type, existing.get("content")) != _content(record_type, want.content):
+        return False
+    if record_type in _PROXIABLE_TYPES and bool(existing.get("proxied")) != want.proxied:
+        return False
+    # Proxied records always report ttl=1 (automatic).
+    if not want.proxied and int(existing.get("ttl") or 0) != want.ttl:
+        return False
+    return True
+
+
+def _body(want: DnsRecord) -> dict[str, Any]:
+    record_type = want.record_type.upper()
+    body: dict[str, Any] = {
+        "type": record_type,
+        "name": _name(want.name),
+        "content": want.content,
+        "ttl": 1 if want.proxied else want.ttl,
+    }
+    if record_type in _PROXIABLE_TYPES:
+        body["proxied"] = want.proxied
+    return body
+
+
+def plan_dns_changes(existing: Iterable[dict[str, Any]], desired: Iterable[DnsRecord]) -> DnsPlan:
+    """
+    Diff the zone's current records against the desired ones.
+
+    Only names that appear in ``desired`` are touched, and nothing is deleted:
+    records at those names may have been created by hand. For each desired
+    (name, type) the first existing record is kept (patched if it differs);
+    further records of that pair (e.g. round-robin A records) are reported in
+    ``conflicts``. An A/AAAA record next to a desired CNAME (or a CNAME next to
+    a desired A/AAAA) is reported too, and the desired record it blocks is left out.
+    """
+    wanted: dict[tuple[str, str], DnsRecord] = {}
+    for record in desired:
+        wanted[(_name(record.name), record.record_type.upper())] = record
+    names = {name for name, _ in wanted}
+    cname_names = {name for name, record_type in wanted if record_type == "CNAME"}
+    address_names = {name for name, record_type in wanted if record_type in _ADDRESS_TYPES}
+
+    by_key: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    blocked: set[tuple[str, str]] = set()
+    plan = DnsPlan()
+    for record in existing:
+        name = _name(record.get("name"))
+        if name not in names:
+            continue
+        record_type = str(record.get("type") or "").upper()
+        key = (name, record_type)
+        if key in wanted:
+            by_key.setdefault(key, []).append(record)
+            continue
+        if record_type not in _ADDRESS_TYPES:
+            continue
+        if name in cname_names:
+            blocks = [(name, "CNAME")]
+        elif record_type == "CNAME" and name in address_names:
+            blocks = [k for k in wanted if k[0] == name]
+        else:
+            continue
+        blocked.update(blocks)
+        plan.conflicts.extend(
+            {"name": name, "type": record_type, "content": record.get("content"), "blocks": want_type}
+            for _, want_type in blocks
+        )
+
+    for key, want in wanted.items():
+        if key in blocked:
+            continue
+        current = by_key.get(key) or []
+        if not current:
+            plan.posts.append(_body(want))
+            continue
+        # Prefer a record that already matches so a correct zone needs no writes.
+        current.sort(key=lambda rec: not _matches(rec, want))
+        keep, extra = current[0], current[1:]
+        if _matches(keep, want):
+            plan.unchanged += 1
+        else:
+            plan.patches.append({"id": keep.get("id"), **_body(want)})
+        plan.conflicts.extend(
+            {"name": key[0], "type": key[1], "content": rec.get("content"), "blocks": key[1]} for rec in extra
+        )
+    return plan
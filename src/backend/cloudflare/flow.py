@@ -1,3 +1,4 @@
+import asyncio
 import ipaddress
 from pathlib import Path
 
@@ -7,6 +8,7 @@ from .client import CloudFlare
 from .constants import DnsException
 from .exception import CloudflareError
 from .hostnames import resolve_cf_token
+from .ratelimit import background_priority
 
 
 def _iter_upstreams(route: dict):
@@ -68,7 +70,47 @@ def _extract_ssh_exceptions(routes_data: dict) -> dict[str, list[DnsException]]:
     return exceptions
 
 
+async def resolve_zones(cf: CloudFlare, hostnames: list[str]) -> dict[str, dict]:
+    """Resolve hostnames concurrently; hostnames without a zone are left out."""
+    results = await asyncio.gather(*(cf.resolve_zone_for_hostname(h) for h in hostnames), return_exceptions=True)
+    resolved: dict[str, dict] = {}
+    for hostname, result in zip(hostnames, results):
+        if isinstance(result, CloudflareError):
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        resolved[hostname] = result
+    return resolved
+
+
+async def provision_zones(cf: CloudFlare, jobs: dict[str, dict]) -> dict:
+    """
+    Run provision_all_to_caddy for every zone, at most
+    CLOUDFLARE_PROVISION_CONCURRENCY at a time. A failing zone does not stop
+    the others; it is reported under "errors".
+    """
+    limit = asyncio.Semaphore(max(1, int(settings.CLOUDFLARE_PROVISION_CONCURRENCY or 1)))
+
+    async def run(zone: str, kwargs: dict) -> tuple[bool, dict]:
+        async with limit:
+            try:
+                return True, await cf.provision_all_to_caddy(zone=zone, **kwargs)
+            except Exception as exc:  # noqa: BLE001
+                return False, {"zone": zone, "error": str(exc)}
+
+    outcomes = await asyncio.gather(*(run(zone, kwargs) for zone, kwargs in jobs.items()))
+    zones = [res for ok, res in outcomes if ok]
+    errors = [res for ok, res in outcomes if not ok]
+    return {"status": "partial" if errors else "ok", "zones": zones, "errors": errors}
+
+
 async def sync_cloudflare_from_routes(data: dict | None = None) -> dict:
+    # Bulk sync yields to interactive Cloudflare calls in the shared rate-limit budget.
+    with background_priority():
+        return await _sync_cloudflare_from_routes(data)
+
+
+async def _sync_cloudflare_from_routes(data: dict | None) -> dict:
     if data is None:
         data = load_routes()
     domains: set[str] = set()
@@ -98,24 +140,13 @@ async def sync_cloudflare_from_routes(data: dict | None = None) -> dict:
     exceptions_by_domain = _extract_ssh_exceptions(data)
     zones: dict[str, dict] = {}
 
-    for domain in sorted(domains):
-        try:
-            zone_info = await cf.resolve_zone_for_hostname(domain)
-        except CloudflareError:
-            continue
-        zone = zone_info["zone"]
-        zones.setdefault(zone, {"domains": set(), "exceptions": []})
-        zones[zone]["domains"].add(domain)
+    resolved = await resolve_zones(cf, sorted(domains))
+    for domain in sorted(resolved):
+        zone = resolved[domain]["zone"]
+        zones.setdefault(zone, {"caddy_url": settings.CLOUDFLARE_DEFAULT_SERVICE or "http://127.0.0.1:80", "dns_exceptions": []})
         if domain in exceptions_by_domain:
-            zones[zone]["exceptions"].extend(exceptions_by_domain[domain])
-
-    results = []
-    for zone, info in zones.items():
-        res = await cf.provision_all_to_caddy(
-            zone=zone,
-            caddy_url=settings.CLOUDFLARE_DEFAULT_SERVICE or "http://127.0.0.1:80",
-            dns_exceptions=info["exceptions"],
-        )
-        results.append(res)
-
-    return {"status": "ok", "zones": results, "domains": len(domains)}
+            zones[zone]["dns_exceptions"].extend(exceptions_by_domain[domain])
+
+    result = await provision_zones(cf, zones)
+    result["domains"] = len(domains)
+    return result
@@ -155,37 +155,35 @@ async def apply_cloudflare_config(data: dict) -> dict:
         return {"status": "ok", "domains": 0}
 
     # optional exceptions for port 22 from routes
-    from .flow import _extract_ssh_exceptions
+    from .flow import _extract_ssh_exceptions, provision_zones, resolve_zones
 
     exceptions_by_domain = _extract_ssh_exceptions(load_routes())
 
+    resolved = await resolve_zones(cf, [entry["hostname"] for entry in hostnames])
     zones: dict[str, dict] = {}
     for entry in hostnames:
         hostname = entry["hostname"]
-        try:
-            zone_info = await cf.resolve_zone_for_hostname(hostname)
-        except CloudflareError:
+        if hostname not in resolved:
             continue
-        zone = zone_info["zone"]
-        zones.setdefault(zone, {"entries": [], "exceptions": []})
-        zones[zone]["entries"].append(
+        zone = resolved[hostname]["zone"]
+        zones.setdefault(
+            zone,
+            {
+                "caddy_url": settings.CLOUDFLARE_DEFAULT_SERVICE or "http://127.0.0.1:80",
+                "dns_exceptions": [],
+                "extra_ingress": [],
+                "fallback_service": fallback,
+            },
+        )
+        zones[zone]["extra_ingress"].append(
             {
                 "hostname": hostname,
                 "service": entry.get("service") or settings.CLOUDFLARE_DEFAULT_SERVICE,
             }
         )
         if hostname in exceptions_by_domain:
-            zones[zone]["exceptions"].extend(exceptions_by_domain[hostname])
-
-    results = []
-    for zone, info in zones.items():
-        res = await cf.provision_all_to_caddy(
-            zone=zone,
-            caddy_url=settings.CLOUDFLARE_DEFAULT_SERVICE or "http://127.0.0.1:80",
-            dns_exceptions=info["exceptions"],
-            extra_ingress=info["entries"],
-            fallback_service=fallback,
-        )
-        results.append(res)
+            zones[zone]["dns_exceptions"].extend(exceptions_by_domain[hostname])
 
-    return {"status": "ok", "zones": results, "domains": len(hostnames)}
+    result = await provision_zones(cf, zones)
+    result["domains"] = len(hostnames)
+    return result
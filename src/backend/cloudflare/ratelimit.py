@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from ..metrics import CLOUDFLARE_CALL_SECONDS, GaugeFunc
+from ..tracing import span
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+AUTH_ERROR_STATUSES = {401, 403}
+# 5xx is retried only where repeating the request cannot duplicate a side effect.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("cloudflare_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Run Cloudflare calls made in this context (and tasks it spawns) as background sync."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class RateLimitScheduler:
+    """
+    Client-side token bucket for Cloudflare's per-token budget
+    (1200 requests per 5 minutes by default).
+
+    Background requests leave ``reserve`` of the bucket to interactive ones and
+    yield while an interactive request is waiting. A 429 pauses every caller
+    until the server's Retry-After has passed.
+    """
+
+    def __init__(self, capacity: int = 1200, period: float = 300.0, reserve: float = 0.1) -> None:
+        self.capacity = max(1.0, float(capacity))
+        self.period = max(1.0, float(period))
+        self.rate = self.capacity / self.period
+        self.reserve_tokens = self.capacity * max(0.0, min(reserve, 0.9))
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._interactive_waiting = 0
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "waited_ms": 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, priority: str) -> float:
+        """Take a token and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            floor = 0.0
+            if priority == BACKGROUND:
+                if self._interactive_waiting:
+                    return 1.0 / self.rate
+                floor = self.reserve_tokens
+            if self._tokens - 1.0 >= floor:
+                self._tokens -= 1.0
+                self.stats["requests"] += 1
+                return 0.0
+            return (floor + 1.0 - self._tokens) / self.rate
+
+    async def acquire(self, priority: str = INTERACTIVE) -> None:
+        started = time.monotonic()
+        interactive = priority != BACKGROUND
+        if interactive:
+            with self._lock:
+                self._interactive_waiting += 1
+        try:
+            while (wait := self._try_take(priority)) > 0:
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            if interactive:
+                with self._lock:
+                    self._interactive_waiting -= 1
+        waited = int((time.monotonic() - started) * 1000)
+        if waited:
+            with self._lock:
+                self.stats["waited_ms"] += waited
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + max(0.0, seconds))
+            self.stats["throttled"] += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.stats["retries"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "capacity": int(self.capacity),
+                "period_sec": int(self.period),
+                "remaining": int(self._tokens),
+                "blocked_for_sec": round(max(0.0, self._blocked_until - now), 1),
+                **self.stats,
+            }
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    value = (response.headers.get("retry-after") or "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)].
+    return random.uniform(0.0, min(cap, base * (2**attempt)))
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that takes a scheduler token per attempt and retries 429/5xx.
+
+    ``on_auth_error`` is called for 401/403 responses (e.g. to drop a cached
+    token verification).
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        *,
+        scheduler: RateLimitScheduler | None = None,
+        max_retries: int | None = None,
+        backoff_base: float = 0.5,
+        on_auth_error: Callable[[], None] | None = None,
+    ) -> None:
+        self._inner = inner
+        self._scheduler = scheduler
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._on_auth_error = on_auth_error
+
+    @property
+    def scheduler(self) -> RateLimitScheduler:
+        return self._scheduler or get_scheduler()
+
+    @property
+    def max_retries(self) -> int:
+        if self._max_retries is not None:
+            return self._max_retries
+        from .. import settings
+
+        return max(0, int(settings.CLOUDFLARE_MAX_RETRIES or 0))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scheduler = self.scheduler
+        max_retries = self.max_retries
+        attempt = 0
+        while True:
+            await scheduler.acquire(current_priority())
+            started = time.perf_counter()
+            with span("cloudflare.request", method=request.method, path=request.url.path, attempt=attempt) as call:
+                try:
+                    response = await self._inner.handle_async_request(request)
+                except Exception:
+                    CLOUDFLARE_CALL_SECONDS.labels(request.method, "error").observe(time.perf_counter() - started)
+                    raise
+                call.set(status=response.status_code)
+            status = response.status_code
+            CLOUDFLARE_CALL_SECONDS.labels(request.method, str(status)).observe(time.perf_counter() - started)
+            if status in AUTH_ERROR_STATUSES and self._on_auth_error is not None:
+                self._on_auth_error()
+            retryable = status == 429 or (status in RETRY_STATUSES and request.method in IDEMPOTENT_METHODS)
+            if not retryable or attempt >= max_retries:
+                return response
+            delay = retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt, self._backoff_base)
+            delay = min(delay, scheduler.period)
+            if status == 429:
+                scheduler.pause(delay)
+            await response.aclose()
+            scheduler.record_retry()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+_scheduler: RateLimitScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    global _scheduler
+    # Imported lazily: settings -> core -> services -> cloudflare.client -> this module.
+    from .. import settings
+
+    capacity = max(1, int(settings.CLOUDFLARE_RATE_LIMIT or 1))
+    with _scheduler_lock:
+        if _scheduler is None or int(_scheduler.capacity) != capacity:
+            _scheduler = RateLimitScheduler(capacity=capacity)
+        return _scheduler
+
+
+def rate_limit_snapshot() -> dict[str, Any]:
+    return get_scheduler().snapshot()
+
+
+GaugeFunc(
+    "janus_cloudflare_rate_limit_remaining",
+    "Requests left in the client-side Cloudflare rate-limit bucket.",
+    lambda: {(): float(rate_limit_snapshot()["remaining"])},
+)
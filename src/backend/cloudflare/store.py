@@ -14,6 +14,13 @@ class TunnelStateStorage:
           "token": "...",
           "zones": ["example.com"]
         }
+      },
+      "ingress": {
+        "<tunnel_id>": {
+          "hash": "<sha256 применённого ingress>",
+          "checked_at": 1700000000.0,
+          "requests": ["<sha256 входных параметров ensure_ingress_for_zone>"]
+        }
       }
     }
     """
@@ -47,6 +54,8 @@ class TunnelStateStorage:
 
             if not isinstance(data["tunnels"], dict):
                 data["tunnels"] = {}
+            if not isinstance(data.get("ingress", {}), dict):
+                data["ingress"] = {}
 
             return data
 
@@ -105,5 +114,27 @@ class TunnelStateStorage:
     def remove_tunnel(self, name: str) -> None:
         data = self.load()
         if name in data.get("tunnels", {}):
-            del data["tunnels"][name]
+            removed = data["tunnels"].pop(name)
+            data.get("ingress", {}).pop(str((removed or {}).get("id") or ""), None)
             self.save(data)
+
+    # ---------- ingress ----------
+
+    def get_ingress(self, tunnel_id: str) -> dict | None:
+        return self.load().get("ingress", {}).get(tunnel_id)
+
+    def set_ingress(self, tunnel_id: str, *, ingress_hash: str, request_hash: str, checked_at: float) -> None:
+        """
+        Запомнить ingress, проверенный/записанный для туннеля.
+
+        Список ``requests`` — входные параметры, которым этот ingress уже
+        удовлетворяет; он сбрасывается, когда меняется сам ingress.
+        """
+        data = self.load()
+        entries = data.setdefault("ingress", {})
+        entry = entries.get(tunnel_id) or {}
+        requests = list(entry.get("requests") or []) if entry.get("hash") == ingress_hash else []
+        if request_hash not in requests:
+            requests.append(request_hash)
+        entries[tunnel_id] = {"hash": ingress_hash, "checked_at": checked_at, "requests": requests}
+        self.save(data)
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from ..metrics import CACHE_LOOKUPS
+
+
+class TokenVerificationCache:
+    """Results of ``/user/tokens/verify`` per token fingerprint, kept for a short TTL."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[bool, float]] = {}
+
+    def get(self, fingerprint: str, ttl: float) -> tuple[bool, float] | None:
+        """Return ``(active, age_seconds)`` or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                CACHE_LOOKUPS.labels("cloudflare_verify", "token", "miss").inc()
+                return None
+            age = time.monotonic() - entry[1]
+            if age >= ttl:
+                del self._entries[fingerprint]
+                CACHE_LOOKUPS.labels("cloudflare_verify", "token", "miss").inc()
+                return None
+            CACHE_LOOKUPS.labels("cloudflare_verify", "token", "hit").inc()
+            return entry[0], age
+
+    def put(self, fingerprint: str, active: bool) -> None:
+        with self._lock:
+            self._entries[fingerprint] = (bool(active), time.monotonic())
+
+    def forget(self, fingerprint: str) -> None:
+        with self._lock:
+            self._entries.pop(fingerprint, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_verifications = TokenVerificationCache()
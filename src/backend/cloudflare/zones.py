@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+_LEAF = "$"
+
+
+class ZoneIndex:
+    """
+    Persistent zone -> (zone_id, account_id) map with a reversed-label suffix index.
+
+    File layout (next to cloudflare/state.json)::
+
+        {
+          "token": "<sha256 of the API token>",
+          "fetched_at": 1700000000.0,
+          "zones": {"example.com": {"zone_id": "...", "account_id": "..."}}
+        }
+
+    The trie is keyed by labels from the TLD down (``com -> example``), so the
+    longest zone suffix of a hostname is found in O(labels).
+    """
+
+    def __init__(self, path: Path, ttl: float = 3600.0) -> None:
+        self.path = path.expanduser()
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._token = ""
+        self._fetched_at = 0.0
+        self._zones: dict[str, dict[str, str]] = {}
+        self._trie: dict[str, Any] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("zones"), dict):
+            return
+        self._token = str(data.get("token") or "")
+        self._fetched_at = float(data.get("fetched_at") or 0.0)
+        self._zones = {
+            name: {"zone_id": str(info.get("zone_id") or ""), "account_id": str(info.get("account_id") or "")}
+            for name, info in data["zones"].items()
+            if isinstance(info, dict) and info.get("zone_id")
+        }
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        trie: dict[str, Any] = {}
+        for name, info in self._zones.items():
+            node = trie
+            for label in reversed(name.split(".")):
+                node = node.setdefault(label, {})
+            node[_LEAF] = info
+        self._trie = trie
+
+    def _save(self) -> None:
+        payload = {"token": self._token, "fetched_at": self._fetched_at, "zones": self._zones}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        try:
+            os.chmod(tmp, 0o600)
+        except OSError:
+            pass
+        tmp.replace(self.path)
+
+    def fresh(self, token_hash: str) -> bool:
+        return self.listed_within(token_hash, self.ttl)
+
+    def listed_within(self, token_hash: str, seconds: float) -> bool:
+        """True when the last full listing for this token is younger than ``seconds``."""
+        with self._lock:
+            return self._fetched_at > 0 and self._token == token_hash and time.time() - self._fetched_at < seconds
+
+    def replace(self, token_hash: str, zones: dict[str, dict[str, str]]) -> None:
+        with self._lock:
+            self._token = token_hash
+            self._fetched_at = time.time()
+            self._zones = {name.strip().lower(): dict(info) for name, info in zones.items()}
+            self._rebuild()
+            self._save()
+
+    def add(self, token_hash: str, zone: str, info: dict[str, str]) -> None:
+        """Record a zone resolved outside a full listing (does not extend the TTL)."""
+        with self._lock:
+            if self._token != token_hash:
+                return
+            self._zones[zone.strip().lower()] = dict(info)
+            self._rebuild()
+            self._save()
+
+    def lookup(self, hostname: str) -> tuple[str, dict[str, str]] | None:
+        labels = hostname.strip().lower().strip(".").split(".")
+        found: tuple[str, dict[str, str]] | None = None
+        with self._lock:
+            node = self._trie
+            for depth, label in enumerate(reversed(labels), start=1):
+                node = node.get(label)
+                if node is None:
+                    break
+                if _LEAF in node:
+                    found = (".".join(labels[-depth:]), dict(node[_LEAF]))
+        return found
+
+    def zones(self) -> dict[str, dict[str, str]]:
+        with self._lock:
+            return {name: dict(info) for name, info in self._zones.items()}
@@ -53,6 +53,11 @@ class Settings(BaseSettings):
 
     auth_password_file: Path = Field(default_factory=lambda: _path("auth.txt"))
     auth_cookie_name: str = "janus_auth"
+    auth_password_iterations: int = 390_000
+    auth_rehash: bool = True
+    auth_hash_workers: int = 2
+    auth_login_attempts: int = 10
+    auth_login_window: int = 300
     mcp_token_file: Path = Field(default_factory=lambda: _path("data", "mcp", "token.txt"))
 
     tls_redis_address: str = ""
@@ -67,6 +72,13 @@ class Settings(BaseSettings):
     cloudflare_hostnames_file: Path = Field(default_factory=lambda: _path("data", "cloudflare", "hostnames.json"))
     cloudflare_tunnel_token: str = ""
     cloudflare_state_file: Path = Field(default_factory=lambda: _path("data", "cloudflare", "state.json"))
+    cloudflare_api_concurrency: int = 8
+    cloudflare_cache_ttl: int = 60
+    cloudflare_verify_ttl: int = 60
+    cloudflare_rate_limit: int = 1200
+    cloudflare_max_retries: int = 4
+    cloudflare_provision_concurrency: int = 4
+    cloudflare_reconcile_interval: int = 300
     feature_tunnel_enabled: bool = True
     feature_vpn_enabled: bool = True
 
@@ -75,6 +87,17 @@ class Settings(BaseSettings):
     cf_tunnel_network: str = "host"
     cf_tunnel_dir: str = str(_path("data", "cloudflare"))
 
+    metrics_public: bool = False
+    metrics_token: str = ""
+
+    tracing_enabled: bool = True
+    tracing_buffer_size: int = 10_000
+    tracing_otlp_endpoint: str = ""
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_keep: int = 20
+    profiling_dir: Path = Field(default_factory=lambda: _path("data", "profiles"))
+
     vpn_data_dir: Path = Field(default_factory=lambda: _path("data", "vpn"))
     vpn_state_file: Path = Field(default_factory=lambda: _path("data", "vpn", "state.json"))
     vpn_wg_image: str = "ghcr.io/linuxserver/wireguard:latest"
@@ -82,6 +105,11 @@ class Settings(BaseSettings):
     vpn_port_base: int = 51820
     vpn_subnet_base: str = "10.66"
     vpn_public_endpoint: str = ""
+    vpn_reconcile_workers: int = 4
+    vpn_telemetry_interval: int = 30
+    vpn_telemetry_samples: int = 120
+    vpn_consolidated: bool = False
+    vpn_host_port_span: int = 32
 
     @model_validator(mode="before")
     @classmethod
@@ -123,6 +151,7 @@ class Settings(BaseSettings):
         self.cloudflare_hostnames_file = _resolve_path(root, self.cloudflare_hostnames_file)
         self.cloudflare_api_token_file = _resolve_path(root, self.cloudflare_api_token_file)
         self.cloudflare_state_file = _resolve_path(root, self.cloudflare_state_file)
+        self.profiling_dir = _resolve_path(root, self.profiling_dir)
         self.vpn_data_dir = _resolve_path(root, self.vpn_data_dir)
         self.vpn_state_file = _resolve_path(root, self.vpn_state_file)
 
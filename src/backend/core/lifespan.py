@@ -2,10 +2,23 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from ..services.lifespan import initialize_app
+from ..metrics import start_loop_lag_monitor, stop_loop_lag_monitor
+from ..services.lifespan import initialize_app, shutdown_app, start_startup_reconcile, stop_startup_reconcile
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Imported here: backend.cloudflare depends on settings, which imports core.
+    from ..cloudflare.clients import close_cloudflare_clients
+    from ..services.reconciler import start_reconciler, stop_reconciler
+
     initialize_app()
+    start_loop_lag_monitor()
+    start_startup_reconcile()
+    start_reconciler()
     yield
+    await stop_reconciler()
+    await stop_startup_reconcile()
+    await stop_loop_lag_monitor()
+    shutdown_app()
+    await close_cloudflare_clients()
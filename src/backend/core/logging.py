@@ -1,16 +1,66 @@
+import atexit
+import copy
 import json
 import logging
 import logging.config
+import math
 import os
-from datetime import datetime, timezone
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 
 from .context import get_correlation_id
 
+# json.dumps builds a new encoder per call when given non-default options; reuse one.
+_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False)
+
+_listener: QueueListener | None = None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def request_log_options() -> tuple[float, bool]:
+    """``(sample_rate, log_start)`` for request.start/request.end records."""
+    try:
+        rate = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1"))
+    except ValueError:
+        rate = 1.0
+    return min(1.0, max(0.0, rate)), _env_flag("LOG_REQUEST_START", True)
+
 
 class JsonFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._ts_second = -1
+        self._ts_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        # Same string as datetime.fromtimestamp(created, timezone.utc).isoformat(): microseconds
+        # are rounded half-to-even and a whole second has no fraction. The seconds part is cached.
+        frac, whole = math.modf(created)
+        second = int(whole)
+        micros = round(frac * 1_000_000)
+        if micros >= 1_000_000:
+            second += 1
+            micros -= 1_000_000
+        elif micros < 0:
+            second -= 1
+            micros += 1_000_000
+        if second != self._ts_second:
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._ts_second = second
+        if micros:
+            return f"{self._ts_prefix}.{micros:06d}+00:00"
+        return f"{self._ts_prefix}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:
         payload = {
-            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "ts": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
@@ -25,12 +75,16 @@ class JsonFormatter(logging.Formatter):
             "error",
             "trigger",
             "reason",
+            "summary",
+            "step",
         ):
             if hasattr(record, key):
                 payload[key] = getattr(record, key)
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload, ensure_ascii=False)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return _ENCODER.encode(payload)
 
 
 class CorrelationIdFilter(logging.Filter):
@@ -42,8 +96,52 @@ class CorrelationIdFilter(logging.Filter):
         return True
 
 
+class _RecordQueueHandler(QueueHandler):
+    """Enqueue the record itself; the stock prepare() formats it on the caller's thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Render tracebacks here so queued records don't keep frames alive.
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _install_queue() -> None:
+    """
+    Move the root handlers behind a QueueHandler: callers only enqueue the
+    record, formatting and stdout writes happen on the listener thread.
+    """
+    global _listener
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    queue_handler = _RecordQueueHandler(log_queue)
+    # Resolve the correlation id on the caller's thread; the listener has no context.
+    queue_handler.addFilter(CorrelationIdFilter())
+    root.addHandler(queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
 def configure_logging() -> None:
     level = os.getenv("LOG_LEVEL", "INFO").upper()
+    _stop_listener()
     logging.config.dictConfig(
         {
             "version": 1,
@@ -68,3 +166,8 @@ def configure_logging() -> None:
             "root": {"handlers": ["console"], "level": level},
         }
     )
+    if _env_flag("LOG_QUEUE", True):
+        _install_queue()
+
+
+atexit.register(_stop_listener)
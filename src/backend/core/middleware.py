@@ -1,43 +1,82 @@
 from __future__ import annotations
 
+import asyncio
+import hmac
 import logging
+import random
 import time
 import uuid
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from .context import set_correlation_id, reset_correlation_id
+from .context import get_correlation_id, set_correlation_id, reset_correlation_id
+from .logging import request_log_options
 from ..auth import auth_enabled, is_session_token_valid
+from ..metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_SECONDS
+from .. import profiling
 from .. import settings
+from ..services.lifespan import STARTUP_WAIT_TIMEOUT, wait_for_startup_provisioning
+from ..tracing import span
 
 logger = logging.getLogger("backend.request")
 
+PUBLIC_PREFIXES = ("/static", "/api/auth", "/api/health", "/favicon")
+METRICS_PATH = "/api/metrics"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
-class CorrelationIdMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, header_name: str = "X-Correlation-Id") -> None:
-        super().__init__(app)
+
+class CorrelationIdMiddleware:
+    """
+    Pure ASGI middleware: binds a correlation id for the request, echoes it in
+    the response headers and logs request start/end. Unlike BaseHTTPMiddleware
+    it does not re-wrap the response stream, so SSE bodies pass through as is.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Correlation-Id") -> None:
+        self.app = app
         self.header_name = header_name
+        self.sample_rate, self.log_start = request_log_options()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
-        correlation_id = request.headers.get(self.header_name) or str(uuid.uuid4())
+        # Start/end records of one request are sampled together; errors are always logged.
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        correlation_id = Headers(scope=scope).get(self.header_name) or str(uuid.uuid4())
         token = set_correlation_id(correlation_id)
-        request.state.correlation_id = correlation_id
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
         start = time.perf_counter()
 
-        logger.info(
-            "request.start",
-            extra={
-                "event": "request.start",
-                "correlation_id": correlation_id,
-                "method": request.method,
-                "path": request.url.path,
-            },
-        )
+        if sampled and self.log_start:
+            logger.info(
+                "request.start",
+                extra={
+                    "event": "request.start",
+                    "correlation_id": correlation_id,
+                    "method": method,
+                    "path": path,
+                },
+            )
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[self.header_name] = correlation_id
+            await send(message)
 
         try:
-            response = await call_next(request)
+            with span("http.request", method=method, path=path) as request_span:
+                await self.app(scope, receive, send_wrapper)
+                request_span.set(status_code=status_code)
         except Exception as exc:  # noqa: BLE001
             duration_ms = round((time.perf_counter() - start) * 1000, 2)
             logger.error(
@@ -45,49 +84,196 @@ class CorrelationIdMiddleware(BaseHTTPMiddleware):
                 extra={
                     "event": "request.error",
                     "correlation_id": correlation_id,
-                    "method": request.method,
-                    "path": request.url.path,
+                    "method": method,
+                    "path": path,
                     "duration_ms": duration_ms,
                     "error": str(exc),
                 },
             )
-            reset_correlation_id(token)
             raise
+        finally:
+            reset_correlation_id(token)
 
+        if not sampled and status_code < 500:
+            return
         duration_ms = round((time.perf_counter() - start) * 1000, 2)
-        response.headers[self.header_name] = correlation_id
         logger.info(
             "request.end",
             extra={
                 "event": "request.end",
                 "correlation_id": correlation_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
+                "method": method,
+                "path": path,
+                "status_code": status_code,
                 "duration_ms": duration_ms,
             },
         )
-        reset_correlation_id(token)
-        return response
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, header_name: str = "X-Auth-Token") -> None:
-        super().__init__(app)
+class AuthMiddleware:
+    """
+    Pure ASGI session check: cookie or ``X-Auth-Token`` header, read straight from the scope.
+    ``/api/metrics`` additionally accepts ``Authorization: Bearer <METRICS_TOKEN>`` so a
+    scraper does not depend on a session that expires, or skips auth with METRICS_PUBLIC.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Auth-Token") -> None:
+        self.app = app
+        self.header_name = header_name
+
+    def _is_public(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return path == "/" or path.startswith(PUBLIC_PREFIXES) or scope["method"] == "OPTIONS"
+
+    def _token(self, scope: Scope) -> str:
+        headers = Headers(scope=scope)
+        cookie = headers.get("cookie")
+        if cookie:
+            token = cookie_parser(cookie).get(settings.AUTH_COOKIE_NAME)
+            if token:
+                return token
+        return headers.get(self.header_name) or ""
+
+    def _is_metrics_scrape(self, scope: Scope) -> bool:
+        if scope["path"] != METRICS_PATH:
+            return False
+        if settings.METRICS_PUBLIC:
+            return True
+        if not settings.METRICS_TOKEN:
+            return False
+        scheme, _, token = (Headers(scope=scope).get("authorization") or "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        return hmac.compare_digest(token.strip().encode("utf-8"), settings.METRICS_TOKEN.encode("utf-8"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not auth_enabled() or self._is_public(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._is_metrics_scrape(scope) or is_session_token_valid(self._token(scope)):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse({"detail": "Unauthorized"}, status_code=401)
+        await response(scope, receive, send)
+
+
+class StartupGateMiddleware:
+    """
+    Holds API mutations until the startup steps that rewrite the Caddy config and
+    VPN containers from stored state have finished, so they cannot overwrite a
+    change made meanwhile. Answers 503 if that takes longer than
+    STARTUP_WAIT_TIMEOUT. Reads and ``/api/auth`` are never held.
+    """
+
+    def __init__(self, app: ASGIApp, timeout: float = STARTUP_WAIT_TIMEOUT) -> None:
+        self.app = app
+        self.timeout = timeout
+
+    def _held(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return scope["method"] not in SAFE_METHODS and path.startswith("/api/") and not path.startswith("/api/auth")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._held(scope) or await wait_for_startup_provisioning(self.timeout):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": "Startup reconcile is still running"}, status_code=503, headers={"Retry-After": "5"}
+        )
+        await response(scope, receive, send)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI request metrics: latency per route template (``/api/routes/{route_id}``,
+    not the raw path, to keep label cardinality bounded) and in-flight requests.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            HTTP_REQUEST_SECONDS.labels(method, template, str(status_code)).observe(time.perf_counter() - start)
+
+
+class ProfilerMiddleware:
+    """
+    Profiles a request when PROFILING_ENABLED is set and the request carries
+    ``X-Profile: 1`` or falls into PROFILING_SAMPLE_RATE. Sits inside
+    AuthMiddleware, so only authorised callers can trigger it. The report id
+    is returned in ``X-Profile-Id``.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Profile") -> None:
+        self.app = app
         self.header_name = header_name
 
-    async def dispatch(self, request: Request, call_next):
-        if not auth_enabled():
-            return await call_next(request)
+    def _wanted(self, scope: Scope) -> bool:
+        if not settings.PROFILING_ENABLED:
+            return False
+        if (Headers(scope=scope).get(self.header_name) or "").strip().lower() in {"1", "true", "yes"}:
+            return True
+        rate = float(settings.PROFILING_SAMPLE_RATE or 0)
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope) or not profiling.try_begin():
+            await self.app(scope, receive, send)
+            return
 
-        path = request.url.path
-        if path == "/" or path.startswith("/static") or path.startswith("/api/auth") or path.startswith("/favicon"):
-            return await call_next(request)
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        name = profiling.profile_name(get_correlation_id() or uuid.uuid4().hex)
+        status_code = 500
 
-        token = request.cookies.get(settings.AUTH_COOKIE_NAME) or request.headers.get(self.header_name) or ""
-        if is_session_token_valid(token):
-            return await call_next(request)
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-Id"] = name
+            await send(message)
 
-        return JSONResponse({"detail": "Unauthorized"}, status_code=401)
+        sampler = profiling.StackSampler()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            samples = sampler.stop()
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "samples": sum(samples.values()),
+                "correlation_id": get_correlation_id(),
+            }
+            # The slot is held until the report is on disk, so saves never overlap.
+            try:
+                await asyncio.to_thread(
+                    profiling.profile_store().save, name, profiling.render_collapsed(samples), meta
+                )
+            except OSError:
+                logger.warning("profiling.save_failed", extra={"event": "profiling.save_failed", "path": scope["path"]})
+            finally:
+                profiling.end()
@@ -2,11 +2,12 @@ import docker
 from docker.errors import NotFound, APIError
 
 from .docker_labels import compose_labels
+from .metrics import instrument_docker_client
 from . import settings
 
 
 def _client():
-    return docker.from_env()
+    return instrument_docker_client(docker.from_env())
 
 
 def tunnel_command(token: str) -> list[str]:
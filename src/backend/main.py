@@ -3,15 +3,25 @@ from fastapi.staticfiles import StaticFiles
 
 from .api import router
 from .core import configure_logging, lifespan
-from .core.middleware import AuthMiddleware, CorrelationIdMiddleware
+from .core.middleware import (
+    AuthMiddleware,
+    CorrelationIdMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    StartupGateMiddleware,
+)
 from . import settings
 
 
 def create_app() -> FastAPI:
     configure_logging()
     app = FastAPI(lifespan=lifespan)
+    # add_middleware() prepends: the profiler ends up innermost, behind auth.
+    app.add_middleware(ProfilerMiddleware)
+    app.add_middleware(StartupGateMiddleware)
     app.add_middleware(AuthMiddleware)
     app.add_middleware(CorrelationIdMiddleware)
+    app.add_middleware(MetricsMiddleware)
     app.include_router(router)
     app.mount("/static", StaticFiles(directory=str(settings.STATIC_DIR), check_dir=False), name="static")
 
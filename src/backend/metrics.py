@@ -0,0 +1,321 @@
+"""
+In-process Prometheus metrics for the dashboard API.
+
+Deliberately dependency-free and cheap on the hot path: a labelled child is a
+dict lookup by label tuple, an observation is a bisect plus a few integer
+increments under an uncontended per-child lock, and nothing is formatted
+until ``/api/metrics`` is scraped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_INTERVAL = 0.5
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+        return child
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: tuple[str, ...], child) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total_sum = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_format_value(total_sum)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class GaugeFunc(_Metric):
+    """Gauge whose samples are produced by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        func: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ) -> None:
+        self.func = func
+        super().__init__(name, documentation, labelnames)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = self.func()
+        except Exception:  # noqa: BLE001
+            samples = {}
+        for values, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "janus_http_request_duration_seconds",
+    "Dashboard API request latency by route template.",
+    ("method", "route", "status"),
+)
+HTTP_IN_FLIGHT = Gauge("janus_http_requests_in_flight", "Dashboard API requests being served.", ("method",))
+PROVISION_STAGE_SECONDS = Histogram(
+    "janus_provisioning_stage_duration_seconds",
+    "Duration of route-change provisioning stages.",
+    ("stage",),
+)
+DOCKER_CALL_SECONDS = Histogram(
+    "janus_docker_call_duration_seconds",
+    "Docker Engine API call latency.",
+    ("method", "endpoint"),
+)
+CLOUDFLARE_CALL_SECONDS = Histogram(
+    "janus_cloudflare_call_duration_seconds",
+    "Cloudflare API call latency (per attempt, including retries).",
+    ("method", "status"),
+)
+CACHE_LOOKUPS = Counter(
+    "janus_cache_lookups_total",
+    "Cache lookups by cache, kind and result (hit, stale, miss).",
+    ("cache", "kind", "result"),
+)
+TRACING_SPANS_DROPPED = Counter(
+    "janus_tracing_spans_dropped_total",
+    "Finished spans dropped because the OTLP export queue was full.",
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "janus_event_loop_lag_seconds",
+    "How late the event loop woke up from a timed sleep.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+@contextmanager
+def provision_stage(stage: str) -> Iterator[None]:
+    with PROVISION_STAGE_SECONDS.labels(stage).time():
+        yield
+
+
+def _docker_endpoint(path: str) -> str:
+    # /v1.43/containers/<id>/start -> containers/start; keeps ids out of labels.
+    parts = [part for part in path.split("?", 1)[0].split("/") if part]
+    if parts and parts[0].startswith("v") and parts[0][1:2].isdigit():
+        parts = parts[1:]
+    if not parts:
+        return "/"
+    if len(parts) == 1:
+        return parts[0]
+    return f"{parts[0]}/{parts[-1]}"
+
+
+def _docker_response_hook(response, *args, **kwargs):
+    request = response.request
+    endpoint = _docker_endpoint(getattr(request, "path_url", "") or "")
+    DOCKER_CALL_SECONDS.labels(request.method, endpoint).observe(response.elapsed.total_seconds())
+    return response
+
+
+def instrument_docker_client(client):
+    """Attach a latency hook to a docker-py client (its APIClient is a requests Session)."""
+    hooks = getattr(getattr(client, "api", None), "hooks", None)
+    if isinstance(hooks, dict):
+        response_hooks = hooks.setdefault("response", [])
+        if _docker_response_hook not in response_hooks:
+            response_hooks.append(_docker_response_hook)
+    return client
+
+
+_lag_task: asyncio.Task | None = None
+
+
+async def _loop_lag_monitor(interval: float) -> None:
+    child = EVENT_LOOP_LAG_SECONDS.labels()
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        child.observe(max(0.0, loop.time() - started - interval))
+
+
+def start_loop_lag_monitor(interval: float = LOOP_LAG_INTERVAL) -> None:
+    global _lag_task
+    if _lag_task is not None and not _lag_task.done():
+        return
+    _lag_task = asyncio.get_running_loop().create_task(_loop_lag_monitor(interval), name="loop-lag-monitor")
+
+
+async def stop_loop_lag_monitor() -> None:
+    global _lag_task
+    task, _lag_task = _lag_task, None
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,153 @@
+"""
+Opt-in request profiling.
+
+A profiled request runs with a sampling thread that snapshots every thread's
+Python stack (``sys._current_frames``) at a fixed interval and folds them into
+collapsed stacks (``frame;frame;frame count``), the input format of
+flamegraph.pl and speedscope. Threads parked in threading/selectors/queue
+are skipped so idle workers and the idle event loop don't drown the profile.
+Only one request is profiled at a time. Reports live in a bounded ring under
+``data/profiles``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 128
+_IDLE_MODULES = ("threading.py", "selectors.py", "queue.py")
+_NAME_RE = re.compile(r"^[0-9]+-[A-Za-z0-9_-]+\.collapsed$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+
+def render_collapsed(samples: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ProfileStore:
+    """Bounded on-disk ring of collapsed-stack reports plus an ``index.json`` of their metadata."""
+
+    def __init__(self, directory: Path, keep: int) -> None:
+        self.directory = directory
+        self.keep = max(1, int(keep))
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / "index.json"
+
+    def _read_index(self) -> list[dict[str, Any]]:
+        try:
+            data = json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+        return [entry for entry in data if isinstance(entry, dict)] if isinstance(data, list) else []
+
+    def save(self, name: str, report: str, meta: dict[str, Any]) -> dict[str, Any]:
+        entry = {"name": name, "created_at": time.time(), "size": len(report.encode("utf-8")), **meta}
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / name).write_text(report, encoding="utf-8")
+            index = [item for item in self._read_index() if item.get("name") != name]
+            index.append(entry)
+            for stale in index[: max(0, len(index) - self.keep)]:
+                try:
+                    (self.directory / str(stale.get("name"))).unlink()
+                except OSError:
+                    pass
+            index = index[-self.keep :]
+            tmp = self._index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+            tmp.replace(self._index_path)
+        return entry
+
+    def list(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(reversed(self._read_index()))
+
+    def path_for(self, name: str) -> Path | None:
+        if not _NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+def profile_name(correlation_id: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_-]", "", correlation_id)[:64] or "request"
+    return f"{int(time.time() * 1000)}-{slug}.collapsed"
+
+
+_active = threading.Lock()
+
+
+def try_begin() -> bool:
+    """Claim the single profiling slot; False when another request is being profiled."""
+    return _active.acquire(blocking=False)
+
+
+def end() -> None:
+    _active.release()
+
+
+_stores: dict[tuple[Path, int], ProfileStore] = {}
+_stores_lock = threading.Lock()
+
+
+def profile_store() -> ProfileStore:
+    """Shared store for the configured directory, so every caller serialises on one lock."""
+    from . import settings
+
+    key = (Path(settings.PROFILING_DIR), max(1, int(settings.PROFILING_KEEP)))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ProfileStore(*key)
+        return store
@@ -2,15 +2,20 @@ from .cloudflare import router as cloudflare_router
 from .auth import router as auth_router
 from .caddy_runtime import router as caddy_runtime_router
 from .features import router as features_router
+from .health import router as health_router
 from .inbound import cloudflare_router as inbound_cloudflare_router
 from .inbound import vpn_router as inbound_vpn_router
 from .l4 import router as l4_router
+from .metrics import router as metrics_router
 from .plugins import router as plugins_router
+from .profiling import router as profiling_router
 from .raw import router as raw_router
 from .routes import router as routes_router
+from .tracing import router as tracing_router
 from .tunnel import router as tunnel_router
 
 routers = [
+    health_router,
     auth_router,
     features_router,
     routes_router,
@@ -22,4 +27,7 @@ routers = [
     inbound_vpn_router,
     cloudflare_router,
     tunnel_router,
+    metrics_router,
+    profiling_router,
+    tracing_router,
 ]
@@ -3,11 +3,13 @@ from fastapi.responses import JSONResponse
 
 from .. import settings
 from ..auth import (
+    LoginThrottled,
     auth_enabled,
-    check_password,
+    check_password_async,
     clear_sessions,
     is_session_token_valid,
     issue_session_token,
+    login_limiter,
     revoke_session_token,
     set_password,
 )
@@ -15,6 +17,23 @@ from ..auth import (
 router = APIRouter(tags=["Auth"])
 
 
+async def _check_password_limited(request: Request, password: str) -> bool:
+    client_ip = request.client.host if request.client else ""
+    limiter = login_limiter()
+    try:
+        limiter.acquire(client_ip)
+    except LoginThrottled as exc:
+        raise HTTPException(
+            status_code=429, detail="Too many login attempts", headers={"Retry-After": str(exc.retry_after)}
+        )
+    ok = False
+    try:
+        ok = await check_password_async(password)
+    finally:
+        limiter.release(client_ip, ok)
+    return ok
+
+
 @router.get("/api/auth/status")
 def auth_status(request: Request):
     enabled = auth_enabled()
@@ -32,7 +51,7 @@ async def auth_login(request: Request):
         return {"enabled": False, "authorized": True}
     if not isinstance(password, str) or not password.strip():
         raise HTTPException(status_code=400, detail="Password is required")
-    if not check_password(password.strip()):
+    if not await _check_password_limited(request, password.strip()):
         raise HTTPException(status_code=401, detail="Invalid password")
     session_token = issue_session_token()
     response = JSONResponse({"status": "ok"})
@@ -43,7 +62,10 @@ async def auth_login(request: Request):
 @router.post("/api/auth/logout")
 def auth_logout(request: Request):
     token = request.cookies.get(settings.AUTH_COOKIE_NAME) or request.headers.get("X-Auth-Token")
-    revoke_session_token(token)
+    try:
+        revoke_session_token(token)
+    except OSError:
+        raise HTTPException(status_code=500, detail="Failed to revoke session")
     response = JSONResponse({"status": "ok"})
     response.delete_cookie(settings.AUTH_COOKIE_NAME)
     return response
@@ -70,7 +92,7 @@ async def auth_config(request: Request):
         if auth_enabled():
             session_token = request.cookies.get(settings.AUTH_COOKIE_NAME) or request.headers.get("X-Auth-Token")
             password = str(payload.get("password") or "")
-            if not is_session_token_valid(session_token) and not check_password(password):
+            if not is_session_token_valid(session_token) and not await _check_password_limited(request, password):
                 raise HTTPException(status_code=401, detail="Invalid password")
         set_password("")
         clear_sessions()
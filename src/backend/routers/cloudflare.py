@@ -6,6 +6,7 @@ from ..validation import validate_domain
 from ..services import cloudflare as cf_service
 from ..services.errors import ServiceError
 from ..services import features as features_service
+from ..services import reconciler as reconciler_service
 
 
 def _ensure_tunnel_enabled() -> None:
@@ -83,3 +84,13 @@ async def api_cf_sync():
         return await cf_service.sync_from_routes()
     except ServiceError as exc:
         raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+
+
+@router.get("/api/cf/reconcile")
+def api_cf_reconcile_status():
+    return reconciler_service.reconciler_status()
+
+
+@router.post("/api/cf/reconcile")
+def api_cf_reconcile():
+    return reconciler_service.enqueue_reconcile("manual")
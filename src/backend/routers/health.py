@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+from .. import settings
+from ..auth import auth_enabled, is_session_token_valid
+from ..services.lifespan import startup_status
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/api/health/live")
+async def api_health_live():
+    return {"status": "ok"}
+
+
+@router.get("/api/health/ready")
+async def api_health_ready(request: Request):
+    status = startup_status()
+    # The endpoint is public; step errors carry Docker/Cloudflare exception text.
+    token = request.cookies.get(settings.AUTH_COOKIE_NAME) or request.headers.get("X-Auth-Token")
+    if auth_enabled() and not is_session_token_valid(token):
+        for step in status["steps"]:
+            step.pop("error", None)
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
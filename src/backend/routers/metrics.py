@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/api/metrics", response_class=PlainTextResponse)
+def api_metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
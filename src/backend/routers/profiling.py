@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from .. import settings
+from ..profiling import profile_store
+
+
+def _ensure_profiling_enabled() -> None:
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+router = APIRouter(tags=["Profiling"], dependencies=[Depends(_ensure_profiling_enabled)])
+
+
+@router.get("/api/profiles")
+def api_profiles():
+    return {"profiles": profile_store().list()}
+
+
+@router.get("/api/profiles/{name}")
+def api_profile_download(name: str):
+    path = profile_store().path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(str(path), media_type="text/plain; charset=utf-8", filename=name)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..tracing import recent_traces, spans_for
+
+router = APIRouter(tags=["Tracing"])
+
+
+@router.get("/api/traces")
+def api_traces(limit: int = Query(50, ge=1, le=500)):
+    return {"traces": recent_traces(limit)}
+
+
+@router.get("/api/traces/{correlation_id}")
+def api_trace(correlation_id: str):
+    spans = spans_for(correlation_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"correlation_id": correlation_id, "spans": spans}
@@ -20,7 +20,9 @@ from docker.errors import APIError, NotFound
 from ..core.config import get_settings
 from ..caddyfile import write_default_caddyfile
 from ..docker_labels import compose_labels
+from ..metrics import instrument_docker_client
 from ..storage import load_routes
+from ..tracing import span
 from ..utils import ensure_parent
 from .errors import ServiceError
 
@@ -107,7 +109,7 @@ _log_counter = 0
 
 
 def _docker_client():
-    return docker.from_env()
+    return instrument_docker_client(docker.from_env())
 
 
 def _now_iso() -> str:
@@ -688,8 +690,12 @@ def apply_caddyfile() -> dict[str, Any]:
         if str(getattr(container, "status", "") or "") != "running":
             container.start()
             container.reload()
-        _sync_caddyfile_into_container(container)
-        reload_result = container.exec_run(["caddy", "reload", "--config", "/etc/caddy/Caddyfile", "--adapter", "caddyfile"])
+        with span("caddy.container_sync", container=RUNTIME_CONTAINER):
+            _sync_caddyfile_into_container(container)
+        with span("caddy.reload", container=RUNTIME_CONTAINER):
+            reload_result = container.exec_run(
+                ["caddy", "reload", "--config", "/etc/caddy/Caddyfile", "--adapter", "caddyfile"]
+            )
     except APIError as exc:
         raise ServiceError(500, str(exc))
     except Exception as exc:  # noqa: BLE001
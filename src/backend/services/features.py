@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import json
+import os
+import time
 from pathlib import Path
 from threading import Lock
 from typing import Any
@@ -11,6 +13,22 @@ from ..core import get_settings
 _FEATURE_TUNNEL_KEY = "feature_tunnel_enabled"
 _FEATURE_VPN_KEY = "feature_vpn_enabled"
 _LOCK = Lock()
+# External edits of the settings file are picked up at most this late.
+_STAT_INTERVAL = 1.0
+
+
+class _Snapshot:
+    __slots__ = ("path", "mtime", "checked_at", "payload", "features")
+
+    def __init__(self, path: Path, mtime: float | None, payload: dict) -> None:
+        self.path = path
+        self.mtime = mtime
+        self.checked_at = time.monotonic()
+        self.payload = payload
+        self.features = _features_payload(payload)
+
+
+_snapshot: _Snapshot | None = None
 
 
 def _to_bool(value: Any, default: bool) -> bool:
@@ -60,12 +78,16 @@ def _save_settings_payload(payload: dict[str, Any]) -> None:
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
 
-def _load_settings_payload() -> dict:
+def _file_mtime(path: Path) -> float | None:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _read_settings_payload(path: Path) -> tuple[dict, dict]:
+    """Return ``(merged, raw)``: file values over defaults, and what the file holds."""
     defaults = _default_settings_payload()
-    path = _settings_file()
-    if not path.exists():
-        _save_settings_payload(defaults)
-        return defaults
     try:
         raw = json.loads(path.read_text(encoding="utf-8"))
     except Exception:
@@ -77,46 +99,75 @@ def _load_settings_payload() -> dict:
     merged.update(raw)
     merged[_FEATURE_TUNNEL_KEY] = _to_bool(merged.get(_FEATURE_TUNNEL_KEY), bool(settings.FEATURE_TUNNEL_ENABLED))
     merged[_FEATURE_VPN_KEY] = _to_bool(merged.get(_FEATURE_VPN_KEY), bool(settings.FEATURE_VPN_ENABLED))
+    return merged, raw
+
+
+def _store_snapshot(path: Path, payload: dict) -> _Snapshot:
+    global _snapshot
+    _snapshot = _Snapshot(path, _file_mtime(path), payload)
+    return _snapshot
+
 
-    if merged != raw:
-        _save_settings_payload(merged)
-    return merged
+def _current_snapshot() -> _Snapshot:
+    """
+    In-memory view of the settings file. Request paths only read it; the file
+    is re-stat'ed at most once per _STAT_INTERVAL and re-read when its mtime
+    changes.
+    """
+    snap = _snapshot
+    path = _settings_file()
+    if snap is not None and snap.path == path:
+        now = time.monotonic()
+        if now - snap.checked_at < _STAT_INTERVAL:
+            return snap
+        if _file_mtime(path) == snap.mtime:
+            snap.checked_at = now
+            return snap
+    with _LOCK:
+        merged, _raw = _read_settings_payload(path)
+        return _store_snapshot(path, merged)
 
 
 def ensure_runtime_settings_file() -> dict:
+    """Startup hook: create or complete the settings file with defaults."""
+    path = _settings_file()
     with _LOCK:
-        payload = _load_settings_payload()
+        merged, raw = _read_settings_payload(path)
+        if merged != raw:
+            _save_settings_payload(merged)
+        snap = _store_snapshot(path, merged)
     return {
-        "file": str(_settings_file()),
-        "features": _features_payload(payload),
+        "file": str(path),
+        "features": dict(snap.features),
     }
 
 
 def get_runtime_settings() -> dict:
-    payload = _load_settings_payload()
+    snap = _current_snapshot()
     return {
-        "file": str(_settings_file()),
-        "settings": payload,
-        "features": _features_payload(payload),
+        "file": str(snap.path),
+        "settings": dict(snap.payload),
+        "features": dict(snap.features),
     }
 
 
 def get_features() -> dict:
-    return _features_payload(_load_settings_payload())
+    return dict(_current_snapshot().features)
 
 
 def is_tunnel_enabled() -> bool:
-    return bool(get_features()["tunnel_enabled"])
+    return bool(_current_snapshot().features["tunnel_enabled"])
 
 
 def is_vpn_enabled() -> bool:
-    return bool(get_features()["vpn_enabled"])
+    return bool(_current_snapshot().features["vpn_enabled"])
 
 
 def update_features(payload: dict | None) -> dict:
     data = payload or {}
+    path = _settings_file()
     with _LOCK:
-        settings_payload = _load_settings_payload()
+        settings_payload, _raw = _read_settings_payload(path)
         if "tunnel_enabled" in data or _FEATURE_TUNNEL_KEY in data:
             value = data.get("tunnel_enabled", data.get(_FEATURE_TUNNEL_KEY))
             settings_payload[_FEATURE_TUNNEL_KEY] = _to_bool(
@@ -130,7 +181,8 @@ def update_features(payload: dict | None) -> dict:
                 bool(settings_payload.get(_FEATURE_VPN_KEY, settings.FEATURE_VPN_ENABLED)),
             )
         _save_settings_payload(settings_payload)
+        snap = _store_snapshot(path, settings_payload)
         return {
-            "file": str(_settings_file()),
-            **_features_payload(settings_payload),
+            "file": str(path),
+            **snap.features,
         }
@@ -6,10 +6,14 @@ from pathlib import Path
 from typing import Any
 
 from .. import settings
+from ..cloudflare.cache import inventory_cache, invalidate_tunnel
 from ..cloudflare.checker import CloudflareTokenCheckerSDK
 from ..cloudflare.client import CloudFlare
+from ..cloudflare.clients import discard_cloudflare_client, get_cloudflare_client, token_fingerprint
+from ..cloudflare.ratelimit import rate_limit_snapshot
 from ..cloudflare.sdk import AsyncCloudflare
 from ..cloudflare.store import TunnelStateStorage
+from ..cloudflare.verification import token_verifications
 from ..docker_ctl import start_tunnel, stop_tunnel_container
 from . import vpn as vpn_service
 from .errors import ServiceError
@@ -108,22 +112,35 @@ async def _cf_put(client: AsyncCloudflare, token: str, path: str, payload: dict[
     return data
 
 
-async def _cf_get_paged(client: AsyncCloudflare, token: str, path: str, *, params: dict[str, Any] | None = None) -> list[dict]:
-    page = 1
+async def _cf_get_paged(
+    client: AsyncCloudflare,
+    token: str,
+    path: str,
+    *,
+    params: dict[str, Any] | None = None,
+    semaphore: asyncio.Semaphore | None = None,
+) -> list[dict]:
     per_page = 100
-    result: list[dict] = []
-    while True:
+
+    async def fetch(page: int) -> dict:
         payload = dict(params or {})
         payload.update({"page": page, "per_page": per_page})
-        data = await _cf_get(client, token, path, params=payload)
+        if semaphore is None:
+            return await _cf_get(client, token, path, params=payload)
+        async with semaphore:
+            return await _cf_get(client, token, path, params=payload)
+
+    def items(data: dict) -> list[dict]:
         batch = data.get("result") or []
-        if isinstance(batch, list):
-            result.extend([item for item in batch if isinstance(item, dict)])
-        info = data.get("result_info") or {}
-        total_pages = int(info.get("total_pages") or 1)
-        if page >= total_pages:
-            break
-        page += 1
+        return [item for item in batch if isinstance(item, dict)] if isinstance(batch, list) else []
+
+    first = await fetch(1)
+    result = items(first)
+    total_pages = int((first.get("result_info") or {}).get("total_pages") or 1)
+    if total_pages > 1:
+        # Once the page count is known the remaining pages are fetched together.
+        for data in await asyncio.gather(*(fetch(page) for page in range(2, total_pages + 1))):
+            result.extend(items(data))
     return result
 
 
@@ -188,63 +205,121 @@ def _extract_ingress_domains(config_data: dict) -> set[str]:
     return domains
 
 
-async def _fetch_tunnels_and_domains(token: str) -> list[dict]:
-    sdk = AsyncCloudflare(api_token=token)
+def _tunnel_payload(tunnel: dict, account_id: str, account_name: str) -> dict:
+    tunnel_id = str(tunnel.get("id") or "").strip()
+    return {
+        "id": tunnel_id,
+        "name": tunnel.get("name") or tunnel_id,
+        "status": tunnel.get("status") or "unknown",
+        "account_id": account_id,
+        "account_name": account_name,
+        "created_at": tunnel.get("created_at"),
+        "container_name": _full_container_name(tunnel_id),
+    }
 
-    accounts = await _accessible_accounts(sdk, token)
-    tunnels: dict[str, dict] = {}
-    tunnel_domains: dict[str, set[str]] = {}
 
+async def _fetch_tunnels_and_domains(token: str, ages: list[float] | None = None) -> list[dict]:
+    """
+    Crawl accounts -> tunnels (+ ingress configs) and zones (+ CNAME records).
+
+    Every account, tunnel and zone is fetched concurrently; the number of
+    in-flight Cloudflare requests is capped by CLOUDFLARE_API_CONCURRENCY.
+    Each resource goes through the inventory cache; the age of every value
+    used is appended to ``ages``.
+    """
+    sdk = get_cloudflare_client(token)
+    semaphore = asyncio.Semaphore(max(1, int(settings.CLOUDFLARE_API_CONCURRENCY or 1)))
+    cache = inventory_cache()
+    fingerprint = token_fingerprint(token)
+
+    async def cached(loader, kind: str, *ids: str):
+        value, age = await cache.get((fingerprint, kind, *ids), loader)
+        if ages is not None:
+            ages.append(age)
+        return value
+
+    async def get(path: str) -> dict:
+        async with semaphore:
+            return await _cf_get(sdk, token, path)
+
+    async def paged(path: str, params: dict[str, Any] | None = None) -> list[dict]:
+        return await _cf_get_paged(sdk, token, path, params=params, semaphore=semaphore)
+
+    all_zones: asyncio.Task | None = None
+
+    async def zones_for(account_id: str) -> list[dict]:
+        nonlocal all_zones
+        zones = await paged("/zones", {"account.id": account_id})
+        if zones:
+            return zones
+        # The unfiltered listing is shared by every account that needs the fallback.
+        if all_zones is None:
+            all_zones = asyncio.ensure_future(paged("/zones"))
+        return [z for z in await all_zones if str(((z.get("account") or {}).get("id") or "")).strip() == account_id]
+
+    async def tunnel_domains(account_id: str, tunnel_id: str) -> set[str]:
+        async def load() -> set[str]:
+            return _extract_ingress_domains(await get(f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations"))
+
+        try:
+            return await cached(load, "config", account_id, tunnel_id)
+        except Exception:
+            # Ingress config can be absent for newly created tunnel.
+            return set()
+
+    async def zone_cnames(zone_id: str) -> list[tuple[str, str]]:
+        return await cached(lambda: load_zone_cnames(zone_id), "records", zone_id)
+
+    async def load_zone_cnames(zone_id: str) -> list[tuple[str, str]]:
+        pairs: list[tuple[str, str]] = []
+        for record in await paged(f"/zones/{zone_id}/dns_records", {"type": "CNAME"}):
+            content = str(record.get("content") or "").strip().lower()
+            if not content.endswith(".cfargotunnel.com"):
+                continue
+            hostname = str(record.get("name") or "").strip().lower()
+            if hostname:
+                pairs.append((content.split(".", 1)[0], hostname))
+        return pairs
+
+    async def crawl_tunnels(account_id: str, account_name: str) -> list[tuple[dict, set[str]]]:
+        tunnels = [
+            _tunnel_payload(t, account_id, account_name)
+            for t in await cached(lambda: paged(f"/accounts/{account_id}/cfd_tunnel"), "tunnels", account_id)
+            if str(t.get("id") or "").strip()
+        ]
+        domains = await asyncio.gather(*(tunnel_domains(account_id, t["id"]) for t in tunnels))
+        return list(zip(tunnels, domains))
+
+    async def crawl_zones(account_id: str) -> list[tuple[str, str]]:
+        zone_ids = [str(z.get("id") or "").strip() for z in await cached(lambda: zones_for(account_id), "zones", account_id)]
+        batches = await asyncio.gather(*(zone_cnames(zone_id) for zone_id in zone_ids if zone_id))
+        return [pair for batch in batches for pair in batch]
+
+    accounts = await cached(lambda: _accessible_accounts(sdk, token), "accounts")
+    jobs = []
     for account in accounts:
         account_id = str(account.get("id") or "").strip()
         if not account_id:
             continue
         account_name = str(account.get("name") or account_id)
+        jobs.append(asyncio.gather(crawl_tunnels(account_id, account_name), crawl_zones(account_id)))
 
-        for tunnel in await _cf_get_paged(sdk, token, f"/accounts/{account_id}/cfd_tunnel"):
-            tunnel_id = str(tunnel.get("id") or "").strip()
-            if not tunnel_id:
-                continue
-            tunnels[tunnel_id] = {
-                "id": tunnel_id,
-                "name": tunnel.get("name") or tunnel_id,
-                "status": tunnel.get("status") or "unknown",
-                "account_id": account_id,
-                "account_name": account_name,
-                "created_at": tunnel.get("created_at"),
-                "container_name": _full_container_name(tunnel_id),
-            }
-            tunnel_domains.setdefault(tunnel_id, set())
-            try:
-                cfg_data = await _cf_get(sdk, token, f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations")
-                tunnel_domains[tunnel_id].update(_extract_ingress_domains(cfg_data))
-            except Exception:
-                # Ingress config can be absent for newly created tunnel.
-                pass
-
-        zones = await _cf_get_paged(sdk, token, "/zones", params={"account.id": account_id})
-        if not zones:
-            zones = [z for z in await _cf_get_paged(sdk, token, "/zones") if str(((z.get("account") or {}).get("id") or "")).strip() == account_id]
-        for zone in zones:
-            zone_id = str(zone.get("id") or "").strip()
-            if not zone_id:
-                continue
-            records = await _cf_get_paged(sdk, token, f"/zones/{zone_id}/dns_records", params={"type": "CNAME"})
-            for record in records:
-                content = str(record.get("content") or "").strip().lower()
-                if not content.endswith(".cfargotunnel.com"):
-                    continue
-                tunnel_id = content.split(".", 1)[0]
-                if tunnel_id not in tunnel_domains:
-                    continue
-                hostname = str(record.get("name") or "").strip().lower()
-                if hostname:
-                    tunnel_domains[tunnel_id].add(hostname)
+    tunnels: dict[str, dict] = {}
+    tunnel_domains_map: dict[str, set[str]] = {}
+    cnames: list[tuple[str, str]] = []
+    for account_tunnels, account_cnames in await asyncio.gather(*jobs):
+        for tunnel, domains in account_tunnels:
+            tunnels[tunnel["id"]] = tunnel
+            tunnel_domains_map.setdefault(tunnel["id"], set()).update(domains)
+        cnames.extend(account_cnames)
+    for tunnel_id, hostname in cnames:
+        if tunnel_id in tunnel_domains_map:
+            tunnel_domains_map[tunnel_id].add(hostname)
 
     result: list[dict] = []
     for tunnel_id, tunnel in tunnels.items():
         item = dict(tunnel)
-        item["domains"] = sorted(tunnel_domains.get(tunnel_id, set()))
+        item["domains"] = sorted(tunnel_domains_map.get(tunnel_id, set()))
         result.append(item)
 
     result.sort(key=lambda item: (str(item.get("name") or "").lower(), str(item.get("id") or "")))
@@ -289,6 +364,18 @@ async def _route_tunnel_to_caddy(client: AsyncCloudflare, token: str, account_id
     await _cf_put(client, token, f"/accounts/{account_id}/cfd_tunnel/{tunnel_id}/configurations", payload)
 
 
+async def _verify_token(token: str, *, fresh: bool = False) -> tuple[bool, float]:
+    """Return ``(active, age_seconds)``, reusing a verification younger than CLOUDFLARE_VERIFY_TTL."""
+    fingerprint = token_fingerprint(token)
+    if not fresh:
+        cached = token_verifications.get(fingerprint, float(settings.CLOUDFLARE_VERIFY_TTL or 0))
+        if cached is not None:
+            return cached
+    active = bool((await CloudflareTokenCheckerSDK(token).check()).token_active)
+    token_verifications.put(fingerprint, active)
+    return active, 0.0
+
+
 async def get_cloudflare_status() -> dict:
     token, source = _effective_token()
     has_token = bool(token)
@@ -299,15 +386,18 @@ async def get_cloudflare_status() -> dict:
         "token_generation_url": _token_url(),
         "tunnels": [],
         "vpn": {"status": "not_configured"},
+        "rate_limit": rate_limit_snapshot(),
     }
     if not has_token:
         return payload
 
     try:
-        check = await CloudflareTokenCheckerSDK(token).check()
-        if not check.token_active:
+        active, verified_age = await _verify_token(token)
+        if not active:
             raise ServiceError(400, "Stored Cloudflare token is invalid")
-        payload["tunnels"] = await _fetch_tunnels_and_domains(token)
+        ages = [verified_age]
+        payload["tunnels"] = await _fetch_tunnels_and_domains(token, ages)
+        payload["cache"] = {"age_sec": round(max(ages), 1), "ttl_sec": settings.CLOUDFLARE_CACHE_TTL}
         return payload
     except ServiceError:
         raise
@@ -320,11 +410,17 @@ async def set_cloudflare_token(token: str) -> dict:
     if not clean:
         raise ServiceError(400, "Token is required")
 
-    check = await CloudflareTokenCheckerSDK(clean).check()
-    if not check.token_active:
+    # A token being saved is always checked against Cloudflare; the result then serves status polls.
+    active, _ = await _verify_token(clean, fresh=True)
+    if not active:
         raise ServiceError(400, "Invalid Cloudflare token")
 
+    previous, _ = _effective_token()
     _write_token_file(clean)
+    if previous and previous != clean:
+        discard_cloudflare_client(previous)
+        inventory_cache().forget_token(token_fingerprint(previous))
+        token_verifications.forget(token_fingerprint(previous))
 
     # Keep state file in sync for existing flows.
     TunnelStateStorage(Path(settings.CF_STATE_FILE)).set_api_token(clean)
@@ -341,12 +437,13 @@ async def delete_cloudflare_tunnel(tunnel_id: str, account_id: str = "") -> dict
     removed_remote = {"status": "skipped", "reason": "token_missing"}
     resolved_account_id = (account_id or "").strip()
     if token:
-        sdk = AsyncCloudflare(api_token=token)
+        sdk = get_cloudflare_client(token)
         if not resolved_account_id:
             resolved_account_id = await _find_tunnel_account(sdk, token, clean_tunnel)
         if resolved_account_id:
             await _cf_delete(sdk, token, f"/accounts/{resolved_account_id}/cfd_tunnel/{clean_tunnel}")
             removed_remote = {"status": "deleted", "tunnel_id": clean_tunnel, "account_id": resolved_account_id}
+            invalidate_tunnel(resolved_account_id, clean_tunnel)
         else:
             removed_remote = {"status": "skipped", "reason": "tunnel_not_found"}
 
@@ -365,7 +462,7 @@ async def start_cloudflare_tunnel(tunnel_id: str, account_id: str = "") -> dict:
     if not clean_tunnel:
         raise ServiceError(400, "Tunnel ID is required")
 
-    sdk = AsyncCloudflare(api_token=token)
+    sdk = get_cloudflare_client(token)
     resolved_account_id = (account_id or "").strip()
     if not resolved_account_id:
         resolved_account_id = await _find_tunnel_account(sdk, token, clean_tunnel)
@@ -377,6 +474,7 @@ async def start_cloudflare_tunnel(tunnel_id: str, account_id: str = "") -> dict:
         raise ServiceError(502, "Failed to fetch tunnel token")
 
     await _route_tunnel_to_caddy(sdk, token, resolved_account_id, clean_tunnel)
+    invalidate_tunnel(resolved_account_id, clean_tunnel)
     full_name = _full_container_name(clean_tunnel)
     try:
         started = await asyncio.to_thread(start_tunnel, tunnel_token, full_name)
@@ -394,6 +492,11 @@ async def start_cloudflare_tunnel(tunnel_id: str, account_id: str = "") -> dict:
 
 
 def clear_cloudflare_token() -> dict:
+    previous, _ = _effective_token()
+    if previous:
+        discard_cloudflare_client(previous)
+        inventory_cache().forget_token(token_fingerprint(previous))
+        token_verifications.forget(token_fingerprint(previous))
     _clear_token_file()
     TunnelStateStorage(Path(settings.CF_STATE_FILE)).set_api_token("")
     return {
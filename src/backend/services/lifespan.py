@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import shutil
+import threading
+import time
 from pathlib import Path
+from typing import Any, Callable
 
 from .. import settings
 from ..storage import load_routes
+from ..tracing import span
 from .provisioning import write_and_validate_config, sync_cloudflare_from_routes
 from . import vpn as vpn_service
 from . import caddy_runtime as caddy_runtime_service
 from . import features as features_service
 
+logger = logging.getLogger(__name__)
+
 
 def _move_if_present(src: Path, dst: Path) -> None:
     if not src.exists() or src.resolve() == dst.resolve():
@@ -48,18 +56,155 @@ def _migrate_data_layout() -> None:
 
 
 def initialize_app() -> None:
+    """
+    Critical startup path: local files only, so the dashboard starts serving
+    right away. Everything that talks to Docker runs in
+    :func:`start_startup_reconcile` after the server is up.
+    """
     features_service.ensure_runtime_settings_file()
     _migrate_data_layout()
-    data = load_routes()
-    write_and_validate_config(data)
-    vpn_service.reconcile_on_startup()
-    caddy_runtime_service.reconcile_on_startup()
+
+
+def _apply_routes_config() -> None:
+    write_and_validate_config(load_routes())
+
+
+STARTUP_STEPS: list[tuple[str, Callable[[], Any]]] = [
+    ("caddy_config", _apply_routes_config),
+    ("vpn_reconcile", lambda: vpn_service.reconcile_on_startup()),
+    ("vpn_telemetry", lambda: vpn_service.start_telemetry_collector()),
+    ("caddy_runtime", lambda: caddy_runtime_service.reconcile_on_startup()),
+]
+
+# Steps that rewrite the Caddy config and VPN containers from a snapshot of the
+# stored state. API mutations wait for them (see StartupGateMiddleware), otherwise
+# a step could overwrite a change made while it was running.
+PROVISIONING_STEPS = frozenset({"caddy_config", "vpn_reconcile"})
+STARTUP_WAIT_TIMEOUT = 30.0
+
+_startup_lock = threading.Lock()
+_startup_task: asyncio.Task | None = None
+_provisioned: asyncio.Event | None = None
+_startup: dict[str, Any] = {"state": "pending", "started_at": None, "finished_at": None, "current": None, "steps": []}
+
+
+def startup_status() -> dict:
+    with _startup_lock:
+        payload = dict(_startup)
+        payload["steps"] = [dict(step) for step in _startup["steps"]]
+    payload["completed"] = sum(1 for step in payload["steps"] if step["status"] in ("done", "failed"))
+    payload["total"] = len(payload["steps"])
+    # A failed step leaves Caddy or VPN out of line with the stored state: not ready.
+    payload["ready"] = payload["state"] == "ready"
+    return payload
+
+
+def _update_step(index: int, **fields: Any) -> None:
+    with _startup_lock:
+        _startup["steps"][index].update(fields)
+
+
+async def run_startup_reconcile() -> dict:
+    """
+    Bring Caddy and VPN containers in line with the stored state, one step at a
+    time off the event loop. A failed step is recorded and the rest still run.
+    """
+    with _startup_lock:
+        _startup.update(state="running", started_at=time.time(), finished_at=None, current=None)
+        _startup["steps"] = [
+            {"name": name, "status": "pending", "duration_ms": None, "error": None} for name, _ in STARTUP_STEPS
+        ]
+    remaining = {name for name, _ in STARTUP_STEPS} & PROVISIONING_STEPS
+    if not remaining:
+        _mark_provisioned()
+    failed = False
+    try:
+        failed = await _run_startup_steps(remaining)
+    finally:
+        _mark_provisioned()
+    with _startup_lock:
+        _startup.update(state="degraded" if failed else "ready", finished_at=time.time(), current=None)
+        duration_ms = round((_startup["finished_at"] - _startup["started_at"]) * 1000, 2)
+    logger.info("startup.done", extra={"event": "startup.done", "duration_ms": duration_ms})
+    return startup_status()
+
+
+async def _run_startup_steps(remaining: set[str]) -> bool:
+    failed = False
+    for index, (name, step) in enumerate(STARTUP_STEPS):
+        with _startup_lock:
+            _startup["current"] = name
+        _update_step(index, status="running")
+        started = time.perf_counter()
+        try:
+            with span(f"startup.{name}"):
+                await asyncio.to_thread(step)
+        except Exception as exc:  # noqa: BLE001
+            failed = True
+            error = str(getattr(exc, "detail", None) or exc)
+            _update_step(index, status="failed", error=error)
+            logger.warning("startup.step.failed", extra={"event": "startup.step.failed", "step": name, "error": error})
+        else:
+            _update_step(index, status="done")
+        _update_step(index, duration_ms=round((time.perf_counter() - started) * 1000, 2))
+        remaining.discard(name)
+        if not remaining:
+            _mark_provisioned()
+    return failed
+
+
+def _mark_provisioned() -> None:
+    if _provisioned is not None:
+        _provisioned.set()
+
+
+async def wait_for_startup_provisioning(timeout: float = STARTUP_WAIT_TIMEOUT) -> bool:
+    """
+    Wait until the PROVISIONING_STEPS of the startup reconcile have finished (done
+    or failed). True right away when no startup reconcile was scheduled.
+    """
+    event = _provisioned
+    if event is None or event.is_set():
+        return True
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except TimeoutError:
+        return False
+    return True
+
+
+def start_startup_reconcile() -> None:
+    global _startup_task, _provisioned
+    with _startup_lock:
+        if _startup_task is not None and not _startup_task.done():
+            return
+        _provisioned = asyncio.Event()
+        _startup_task = asyncio.get_running_loop().create_task(run_startup_reconcile(), name="startup-reconcile")
+
+
+async def stop_startup_reconcile() -> None:
+    global _startup_task
+    with _startup_lock:
+        task, _startup_task = _startup_task, None
+    if task is None or task.done():
+        return
+    # A step already handed to a worker thread runs to completion; later steps are skipped.
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def shutdown_app() -> None:
+    vpn_service.stop_telemetry_collector()
+    caddy_runtime_service.stop_monitor()
 
 
 async def sync_cloudflare_on_startup() -> None:
     try:
         data = load_routes()
-        sync_cloudflare_from_routes(data)
+        await sync_cloudflare_from_routes(data)
     except Exception:  # noqa: BLE001
         # Startup must not fail on Cloudflare transient errors.
         return None
@@ -12,8 +12,11 @@ from ..caddy import render_caddy_config
 from ..caddyfile import write_caddyfile
 from ..cloudflare.hostnames import cf_configured
 from ..core.context import correlation_context, ensure_correlation_id
+from ..metrics import provision_stage
+from ..tracing import traced
 from . import caddy_runtime as caddy_runtime_service
 from . import cloudflare as cloudflare_service
+from . import reconciler as reconciler_service
 from . import tunnel as tunnel_service
 from .errors import ServiceError
 
@@ -38,6 +41,7 @@ PROVISION_TRIGGERS: set[str] = {
 logger = logging.getLogger(__name__)
 
 
+@traced("caddy.validate")
 def _run_caddy_validate() -> str | None:
     if not settings.CADDY_VALIDATE:
         return None
@@ -136,7 +140,8 @@ async def _provision_after_routes_change(data: dict, trigger: str) -> dict:
         "provisioning.start",
         extra={"event": "provisioning.start", "correlation_id": correlation_id, "trigger": trigger},
     )
-    write_and_validate_config(data)
+    with provision_stage("write_config"):
+        write_and_validate_config(data)
 
     if not should_provision(trigger):
         logger.info("provisioning.skip")
@@ -146,12 +151,18 @@ async def _provision_after_routes_change(data: dict, trigger: str) -> dict:
         logger.info("provisioning.skip")
         return _cf_disabled_result()
 
-    ensure_tunnel_running()
+    with provision_stage("ensure_tunnel"):
+        ensure_tunnel_running()
+    if reconciler_service.is_running():
+        # The background reconciler diffs and repairs Cloudflare state; the
+        # request only has to wake it up.
+        return reconciler_service.enqueue_reconcile(trigger)
     try:
-        result = sync_cloudflare_from_routes(data)
-        if inspect.isawaitable(result):
-            return await result
-        return result
+        with provision_stage("cloudflare_sync"):
+            result = sync_cloudflare_from_routes(data)
+            if inspect.isawaitable(result):
+                return await result
+            return result
     except ServiceError:
         raise
     except Exception as exc:  # noqa: BLE001
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+from .. import settings
+from ..cloudflare.hostnames import cf_configured
+from ..cloudflare.ratelimit import background_priority
+from ..metrics import provision_stage
+from . import cloudflare as cloudflare_service
+from .errors import ServiceError
+
+# Route edits tend to come in bursts (UI saves, CLI imports); wait a moment so
+# they collapse into one pass.
+DEBOUNCE_SEC = 1.0
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_task: asyncio.Task | None = None
+_wakeup: asyncio.Event | None = None
+_pending: set[str] = set()
+_status: dict[str, Any] = {
+    "running": False,
+    "runs": 0,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_status": None,
+    "last_error": None,
+    "last_reasons": [],
+    "last_result": None,
+}
+
+
+def is_running() -> bool:
+    with _lock:
+        return _task is not None and not _task.done()
+
+
+def enqueue_reconcile(reason: str) -> dict:
+    """Ask the worker for a pass; requests made before the pass starts are coalesced."""
+    with _lock:
+        if _task is None or _task.done() or _wakeup is None:
+            return {"status": "skipped", "reason": "reconciler_not_running"}
+        _pending.add(reason)
+        wakeup = _wakeup
+        loop = _task.get_loop()
+    loop.call_soon_threadsafe(wakeup.set)
+    return {"status": "queued", "reason": reason}
+
+
+def reconciler_status() -> dict:
+    with _lock:
+        payload = dict(_status)
+        payload["pending"] = sorted(_pending)
+        payload["interval_sec"] = settings.CLOUDFLARE_RECONCILE_INTERVAL
+        return payload
+
+
+async def reconcile_once(reasons: list[str] | None = None) -> dict:
+    """
+    One drift-repair pass of the routes flow: desired state comes from
+    routes.json (mirrored into cloudflare/hostnames.json), and only differences
+    are written back (unchanged ingress is not PUT, DNS goes through a diffed
+    batch). Entries that exist only in hostnames.json are applied by
+    ``POST /api/cf/apply`` and are not repaired here.
+    """
+    reasons = sorted(reasons or ["manual"])
+    with _lock:
+        _status["last_started_at"] = time.time()
+        _status["last_reasons"] = reasons
+    if not cf_configured():
+        result: dict[str, Any] = {"status": "skipped", "reason": "cf_not_configured"}
+        error = None
+    else:
+        try:
+            with background_priority(), provision_stage("reconcile"):
+                result = await cloudflare_service.sync_from_routes()
+            error = None
+        except ServiceError as exc:
+            result = {"status": "error"}
+            error = str(exc.detail)
+        except Exception as exc:  # noqa: BLE001
+            result = {"status": "error"}
+            error = str(exc)
+    if error:
+        logger.warning("cloudflare.reconcile.failed", extra={"event": "cloudflare.reconcile.failed", "error": error})
+    else:
+        logger.info("cloudflare.reconcile.done", extra={"event": "cloudflare.reconcile.done", "reasons": reasons})
+    with _lock:
+        _status["runs"] += 1
+        _status["last_finished_at"] = time.time()
+        _status["last_status"] = result.get("status")
+        _status["last_error"] = error
+        _status["last_result"] = result
+    return result
+
+
+async def _reconcile_loop(wakeup: asyncio.Event) -> None:
+    interval = max(1, int(settings.CLOUDFLARE_RECONCILE_INTERVAL))
+    # First pass repairs whatever drifted while the panel was down.
+    reasons = ["startup"]
+    while True:
+        await reconcile_once(reasons)
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=interval)
+            await asyncio.sleep(DEBOUNCE_SEC)
+        except asyncio.TimeoutError:
+            pass
+        with _lock:
+            wakeup.clear()
+            reasons = sorted(_pending) or ["interval"]
+            _pending.clear()
+
+
+def start_reconciler() -> None:
+    """Start the worker on the running loop; ``CLOUDFLARE_RECONCILE_INTERVAL=0`` disables it."""
+    global _task, _wakeup
+    if int(settings.CLOUDFLARE_RECONCILE_INTERVAL or 0) <= 0:
+        return
+    with _lock:
+        if _task is not None and not _task.done():
+            return
+        _wakeup = asyncio.Event()
+        _task = asyncio.get_running_loop().create_task(_reconcile_loop(_wakeup), name="cloudflare-reconciler")
+        _status["running"] = True
+
+
+async def stop_reconciler() -> None:
+    global _task, _wakeup
+    with _lock:
+        task, _task, _wakeup = _task, None, None
+        _pending.clear()
+        _status["running"] = False
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import ipaddress
+import logging
 import re
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -12,8 +17,28 @@ import docker
 from docker.errors import APIError, NotFound
 
 from ..docker_labels import compose_labels
+from ..metrics import instrument_docker_client
 from .. import settings
 from .errors import ServiceError
+from .vpn_state import VpnStateStore
+from .vpn_telemetry import PeerTelemetry, parse_wg_dump
+
+logger = logging.getLogger(__name__)
+
+_CONFIG_HASH_LABEL = "io.janus.vpn.config_hash"
+# How long startup reconcile waits for janus-caddy's address before deferring links.
+CADDY_RESOLVE_ATTEMPTS = 5
+CADDY_RESOLVE_DELAY = 1.0
+_store_lock = threading.Lock()
+_store: VpnStateStore | None = None
+_host_root_lock = threading.Lock()
+_host_root_cache: dict[str, Path] = {}
+_iface_lock = threading.Lock()
+_host_container_lock = threading.Lock()
+_telemetry_lock = threading.Lock()
+_telemetry: PeerTelemetry | None = None
+_telemetry_thread: threading.Thread | None = None
+_telemetry_stop = threading.Event()
 
 
 def _now() -> str:
@@ -24,34 +49,71 @@ def _vpn_root() -> Path:
     return Path(settings.VPN_DATA_DIR)
 
 
-def _vpn_host_root() -> Path:
-    root = _vpn_root()
+def _resolve_vpn_host_root(root: Path) -> Path | None:
+    """
+    Host path behind ``root`` from the container's mounts. ``root`` itself when
+    the dashboard is not in a container or ``root`` is not a bind mount; None
+    when Docker could not be asked (worth retrying later).
+    """
     try:
         container_id = Path("/etc/hostname").read_text(encoding="utf-8").strip()
-        if not container_id:
-            return root
-        client = _docker_client()
-        container = client.containers.get(container_id)
-        mounts = (container.attrs.get("Mounts") or []) if getattr(container, "attrs", None) else []
-        root_text = root.as_posix().rstrip("/")
-        for mount in mounts:
-            source = str(mount.get("Source") or "").strip()
-            destination = str(mount.get("Destination") or "").strip()
-            if not source or not destination:
-                continue
-            destination_text = Path(destination).as_posix().rstrip("/")
-            if root_text == destination_text:
-                return Path(source)
-            prefix = destination_text + "/"
-            if root_text.startswith(prefix):
-                suffix = root_text[len(prefix) :]
-                return Path(source) / suffix
-    except Exception:
-        # Fallback to current path when container mount metadata is unavailable.
+    except OSError:
+        return root
+    if not container_id:
         return root
+    try:
+        container = _docker_client().containers.get(container_id)
+    except NotFound:
+        # The hostname names no container: not running in Docker.
+        return root
+    except Exception:
+        # Docker hiccup (socket, API error); let the caller retry later.
+        return None
+    mounts = (container.attrs.get("Mounts") or []) if getattr(container, "attrs", None) else []
+    root_text = root.as_posix().rstrip("/")
+    for mount in mounts:
+        source = str(mount.get("Source") or "").strip()
+        destination = str(mount.get("Destination") or "").strip()
+        if not source or not destination:
+            continue
+        destination_text = Path(destination).as_posix().rstrip("/")
+        if root_text == destination_text:
+            return Path(source)
+        prefix = destination_text + "/"
+        if root_text.startswith(prefix):
+            suffix = root_text[len(prefix) :]
+            return Path(source) / suffix
     return root
 
 
+def _vpn_host_root() -> Path:
+    # The dashboard container's mount table is fixed for the process lifetime,
+    # so the Docker inspect is done once per data dir.
+    root = _vpn_root()
+    key = root.as_posix()
+    with _host_root_lock:
+        cached = _host_root_cache.get(key)
+    if cached is not None:
+        return cached
+    # Resolved outside the lock so reconcile workers do not queue behind a Docker round-trip.
+    resolved = _resolve_vpn_host_root(root)
+    if resolved is None:
+        # Fall back to the in-container path for this call only, so a transient
+        # failure does not pin wrong bind mounts for the rest of the process.
+        return root
+    with _host_root_lock:
+        return _host_root_cache.setdefault(key, resolved)
+
+
+def get_host_path_mapping() -> dict[str, str]:
+    return {"container_root": str(_vpn_root()), "host_root": str(_vpn_host_root())}
+
+
+def reload_host_root() -> None:
+    with _host_root_lock:
+        _host_root_cache.clear()
+
+
 def _to_host_path(path: Path) -> Path:
     root = _vpn_root()
     try:
@@ -93,6 +155,14 @@ def _link_container_name(link_id: str) -> str:
     return f"{settings.VPN_CONTAINER_PREFIX}-client-{link_id}"
 
 
+def _host_container_name() -> str:
+    return f"{settings.VPN_CONTAINER_PREFIX}-host"
+
+
+def _consolidated() -> bool:
+    return bool(settings.VPN_CONSOLIDATED)
+
+
 def _endpoint_for_port(port: int) -> str:
     configured = (settings.VPN_PUBLIC_ENDPOINT or "").strip()
     if configured:
@@ -109,34 +179,38 @@ def _write_text(path: Path, content: str) -> None:
     path.write_text(content, encoding="utf-8")
 
 
-def _load_state() -> dict[str, Any]:
-    path = _state_path()
-    if not path.exists():
-        return {"version": 1, "servers": []}
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception as exc:
-        raise ServiceError(500, f"Invalid VPN state file: {exc}")
-    if not isinstance(data, dict):
-        raise ServiceError(500, "Invalid VPN state format")
-    if not isinstance(data.get("servers"), list):
-        data["servers"] = []
-    if not isinstance(data.get("links"), list):
-        data["links"] = []
-    data.setdefault("version", 1)
-    return data
-
-
-def _save_state(state: dict[str, Any]) -> None:
+def _state_dir() -> Path:
     path = _state_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
-    tmp.replace(path)
+    return path.with_name(f"{path.stem}.d")
+
+
+def _state() -> VpnStateStore:
+    global _store
+    root = _state_dir()
+    with _store_lock:
+        if _store is None or _store.root != root:
+            _store = VpnStateStore(root, legacy_file=_state_path())
+        return _store
+
+
+def _peer_telemetry() -> PeerTelemetry:
+    # Created lazily: settings may still be initialising when this module is imported.
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = PeerTelemetry(max_samples=int(settings.VPN_TELEMETRY_SAMPLES))
+        return _telemetry
+
+
+def reload_state() -> None:
+    """Drop the in-memory state cache; the next access re-reads shards from disk."""
+    global _store
+    with _store_lock:
+        _store = None
 
 
 def _docker_client():
-    return docker.from_env()
+    return instrument_docker_client(docker.from_env())
 
 
 def _wg_container_security_kwargs() -> dict[str, Any]:
@@ -192,6 +266,14 @@ def _generate_keypair() -> tuple[str, str]:
 
 def _next_free_port(servers: list[dict[str, Any]]) -> int:
     used = {int(s.get("listen_port") or 0) for s in servers}
+    if _consolidated():
+        # The host container publishes only this window; ports outside it are unreachable.
+        for port in _host_port_range():
+            if port not in used:
+                return port
+        raise ServiceError(
+            409, f"VPN host port range is full ({settings.VPN_HOST_PORT_SPAN} ports from {settings.VPN_PORT_BASE})"
+        )
     port = int(settings.VPN_PORT_BASE)
     while port in used:
         port += 1
@@ -209,8 +291,11 @@ def _is_port_bind_conflict(exc: Exception) -> bool:
 
 def _next_free_subnet(servers: list[dict[str, Any]]) -> tuple[str, str]:
     used_octets: set[int] = set()
-    for server in servers:
-        cidr = str(server.get("subnet_cidr") or "")
+    cidrs = [str(server.get("subnet_cidr") or "") for server in servers]
+    if _consolidated():
+        # Links share the host's routing table there; a server must not take a link's /24.
+        cidrs += [_link_route_cidr(str(link.get("raw_config") or "")) for link in _state().links()]
+    for cidr in cidrs:
         parts = cidr.split(".")
         if len(parts) >= 3:
             try:
@@ -277,28 +362,73 @@ def _build_client_config(server: dict[str, Any], client_private_key: str, client
     )
 
 
-def _find_server(state: dict[str, Any], server_id: str) -> dict[str, Any]:
-    for server in state.get("servers", []):
-        if str(server.get("id")) == server_id:
-            return server
-    raise ServiceError(404, "VPN server not found")
+def _config_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
 
 
-def _find_client(server: dict[str, Any], client_id: str) -> dict[str, Any]:
-    for client in server.get("clients", []):
-        if str(client.get("id")) == client_id:
-            return client
-    raise ServiceError(404, "VPN client not found")
+def _server_config_hash(server: dict[str, Any]) -> str:
+    peers = sorted(f"{c.get('public_key')}={c.get('address')}" for c in server.get("clients", []))
+    return _config_hash(
+        settings.VPN_WG_IMAGE,
+        str(server.get("listen_port")),
+        str(server.get("server_address")),
+        str(server.get("server_private_key")),
+        *peers,
+    )
+
+
+def _link_config_hash(link: dict[str, Any], rendered: str | None = None) -> str:
+    # The deployed config carries DNAT rules to janus-caddy, so a new Caddy address is a new config.
+    if rendered is None:
+        rendered = _render_link_config(link)
+    return _config_hash(settings.VPN_WG_IMAGE, str(link.get("interface")), rendered)
+
+
+def _container_labels(container) -> dict[str, str]:
+    labels = getattr(container, "labels", None)
+    if isinstance(labels, dict):
+        return labels
+    attrs = getattr(container, "attrs", None) or {}
+    return (attrs.get("Config") or {}).get("Labels") or {}
+
+
+def _inspect_wg_container(container_name: str) -> tuple[bool, str, str]:
+    """Return ``(exists, status, config_hash_label)`` for a managed WG container."""
+    client = _docker_client()
+    try:
+        container = client.containers.get(container_name)
+    except NotFound:
+        return False, "", ""
+    return True, str(getattr(container, "status", "") or ""), str(_container_labels(container).get(_CONFIG_HASH_LABEL) or "")
+
+
+def _find_server(server_id: str) -> dict[str, Any]:
+    server = _state().get_server(server_id)
+    if server is None:
+        raise ServiceError(404, "VPN server not found")
+    return server
+
 
+def _find_client(server_id: str, client_id: str) -> dict[str, Any]:
+    client = _state().get_client(server_id, client_id)
+    if client is None:
+        raise ServiceError(404, "VPN client not found")
+    return client
 
-def _find_link(state: dict[str, Any], link_id: str) -> dict[str, Any]:
-    for link in state.get("links", []):
-        if str(link.get("id")) == link_id:
-            return link
-    raise ServiceError(404, "VPN link not found")
+
+def _find_link(link_id: str) -> dict[str, Any]:
+    link = _state().get_link(link_id)
+    if link is None:
+        raise ServiceError(404, "VPN link not found")
+    return link
 
 
 def _server_public_payload(server: dict[str, Any]) -> dict[str, Any]:
+    now = time.time()
     clients = [
         {
             "id": c.get("id"),
@@ -306,6 +436,7 @@ def _server_public_payload(server: dict[str, Any]) -> dict[str, Any]:
             "address": c.get("address"),
             "created_at": c.get("created_at"),
             "config_path": c.get("config_path"),
+            "telemetry": _peer_telemetry().peer_stats(str(c.get("public_key") or ""), now),
         }
         for c in server.get("clients", [])
     ]
@@ -320,8 +451,13 @@ def _server_public_payload(server: dict[str, Any]) -> dict[str, Any]:
         "endpoint": server.get("endpoint"),
         "running": bool(server.get("running")),
         "container_name": server.get("container_name"),
+        "interface": server.get("interface") or "wg0",
         "server_public_key": server.get("server_public_key"),
         "clients": clients,
+        "telemetry": {
+            "collected_at": _peer_telemetry().collected_at(str(server.get("id"))),
+            "interval_sec": int(settings.VPN_TELEMETRY_INTERVAL),
+        },
         "instructions": (
             "1) Импортируйте клиентский .conf в приложение WireGuard.\n"
             "2) Подключитесь к VPN.\n"
@@ -353,18 +489,45 @@ def _normalize_iface(seed: str) -> str:
     return f"jwg{raw[:8] or 'link'}"
 
 
-def _resolve_caddy_target() -> tuple[str, int]:
+_CADDY_FALLBACK_TARGET = ("host.docker.internal", 18080)
+
+
+def _caddy_target() -> tuple[str, int] | None:
+    """Where link DNAT rules point; None while janus-caddy exists but its address is not known yet."""
     try:
-        client = _docker_client()
-        caddy = client.containers.get("janus-caddy")
-        networks = (caddy.attrs.get("NetworkSettings", {}) or {}).get("Networks", {}) or {}
-        for net in networks.values():
-            ip = str((net or {}).get("IPAddress") or "").strip()
-            if ip:
-                return ip, 80
+        caddy = _docker_client().containers.get("janus-caddy")
+    except NotFound:
+        # No janus-caddy container: Caddy is published on the Docker host.
+        return _CADDY_FALLBACK_TARGET
     except Exception:
-        pass
-    return "host.docker.internal", 18080
+        return None
+    networks = (caddy.attrs.get("NetworkSettings", {}) or {}).get("Networks", {}) or {}
+    for net in networks.values():
+        ip = str((net or {}).get("IPAddress") or "").strip()
+        if ip:
+            return ip, 80
+    return None
+
+
+def _resolve_caddy_target() -> tuple[str, int]:
+    return _caddy_target() or _CADDY_FALLBACK_TARGET
+
+
+def _settled_caddy_target() -> tuple[str, int] | None:
+    # At startup compose may still be bringing janus-caddy up next to the dashboard.
+    for attempt in range(CADDY_RESOLVE_ATTEMPTS):
+        if attempt:
+            time.sleep(CADDY_RESOLVE_DELAY)
+        target = _caddy_target()
+        if target is not None:
+            return target
+    return None
+
+
+def _link_route_cidr(config_text: str) -> str:
+    """The /24 a link routes back through its interface (``PostUp = ip route replace``)."""
+    subnet_match = re.search(r"(?mi)^Address\s*=\s*((\d+\.\d+\.\d+)\.\d+)/(?:\d+)\s*$", config_text)
+    return f"{subnet_match.group(2)}.0/24" if subnet_match else ""
 
 
 def _inject_redirect_rules(config_text: str, iface: str, caddy_host: str, caddy_port: int) -> str:
@@ -378,8 +541,7 @@ def _inject_redirect_rules(config_text: str, iface: str, caddy_host: str, caddy_
     post_down_masq = (
         f"PostDown = iptables -t nat -D POSTROUTING -o eth0 -p tcp -d {caddy_host} --dport {caddy_port} -j MASQUERADE"
     )
-    subnet_match = re.search(r"(?mi)^Address\s*=\s*((\d+\.\d+\.\d+)\.\d+)/(?:\d+)\s*$", config_text)
-    route_cidr = f"{subnet_match.group(2)}.0/24" if subnet_match else ""
+    route_cidr = _link_route_cidr(config_text)
     post_up_route = f"PostUp = ip route replace {route_cidr} dev {iface}" if route_cidr else ""
     post_down_route = f"PostDown = ip route del {route_cidr} dev {iface} || true" if route_cidr else ""
     table_off = "Table = off"
@@ -436,29 +598,38 @@ def _link_dir(link_id: str) -> Path:
     return _links_dir() / link_id
 
 
-def _render_link_files(link: dict[str, Any]) -> None:
+def _render_link_config(link: dict[str, Any], caddy_target: tuple[str, int] | None = None) -> str:
+    caddy_host, caddy_port = caddy_target or _resolve_caddy_target()
+    return _inject_redirect_rules(
+        str(link.get("raw_config") or ""), str(link["interface"]), caddy_host=caddy_host, caddy_port=caddy_port
+    )
+
+
+def _render_link_files(link: dict[str, Any]) -> str:
     ldir = _link_dir(str(link["id"]))
     ldir.mkdir(parents=True, exist_ok=True)
     iface = str(link["interface"])
     raw_path = ldir / "raw.conf"
     patched_path = ldir / f"{iface}.conf"
     _write_text(raw_path, str(link.get("raw_config") or ""))
-    caddy_host, caddy_port = _resolve_caddy_target()
-    patched = _inject_redirect_rules(str(link.get("raw_config") or ""), iface, caddy_host=caddy_host, caddy_port=caddy_port)
+    patched = _render_link_config(link)
     _write_text(patched_path, patched)
     try:
         patched_path.chmod(0o600)
     except Exception:
         pass
     link["config_path"] = str(patched_path)
+    return patched
 
 
 def _start_link_container(link: dict[str, Any]) -> dict[str, Any]:
+    if _consolidated():
+        return _host_up_link(link)
     link_id = str(link["id"])
     iface = str(link["interface"])
     container_name = _link_container_name(link_id)
     _remove_container(container_name)
-    _render_link_files(link)
+    config_hash = _link_config_hash(link, _render_link_files(link))
     ldir = _link_dir(link_id)
     ldir_host = _to_host_path(ldir)
     client = _docker_client()
@@ -477,7 +648,11 @@ def _start_link_container(link: dict[str, Any]) -> dict[str, Any]:
             name=container_name,
             detach=True,
             volumes={str(ldir_host): {"bind": "/config", "mode": "rw"}},
-            labels=compose_labels("vpn", kind="wireguard-link", extra={"io.janus.vpn.link_id": link_id}),
+            labels=compose_labels(
+                "vpn",
+                kind="wireguard-link",
+                extra={"io.janus.vpn.link_id": link_id, _CONFIG_HASH_LABEL: config_hash},
+            ),
             **_wg_container_security_kwargs(),
         )
         container.reload()
@@ -485,11 +660,14 @@ def _start_link_container(link: dict[str, Any]) -> dict[str, Any]:
         raise ServiceError(500, f"Failed to start VPN link: {exc}")
     link["running"] = container.status == "running"
     link["container_name"] = container_name
+    link["config_hash"] = config_hash
     link["updated_at"] = _now()
     return {"id": container.id, "status": container.status, "container_name": container_name}
 
 
 def _stop_link_container(link: dict[str, Any]) -> dict[str, str]:
+    if _consolidated():
+        return _host_down(link, str(link.get("interface") or ""))
     container_name = str(link.get("container_name") or _link_container_name(str(link["id"])))
     iface = str(link.get("interface") or "wg0")
     client = _docker_client()
@@ -533,11 +711,14 @@ def _render_server_files(server: dict[str, Any]) -> None:
 
 
 def _start_container(server: dict[str, Any]) -> dict[str, Any]:
+    if _consolidated():
+        return _host_up_server(server)
     sid = str(server["id"])
     container_name = _container_name(sid)
     _remove_container(container_name)
 
     _render_server_files(server)
+    config_hash = _server_config_hash(server)
 
     client = _docker_client()
     server_path = _server_dir(sid)
@@ -556,7 +737,11 @@ def _start_container(server: dict[str, Any]) -> dict[str, Any]:
             detach=True,
             volumes={str(server_path_host): {"bind": "/config", "mode": "rw"}},
             ports={f"{int(server['listen_port'])}/udp": int(server["listen_port"])},
-            labels=compose_labels("vpn", kind="wireguard-server", extra={"io.janus.vpn.server_id": sid}),
+            labels=compose_labels(
+                "vpn",
+                kind="wireguard-server",
+                extra={"io.janus.vpn.server_id": sid, _CONFIG_HASH_LABEL: config_hash},
+            ),
             **_wg_container_security_kwargs(),
         )
         container.reload()
@@ -565,11 +750,14 @@ def _start_container(server: dict[str, Any]) -> dict[str, Any]:
 
     server["running"] = container.status == "running"
     server["container_name"] = container_name
+    server["config_hash"] = config_hash
     server["updated_at"] = _now()
     return {"id": container.id, "status": container.status, "container_name": container_name}
 
 
 def _stop_container(server: dict[str, Any]) -> dict[str, str]:
+    if _consolidated():
+        return _host_down(server, _server_iface(server))
     container_name = str(server.get("container_name") or _container_name(str(server["id"])))
     client = _docker_client()
     try:
@@ -587,23 +775,215 @@ def _stop_container(server: dict[str, Any]) -> dict[str, str]:
     return result
 
 
+def _server_iface(server: dict[str, Any]) -> str:
+    # Dedicated containers always use wg0; the shared host needs one name per server.
+    if not _consolidated():
+        return "wg0"
+    with _iface_lock:
+        iface = str(server.get("interface") or "")
+        if iface:
+            return iface
+        used = {str(s.get("interface") or "") for s in _state().servers()}
+        index = 0
+        while f"wg{index}" in used:
+            index += 1
+        server["interface"] = f"wg{index}"
+        # Reserve the name in the store right away; the caller's record is a copy
+        # that may only be saved after its Docker calls.
+        stored = _state().get_server(str(server.get("id")))
+        if stored is not None:
+            stored["interface"] = server["interface"]
+            _state().save_server(stored)
+        return server["interface"]
+
+
+def _host_port_range() -> range:
+    base = int(settings.VPN_PORT_BASE)
+    return range(base, base + max(1, int(settings.VPN_HOST_PORT_SPAN)))
+
+
+def _host_data_path(path: Path) -> str:
+    return f"/data/{path.relative_to(_vpn_root()).as_posix()}"
+
+
+def _remove_dedicated_containers() -> list[str]:
+    """
+    Remove per-server and per-link containers left over from before
+    VPN_CONSOLIDATED was enabled; they would hold ports the host container publishes.
+    """
+    store = _state()
+    items = [*store.servers(), *store.links()]
+    names = {_container_name(str(s["id"])) for s in store.servers()}
+    names |= {_link_container_name(str(l["id"])) for l in store.links()}
+    names |= {str(item["container_name"]) for item in items if item.get("container_name")}
+    names.discard(_host_container_name())
+    return [name for name in sorted(names) if _remove_container(name)["status"] != "not_found"]
+
+
+def _ensure_host_container():
+    """Return the shared WireGuard host container, creating it when missing."""
+    # Reconcile workers may all find the container missing; only one may create it.
+    with _host_container_lock:
+        return _ensure_host_container_locked()
+
+
+def _ensure_host_container_locked():
+    client = _docker_client()
+    name = _host_container_name()
+    try:
+        container = client.containers.get(name)
+        if str(getattr(container, "status", "") or "") != "running":
+            container.start()
+            container.reload()
+        return container
+    except NotFound:
+        pass
+    _vpn_root().mkdir(parents=True, exist_ok=True)
+    try:
+        _remove_dedicated_containers()
+        container = client.containers.run(
+            image=settings.VPN_WG_IMAGE,
+            entrypoint="/bin/sh",
+            command=[
+                "-lc",
+                "mkdir -p /run/janus; sysctl -w net.ipv4.ip_forward=1 >/dev/null 2>&1 || true; tail -f /dev/null",
+            ],
+            name=name,
+            detach=True,
+            restart_policy={"Name": "unless-stopped"},
+            volumes={str(_vpn_host_root()): {"bind": "/data", "mode": "rw"}},
+            # Published ports can't be added to a running container, so the whole
+            # server port window is mapped up front.
+            ports={f"{port}/udp": port for port in _host_port_range()},
+            labels=compose_labels("vpn", kind="wireguard-host"),
+            **_wg_container_security_kwargs(),
+        )
+        container.reload()
+    except Exception as exc:
+        raise ServiceError(500, f"Failed to start VPN host container: {exc}")
+    return container
+
+
+def _host_exec(container, script: str) -> str:
+    code, text = _exec_output(container.exec_run(["/bin/sh", "-lc", script]))
+    if code != 0:
+        raise ServiceError(500, f"VPN host command failed: {text.strip() or f'exit_code={code}'}")
+    return text
+
+
+def _host_up(item: dict[str, Any], iface: str, source: Path, config_hash: str) -> dict[str, Any]:
+    container = _ensure_host_container()
+    conf = f"/run/janus/{iface}.conf"
+    _host_exec(
+        container,
+        (
+            f"mkdir -p /run/janus && install -m 600 {_host_data_path(source)} {conf}; "
+            f"wg-quick down {conf} >/dev/null 2>&1 || ip link delete {iface} >/dev/null 2>&1 || true; "
+            f"wg-quick up {conf} && printf %s {config_hash} > /run/janus/{iface}.hash"
+        ),
+    )
+    item["running"] = True
+    item["container_name"] = _host_container_name()
+    item["config_hash"] = config_hash
+    item["updated_at"] = _now()
+    return {"id": container.id, "status": container.status, "container_name": item["container_name"], "interface": iface}
+
+
+def _host_up_server(server: dict[str, Any]) -> dict[str, Any]:
+    sid = str(server["id"])
+    if int(server["listen_port"]) not in _host_port_range():
+        raise ServiceError(500, f"VPN server port {server['listen_port']} is outside the VPN host port range")
+    # A dedicated container from the per-server mode would hold the UDP port.
+    _remove_container(_container_name(sid))
+    iface = _server_iface(server)
+    _render_server_files(server)
+    return _host_up(server, iface, _server_dir(sid) / "wg0.conf", _server_config_hash(server))
+
+
+def _check_link_route(link: dict[str, Any]) -> None:
+    """
+    In the host container every link shares one routing table with the local
+    servers, so a link whose /24 overlaps a server subnet or another running
+    link would replace (and on PostDown delete) that route.
+    """
+    cidr = _link_route_cidr(str(link.get("raw_config") or ""))
+    if not cidr:
+        return
+    network = ipaddress.ip_network(cidr)
+    store = _state()
+    for server in store.servers():
+        subnet = str(server.get("subnet_cidr") or "")
+        if subnet and network.overlaps(ipaddress.ip_network(subnet, strict=False)):
+            raise ServiceError(409, f"VPN link route {cidr} overlaps VPN server {server.get('name') or server['id']}")
+    for other in store.links():
+        if str(other.get("id")) == str(link["id"]) or not other.get("running"):
+            continue
+        if _link_route_cidr(str(other.get("raw_config") or "")) == cidr:
+            raise ServiceError(409, f"VPN link route {cidr} is already used by VPN link {other.get('name') or other['id']}")
+
+
+def _host_up_link(link: dict[str, Any]) -> dict[str, Any]:
+    _check_link_route(link)
+    link_id = str(link["id"])
+    _remove_container(_link_container_name(link_id))
+    config_hash = _link_config_hash(link, _render_link_files(link))
+    iface = str(link["interface"])
+    return _host_up(link, iface, _link_dir(link_id) / f"{iface}.conf", config_hash)
+
+
+def _host_down(item: dict[str, Any], iface: str) -> dict[str, str]:
+    name = _host_container_name()
+    try:
+        container = _docker_client().containers.get(name)
+        _host_exec(
+            container,
+            (
+                f"wg-quick down /run/janus/{iface}.conf >/dev/null 2>&1 || ip link delete {iface} >/dev/null 2>&1 || true; "
+                f"rm -f /run/janus/{iface}.conf /run/janus/{iface}.hash"
+            ),
+        )
+        result = {"status": "removed", "container_name": name, "interface": iface}
+    except NotFound:
+        result = {"status": "not_found", "container_name": name, "interface": iface}
+    item["running"] = False
+    item["updated_at"] = _now()
+    return result
+
+
+def _inspect_host_interface(iface: str) -> tuple[bool, str, str]:
+    """Consolidated-mode counterpart of ``_inspect_wg_container`` for one interface."""
+    try:
+        container = _docker_client().containers.get(_host_container_name())
+    except NotFound:
+        return False, "", ""
+    if str(getattr(container, "status", "") or "") != "running":
+        return False, "", ""
+    code, text = _exec_output(
+        container.exec_run(["/bin/sh", "-lc", f"ip link show {iface} >/dev/null 2>&1 && cat /run/janus/{iface}.hash"])
+    )
+    if code != 0:
+        return False, "", ""
+    return True, "running", text.strip()
+
+
 def get_status() -> dict[str, Any]:
-    state = _load_state()
-    servers = [_server_public_payload(s) for s in state.get("servers", [])]
-    links = [_link_public_payload(l) for l in state.get("links", [])]
+    store = _state()
+    servers = [_server_public_payload(s) for s in store.servers()]
+    links = [_link_public_payload(l) for l in store.links()]
     return {
         "status": "configured" if (servers or links) else "not_configured",
         "message": "WireGuard серверы готовы" if (servers or links) else "VPN серверы не созданы",
         "data_dir": str(_vpn_root()),
-        "state_file": str(_state_path()),
+        "host_data_dir": str(_vpn_host_root()),
+        "state_file": str(store.index_path),
         "servers": servers,
         "links": links,
     }
 
 
 def create_server(name: str = "") -> dict[str, Any]:
-    state = _load_state()
-    servers = state.setdefault("servers", [])
+    store = _state()
+    servers = store.servers()
     server_id = str(uuid4())
     port = _next_free_port(servers)
     subnet_cidr, server_address = _next_free_subnet(servers)
@@ -624,8 +1004,7 @@ def create_server(name: str = "") -> dict[str, Any]:
         "server_public_key": server_public_key,
         "clients": [],
     }
-    servers.append(server)
-    _save_state(state)
+    store.save_server(server)
 
     # Improvement: create first client automatically.
     add_client(server_id, "default-client", save_after=True)
@@ -635,46 +1014,42 @@ def create_server(name: str = "") -> dict[str, Any]:
         try:
             return start_server(server_id)
         except ServiceError as exc:
-            if not _is_port_bind_conflict(exc):
+            # A bind conflict of the host container is not about this server's port.
+            if _consolidated() or not _is_port_bind_conflict(exc):
                 raise
-            latest_state = _load_state()
-            latest_server = _find_server(latest_state, server_id)
+            latest_server = _find_server(server_id)
             latest_server["listen_port"] = int(latest_server["listen_port"]) + 1
             latest_server["endpoint"] = _endpoint_for_port(int(latest_server["listen_port"]))
             latest_server["running"] = False
             latest_server["updated_at"] = _now()
-            _save_state(latest_state)
+            store.save_server(latest_server)
             _render_server_files(latest_server)
     raise ServiceError(500, "Failed to allocate free UDP port for VPN server")
 
 
 def start_server(server_id: str) -> dict[str, Any]:
-    state = _load_state()
-    server = _find_server(state, server_id)
+    server = _find_server(server_id)
     docker_info = _start_container(server)
-    _save_state(state)
+    _state().save_server(server)
     payload = get_status()
     payload["docker"] = docker_info
     return payload
 
 
 def stop_server(server_id: str) -> dict[str, Any]:
-    state = _load_state()
-    server = _find_server(state, server_id)
+    server = _find_server(server_id)
     docker_info = _stop_container(server)
-    _save_state(state)
+    _state().save_server(server)
     payload = get_status()
     payload["docker"] = docker_info
     return payload
 
 
 def delete_server(server_id: str) -> dict[str, Any]:
-    state = _load_state()
-    server = _find_server(state, server_id)
+    server = _find_server(server_id)
     _stop_container(server)
-    servers = [s for s in state.get("servers", []) if str(s.get("id")) != server_id]
-    state["servers"] = servers
-    _save_state(state)
+    _state().remove_server(server_id)
+    _peer_telemetry().forget(server_id, [str(c.get("public_key") or "") for c in server.get("clients", [])])
 
     source = _server_dir(server_id)
     if source.exists():
@@ -691,12 +1066,11 @@ def create_link(name: str, config: str) -> dict[str, Any]:
     if "[Interface]" not in clean_config or "[Peer]" not in clean_config:
         raise ServiceError(400, "Invalid WireGuard config")
 
-    state = _load_state()
-    links = state.setdefault("links", [])
+    store = _state()
     link_id = str(uuid4())
     link = {
         "id": link_id,
-        "name": (name or f"VPN Link {len(links) + 1}").strip(),
+        "name": (name or f"VPN Link {len(store.links()) + 1}").strip(),
         "created_at": _now(),
         "updated_at": _now(),
         "interface": _normalize_iface(link_id.replace("-", "")),
@@ -705,37 +1079,32 @@ def create_link(name: str, config: str) -> dict[str, Any]:
         "raw_config": clean_config + ("\n" if not clean_config.endswith("\n") else ""),
         "config_path": "",
     }
-    links.append(link)
-    _save_state(state)
+    store.save_link(link)
     return start_link(link_id)
 
 
 def start_link(link_id: str) -> dict[str, Any]:
-    state = _load_state()
-    link = _find_link(state, link_id)
+    link = _find_link(link_id)
     docker_info = _start_link_container(link)
-    _save_state(state)
+    _state().save_link(link)
     payload = get_status()
     payload["docker"] = docker_info
     return payload
 
 
 def stop_link(link_id: str) -> dict[str, Any]:
-    state = _load_state()
-    link = _find_link(state, link_id)
+    link = _find_link(link_id)
     docker_info = _stop_link_container(link)
-    _save_state(state)
+    _state().save_link(link)
     payload = get_status()
     payload["docker"] = docker_info
     return payload
 
 
 def delete_link(link_id: str) -> dict[str, Any]:
-    state = _load_state()
-    link = _find_link(state, link_id)
+    link = _find_link(link_id)
     _stop_link_container(link)
-    state["links"] = [l for l in state.get("links", []) if str(l.get("id")) != link_id]
-    _save_state(state)
+    _state().remove_link(link_id)
 
     source = _link_dir(link_id)
     if source.exists():
@@ -746,11 +1115,10 @@ def delete_link(link_id: str) -> dict[str, Any]:
 
 
 def get_link_config(link_id: str) -> dict[str, Any]:
-    state = _load_state()
-    link = _find_link(state, link_id)
+    link = _find_link(link_id)
     if not link.get("config_path"):
         _render_link_files(link)
-        _save_state(state)
+        _state().save_link(link)
     path = Path(str(link.get("config_path") or ""))
     if not path.exists():
         raise ServiceError(404, "VPN link config not found")
@@ -764,8 +1132,7 @@ def get_link_config(link_id: str) -> dict[str, Any]:
 
 
 def add_client(server_id: str, name: str = "", save_after: bool = False) -> dict[str, Any]:
-    state = _load_state()
-    server = _find_server(state, server_id)
+    server = _find_server(server_id)
     client_id = str(uuid4())
     client_private, client_public = _generate_keypair()
     client_address = _next_client_ip(server)
@@ -787,7 +1154,7 @@ def add_client(server_id: str, name: str = "", save_after: bool = False) -> dict
         _stop_container(server)
         _start_container(server)
 
-    _save_state(state)
+    _state().save_server(server)
     if save_after:
         return client
     payload = get_status()
@@ -801,13 +1168,14 @@ def add_client(server_id: str, name: str = "", save_after: bool = False) -> dict
 
 
 def get_client_config(server_id: str, client_id: str) -> dict[str, Any]:
-    state = _load_state()
-    server = _find_server(state, server_id)
-    client = _find_client(server, client_id)
+    server = _find_server(server_id)
+    client = _find_client(server_id, client_id)
     path = Path(str(client.get("config_path") or ""))
     if not path.exists():
         _render_server_files(server)
-        _save_state(state)
+        _state().save_server(server)
+        # The store hands out copies: pick up the freshly rendered path from the server record.
+        client = next((c for c in server.get("clients", []) if str(c.get("id")) == client_id), client)
         path = Path(str(client.get("config_path") or ""))
     if not path.exists():
         raise ServiceError(404, "Client config not found")
@@ -821,30 +1189,150 @@ def get_client_config(server_id: str, client_id: str) -> dict[str, Any]:
     }
 
 
-def reconcile_on_startup() -> None:
-    state = _load_state()
-    changed = False
-    for server in state.get("servers", []):
+def _desired_hash(item: dict[str, Any], kind: str) -> str | None:
+    if kind == "server":
+        return _server_config_hash(item)
+    target = _settled_caddy_target()
+    if target is None:
+        return None
+    return _link_config_hash(item, _render_link_config(item, target))
+
+
+def _reconcile_item(item: dict[str, Any], kind: str) -> str:
+    if kind == "server":
+        container_name = str(item.get("container_name") or _container_name(str(item["id"])))
+        start, stop, save = _start_container, _stop_container, _state().save_server
+    else:
+        container_name = str(item.get("container_name") or _link_container_name(str(item["id"])))
+        start, stop, save = _start_link_container, _stop_link_container, _state().save_link
+
+    try:
+        if _consolidated():
+            iface = _server_iface(item) if kind == "server" else str(item.get("interface") or "")
+            exists, status, label_hash = _inspect_host_interface(iface)
+        else:
+            exists, status, label_hash = _inspect_wg_container(container_name)
+        if item.get("running"):
+            desired_hash = _desired_hash(item, kind)
+            if desired_hash is None:
+                # The Caddy address is unknown: a fallback target is not the desired state, leave the link as is.
+                return "deferred"
+            if status == "running" and label_hash == desired_hash and item.get("config_hash") == desired_hash:
+                return "unchanged"
+            start(item)
+            action = "started"
+        else:
+            if not exists:
+                return "unchanged"
+            stop(item)
+            action = "stopped"
+    except Exception:
+        item["running"] = False
+        item["updated_at"] = _now()
+        action = "failed"
+    save(item)
+    return action
+
+
+def reconcile_on_startup() -> dict[str, Any]:
+    """
+    Bring WireGuard containers in line with the stored state.
+
+    Containers whose config hash label matches the desired config and that are
+    already running are left alone, so a dashboard restart does not bounce
+    healthy tunnels. Running links are left untouched ("deferred") while
+    janus-caddy's address is unknown, since their DNAT target depends on it.
+    The remaining work runs on a bounded thread pool.
+    """
+    started_at = time.perf_counter()
+    store = _state()
+    jobs = [(server, "server") for server in store.servers()] + [(link, "link") for link in store.links()]
+    summary: dict[str, Any] = {"unchanged": 0, "started": 0, "stopped": 0, "failed": 0, "deferred": 0}
+    if jobs and _consolidated():
+        # Stopped items never reach the host container, so their old containers are cleared here.
         try:
-            if server.get("running"):
-                _start_container(server)
-            else:
-                _stop_container(server)
-            changed = True
-        except Exception:
-            server["running"] = False
-            server["updated_at"] = _now()
-            changed = True
-    for link in state.get("links", []):
+            summary["migrated"] = len(_remove_dedicated_containers())
+        except Exception:  # noqa: BLE001
+            logger.warning("vpn.reconcile.migrate_failed", exc_info=True)
+    if jobs:
+        workers = max(1, min(int(settings.VPN_RECONCILE_WORKERS or 1), len(jobs)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vpn-reconcile") as pool:
+            for action in pool.map(lambda job: _reconcile_item(*job), jobs):
+                summary[action] += 1
+    summary["duration_ms"] = round((time.perf_counter() - started_at) * 1000, 2)
+    logger.info(
+        "vpn.reconcile",
+        extra={"event": "vpn.reconcile", "duration_ms": summary["duration_ms"], "summary": summary},
+    )
+    return summary
+
+
+def _exec_output(result: Any) -> tuple[int, str]:
+    exit_code = getattr(result, "exit_code", None)
+    output = getattr(result, "output", None)
+    if exit_code is None and isinstance(result, tuple):
+        exit_code = result[0]
+        output = result[1] if len(result) > 1 else b""
+    if isinstance(output, (bytes, bytearray)):
+        text = bytes(output).decode("utf-8", errors="ignore")
+    else:
+        text = str(output or "")
+    return int(exit_code or 0), text
+
+
+def _collect_container_telemetry(container_name: str, servers: list[dict[str, Any]]) -> int:
+    container = _docker_client().containers.get(container_name)
+    # One dump per container covers every peer on every interface.
+    code, text = _exec_output(container.exec_run(["wg", "show", "all", "dump"]))
+    if code != 0:
+        return 0
+    peers = parse_wg_dump(text)
+    now = time.time()
+    telemetry = _peer_telemetry()
+    collected = 0
+    for server in servers:
+        # Read-only: a server without an interface yet is not up on the host, so nothing to record.
+        iface = str(server.get("interface") or "") if _consolidated() else "wg0"
+        if not iface:
+            continue
+        telemetry.record(str(server["id"]), [p for p in peers if p["interface"] == iface], now)
+        collected += 1
+    return collected
+
+
+def collect_telemetry() -> int:
+    by_container: dict[str, list[dict[str, Any]]] = {}
+    for server in _state().servers():
+        if not server.get("running"):
+            continue
+        container_name = str(server.get("container_name") or _container_name(str(server["id"])))
+        by_container.setdefault(container_name, []).append(server)
+    collected = 0
+    for container_name, servers in by_container.items():
         try:
-            if link.get("running"):
-                _start_link_container(link)
-            else:
-                _stop_link_container(link)
-            changed = True
-        except Exception:
-            link["running"] = False
-            link["updated_at"] = _now()
-            changed = True
-    if changed:
-        _save_state(state)
+            collected += _collect_container_telemetry(container_name, servers)
+        except Exception:  # noqa: BLE001
+            logger.debug("vpn.telemetry.failed", exc_info=True)
+    return collected
+
+
+def _telemetry_loop() -> None:
+    interval = max(1, int(settings.VPN_TELEMETRY_INTERVAL))
+    while not _telemetry_stop.wait(interval):
+        collect_telemetry()
+
+
+def start_telemetry_collector() -> None:
+    """Start the background ``wg show`` poller; ``VPN_TELEMETRY_INTERVAL=0`` disables it."""
+    global _telemetry_thread
+    if int(settings.VPN_TELEMETRY_INTERVAL or 0) <= 0:
+        return
+    if _telemetry_thread is not None and _telemetry_thread.is_alive():
+        return
+    _telemetry_stop.clear()
+    _telemetry_thread = threading.Thread(target=_telemetry_loop, name="vpn-telemetry", daemon=True)
+    _telemetry_thread.start()
+
+
+def stop_telemetry_collector() -> None:
+    _telemetry_stop.set()
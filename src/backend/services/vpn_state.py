@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from .errors import ServiceError
+
+STATE_VERSION = 2
+
+
+class VpnStateStore:
+    """
+    Sharded VPN state with an in-memory cache.
+
+    Layout (next to the legacy ``state.json``)::
+
+        state.d/
+          index.json            {"version": 2, "servers": [ids], "links": [ids]}
+          servers/<id>.json     one server incl. its clients
+          links/<id>.json       one link incl. raw config
+
+    Reads are served from memory after the first load as deep copies, so a
+    caller that mutates a record and then fails (e.g. on a Docker call) leaves
+    the cache untouched; each save rewrites only the touched shard (and the
+    index when membership changes), atomically, before updating the cache.
+    The legacy single-file state is migrated on first load.
+    """
+
+    def __init__(self, root: Path, legacy_file: Path | None = None):
+        self.root = root
+        self.legacy_file = legacy_file
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._servers: dict[str, dict[str, Any]] = {}
+        self._links: dict[str, dict[str, Any]] = {}
+        self._clients: dict[str, dict[str, dict[str, Any]]] = {}
+
+    # ---------- paths ----------
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _server_path(self, server_id: str) -> Path:
+        return self.root / "servers" / f"{server_id}.json"
+
+    def _link_path(self, link_id: str) -> Path:
+        return self.root / "links" / f"{link_id}.json"
+
+    # ---------- io ----------
+
+    @staticmethod
+    def _read_json(path: Path) -> Any:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            raise ServiceError(500, f"Invalid VPN state file {path.name}: {exc}")
+
+    @staticmethod
+    def _write_json(path: Path, payload: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        try:
+            os.chmod(tmp, 0o600)
+        except OSError:
+            # Best-effort on platforms that don't support chmod fully.
+            pass
+        tmp.replace(path)
+
+    def _write_index(self) -> None:
+        self._write_json(
+            self.index_path,
+            {"version": STATE_VERSION, "servers": list(self._servers), "links": list(self._links)},
+        )
+
+    def _index_clients(self, server: dict[str, Any]) -> None:
+        self._clients[str(server.get("id"))] = {
+            str(client.get("id")): client for client in server.get("clients", []) if isinstance(client, dict)
+        }
+
+    def _load(self) -> None:
+        index = self._read_json(self.index_path)
+        if index is None:
+            self._migrate_legacy()
+            return
+        if not isinstance(index, dict):
+            raise ServiceError(500, "Invalid VPN state format")
+        for server_id in index.get("servers") or []:
+            server = self._read_json(self._server_path(str(server_id)))
+            if isinstance(server, dict):
+                server.setdefault("clients", [])
+                self._servers[str(server_id)] = server
+                self._index_clients(server)
+        for link_id in index.get("links") or []:
+            link = self._read_json(self._link_path(str(link_id)))
+            if isinstance(link, dict):
+                self._links[str(link_id)] = link
+
+    def _migrate_legacy(self) -> None:
+        if self.legacy_file is None or not self.legacy_file.exists():
+            return
+        data = self._read_json(self.legacy_file)
+        if not isinstance(data, dict):
+            raise ServiceError(500, "Invalid VPN state format")
+        for server in data.get("servers") or []:
+            if isinstance(server, dict) and server.get("id"):
+                server.setdefault("clients", [])
+                self._servers[str(server["id"])] = server
+                self._index_clients(server)
+                self._write_json(self._server_path(str(server["id"])), server)
+        for link in data.get("links") or []:
+            if isinstance(link, dict) and link.get("id"):
+                self._links[str(link["id"])] = link
+                self._write_json(self._link_path(str(link["id"])), link)
+        self._write_index()
+        # Keep the old file for manual rollback, but out of the way of future loads.
+        self.legacy_file.replace(self.legacy_file.with_name(self.legacy_file.name + ".migrated"))
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    # ---------- servers ----------
+
+    def servers(self) -> list[dict[str, Any]]:
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(list(self._servers.values()))
+
+    def get_server(self, server_id: str) -> dict[str, Any] | None:
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(self._servers.get(server_id))
+
+    def get_client(self, server_id: str, client_id: str) -> dict[str, Any] | None:
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(self._clients.get(server_id, {}).get(client_id))
+
+    def save_server(self, server: dict[str, Any]) -> None:
+        self._ensure_loaded()
+        server_id = str(server["id"])
+        server = copy.deepcopy(server)
+        with self._lock:
+            is_new = server_id not in self._servers
+            self._write_json(self._server_path(server_id), server)
+            self._servers[server_id] = server
+            self._index_clients(server)
+            if is_new:
+                self._write_index()
+
+    def remove_server(self, server_id: str) -> None:
+        self._ensure_loaded()
+        with self._lock:
+            if self._servers.pop(server_id, None) is None:
+                return
+            self._clients.pop(server_id, None)
+            self._write_index()
+            self._server_path(server_id).unlink(missing_ok=True)
+
+    # ---------- links ----------
+
+    def links(self) -> list[dict[str, Any]]:
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(list(self._links.values()))
+
+    def get_link(self, link_id: str) -> dict[str, Any] | None:
+        self._ensure_loaded()
+        with self._lock:
+            return copy.deepcopy(self._links.get(link_id))
+
+    def save_link(self, link: dict[str, Any]) -> None:
+        self._ensure_loaded()
+        link_id = str(link["id"])
+        link = copy.deepcopy(link)
+        with self._lock:
+            is_new = link_id not in self._links
+            self._write_json(self._link_path(link_id), link)
+            self._links[link_id] = link
+            if is_new:
+                self._write_index()
+
+    def remove_link(self, link_id: str) -> None:
+        self._ensure_loaded()
+        with self._lock:
+            if self._links.pop(link_id, None) is None:
+                return
+            self._write_index()
+            self._link_path(link_id).unlink(missing_ok=True)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+
+@dataclass(frozen=True)
+class PeerSample:
+    ts: float
+    rx_bytes: int
+    tx_bytes: int
+    latest_handshake: int
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_wg_dump(text: str) -> list[dict[str, Any]]:
+    """
+    Parse ``wg show all dump`` output into peer rows.
+
+    Interface lines have 5 tab-separated fields and are skipped; peer lines have 9:
+    iface, public-key, preshared-key, endpoint, allowed-ips, latest-handshake,
+    transfer-rx, transfer-tx, persistent-keepalive.
+    """
+    peers: list[dict[str, Any]] = []
+    for line in (text or "").splitlines():
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) != 9:
+            continue
+        peers.append(
+            {
+                "interface": fields[0],
+                "public_key": fields[1],
+                "endpoint": "" if fields[3] == "(none)" else fields[3],
+                "allowed_ips": "" if fields[4] == "(none)" else fields[4],
+                "latest_handshake": _to_int(fields[5]),
+                "rx_bytes": _to_int(fields[6]),
+                "tx_bytes": _to_int(fields[7]),
+            }
+        )
+    return peers
+
+
+def _rate(newer: int, older: int, seconds: float) -> float:
+    # Counters reset when the interface is recreated; treat that as a fresh start.
+    if seconds <= 0 or newer < older:
+        return 0.0
+    return round((newer - older) / seconds, 2)
+
+
+def _iso(ts: float) -> str | None:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class PeerTelemetry:
+    """Fixed-size per-peer ring buffers of WireGuard transfer/handshake samples."""
+
+    def __init__(self, max_samples: int = 120):
+        self.max_samples = max(2, int(max_samples))
+        self._lock = threading.Lock()
+        self._series: dict[str, deque[PeerSample]] = {}
+        self._endpoints: dict[str, str] = {}
+        self._collected_at: dict[str, float] = {}
+
+    def record(self, server_id: str, peers: list[dict[str, Any]], ts: float) -> None:
+        with self._lock:
+            self._collected_at[server_id] = ts
+            for peer in peers:
+                key = str(peer.get("public_key") or "")
+                if not key:
+                    continue
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = deque(maxlen=self.max_samples)
+                series.append(
+                    PeerSample(
+                        ts=ts,
+                        rx_bytes=int(peer.get("rx_bytes") or 0),
+                        tx_bytes=int(peer.get("tx_bytes") or 0),
+                        latest_handshake=int(peer.get("latest_handshake") or 0),
+                    )
+                )
+                self._endpoints[key] = str(peer.get("endpoint") or "")
+
+    def forget(self, server_id: str, public_keys: list[str]) -> None:
+        with self._lock:
+            self._collected_at.pop(server_id, None)
+            for key in public_keys:
+                self._series.pop(key, None)
+                self._endpoints.pop(key, None)
+
+    def collected_at(self, server_id: str) -> str | None:
+        with self._lock:
+            return _iso(self._collected_at.get(server_id, 0.0))
+
+    def peer_stats(self, public_key: str, now: float) -> dict[str, Any] | None:
+        with self._lock:
+            series = self._series.get(public_key)
+            if not series:
+                return None
+            last = series[-1]
+            prev = series[-2] if len(series) > 1 else last
+            endpoint = self._endpoints.get(public_key, "")
+            samples = len(series)
+        elapsed = last.ts - prev.ts
+        return {
+            "endpoint": endpoint,
+            "rx_bytes": last.rx_bytes,
+            "tx_bytes": last.tx_bytes,
+            "rx_rate_bps": _rate(last.rx_bytes, prev.rx_bytes, elapsed),
+            "tx_rate_bps": _rate(last.tx_bytes, prev.tx_bytes, elapsed),
+            "last_handshake_at": _iso(last.latest_handshake),
+            "handshake_age_sec": int(now - last.latest_handshake) if last.latest_handshake else None,
+            "samples": samples,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._endpoints.clear()
+            self._collected_at.clear()
@@ -17,6 +17,11 @@ DASHBOARD_PORT = _settings.dashboard_port
 SETTINGS_JSON_FILE = _settings.settings_json_file
 AUTH_PASSWORD_FILE = _settings.auth_password_file
 AUTH_COOKIE_NAME = _settings.auth_cookie_name
+AUTH_PASSWORD_ITERATIONS = _settings.auth_password_iterations
+AUTH_REHASH = _settings.auth_rehash
+AUTH_HASH_WORKERS = _settings.auth_hash_workers
+AUTH_LOGIN_ATTEMPTS = _settings.auth_login_attempts
+AUTH_LOGIN_WINDOW = _settings.auth_login_window
 MCP_TOKEN_FILE = _settings.mcp_token_file
 TLS_REDIS_ADDRESS = _settings.tls_redis_address
 TLS_REDIS_DB = _settings.tls_redis_db
@@ -29,12 +34,28 @@ CLOUDFLARE_DEFAULT_SERVICE = _settings.cloudflare_default_service
 CLOUDFLARE_HOSTNAMES_FILE = _settings.cloudflare_hostnames_file
 CLOUDFLARE_TUNNEL_TOKEN = _settings.cloudflare_tunnel_token
 CF_STATE_FILE = _settings.cloudflare_state_file
+CLOUDFLARE_API_CONCURRENCY = _settings.cloudflare_api_concurrency
+CLOUDFLARE_CACHE_TTL = _settings.cloudflare_cache_ttl
+CLOUDFLARE_VERIFY_TTL = _settings.cloudflare_verify_ttl
+CLOUDFLARE_RATE_LIMIT = _settings.cloudflare_rate_limit
+CLOUDFLARE_MAX_RETRIES = _settings.cloudflare_max_retries
+CLOUDFLARE_PROVISION_CONCURRENCY = _settings.cloudflare_provision_concurrency
+CLOUDFLARE_RECONCILE_INTERVAL = _settings.cloudflare_reconcile_interval
 FEATURE_TUNNEL_ENABLED = _settings.feature_tunnel_enabled
 FEATURE_VPN_ENABLED = _settings.feature_vpn_enabled
 CF_TUNNEL_IMAGE = _settings.cf_tunnel_image
 CF_TUNNEL_CONTAINER = _settings.cf_tunnel_container
 CF_TUNNEL_NETWORK = _settings.cf_tunnel_network
 CF_TUNNEL_DIR = _settings.cf_tunnel_dir
+METRICS_PUBLIC = _settings.metrics_public
+METRICS_TOKEN = _settings.metrics_token
+TRACING_ENABLED = _settings.tracing_enabled
+TRACING_BUFFER_SIZE = _settings.tracing_buffer_size
+TRACING_OTLP_ENDPOINT = _settings.tracing_otlp_endpoint
+PROFILING_ENABLED = _settings.profiling_enabled
+PROFILING_SAMPLE_RATE = _settings.profiling_sample_rate
+PROFILING_KEEP = _settings.profiling_keep
+PROFILING_DIR = _settings.profiling_dir
 VPN_DATA_DIR = _settings.vpn_data_dir
 VPN_STATE_FILE = _settings.vpn_state_file
 VPN_WG_IMAGE = _settings.vpn_wg_image
@@ -42,6 +63,11 @@ VPN_CONTAINER_PREFIX = _settings.vpn_container_prefix
 VPN_PORT_BASE = _settings.vpn_port_base
 VPN_SUBNET_BASE = _settings.vpn_subnet_base
 VPN_PUBLIC_ENDPOINT = _settings.vpn_public_endpoint
+VPN_RECONCILE_WORKERS = _settings.vpn_reconcile_workers
+VPN_TELEMETRY_INTERVAL = _settings.vpn_telemetry_interval
+VPN_TELEMETRY_SAMPLES = _settings.vpn_telemetry_samples
+VPN_CONSOLIDATED = _settings.vpn_consolidated
+VPN_HOST_PORT_SPAN = _settings.vpn_host_port_span
 
 DOMAIN_RE = re.compile(r"^(\*\.)?([a-zA-Z0-9-]+\.)+[A-Za-z]{2,63}$")
 METHOD_RE = re.compile(r"^[A-Z]+$")
@@ -3,9 +3,11 @@ from typing import Dict
 
 from . import settings
 from .plugins import default_plugins
+from .tracing import traced
 from .utils import ensure_parent
 
 
+@traced("storage.load")
 def load_routes() -> Dict:
     try:
         with open(settings.ROUTES_FILE, "r", encoding="utf-8") as handle:
@@ -21,6 +23,7 @@ def load_routes() -> Dict:
     return data
 
 
+@traced("storage.save")
 def save_routes(data: Dict) -> None:
     ensure_parent(settings.ROUTES_FILE)
     with open(settings.ROUTES_FILE, "w", encoding="utf-8") as handle:
@@ -28,6 +31,7 @@ def save_routes(data: Dict) -> None:
         handle.write("\n")
 
 
+@traced("storage.save_raw")
 def save_routes_raw(content: str) -> Dict:
     ensure_parent(settings.ROUTES_FILE)
     with open(settings.ROUTES_FILE, "w", encoding="utf-8") as handle:
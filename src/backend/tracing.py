@@ -0,0 +1,302 @@
+"""
+Lightweight in-process spans keyed by correlation id.
+
+``span("name", key=value)`` (or the ``traced("name")`` decorator) times a block
+and records it, with its parent span and the current correlation id, into a
+bounded ring buffer. ``spans_for(correlation_id)`` returns one request's
+breakdown. When TRACING_OTLP_ENDPOINT is set, finished spans are also batched
+to an OTLP/HTTP (JSON) collector from a background thread.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from .metrics import TRACING_SPANS_DROPPED
+
+EXPORT_BATCH = 256
+EXPORT_INTERVAL = 2.0
+EXPORT_QUEUE_SIZE = 8192
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "correlation_id", "start_ns", "end_ns", "attrs", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, correlation_id: str | None, attrs: dict) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.correlation_id = correlation_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attrs = attrs
+        self.error: str | None = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "correlation_id": self.correlation_id,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attrs": dict(self.attrs),
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Span | None] = ContextVar("tracing_span", default=None)
+_buffer: deque[Span] = deque(maxlen=10_000)
+_buffer_lock = threading.Lock()
+
+
+def _settings():
+    # Imported lazily: settings -> core -> services -> storage -> this module.
+    from . import settings
+
+    return settings
+
+
+def _correlation_id() -> str | None:
+    from .core.context import get_correlation_id
+
+    return get_correlation_id()
+
+
+def _trace_id(correlation_id: str | None) -> str:
+    # One trace per correlation id, so spans of a request line up in the collector too.
+    if correlation_id:
+        return hashlib.sha256(correlation_id.encode("utf-8")).hexdigest()[:32]
+    return os.urandom(16).hex()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | _NoopSpan]:
+    settings = _settings()
+    if not settings.TRACING_ENABLED:
+        yield _NOOP
+        return
+    parent = _current.get()
+    correlation_id = _correlation_id() or (parent.correlation_id if parent else None)
+    trace_id = parent.trace_id if parent else _trace_id(correlation_id)
+    current = Span(name, trace_id, parent.span_id if parent else None, correlation_id, attrs)
+    token = _current.set(current)
+    started = time.perf_counter_ns()
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current.reset(token)
+        current.end_ns = current.start_ns + (time.perf_counter_ns() - started)
+        _record(current, settings)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of :func:`span` for sync and async functions."""
+
+    def decorate(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _record(current: Span, settings) -> None:
+    global _buffer
+    size = max(1, int(settings.TRACING_BUFFER_SIZE or 1))
+    with _buffer_lock:
+        if _buffer.maxlen != size:
+            _buffer = deque(_buffer, maxlen=size)
+        _buffer.append(current)
+    if settings.TRACING_OTLP_ENDPOINT:
+        _exporter(settings.TRACING_OTLP_ENDPOINT).submit(current)
+
+
+def spans_for(correlation_id: str) -> list[dict[str, Any]]:
+    with _buffer_lock:
+        spans = [item for item in _buffer if item.correlation_id == correlation_id]
+    return [item.as_dict() for item in sorted(spans, key=lambda item: item.start_ns)]
+
+
+def recent_traces(limit: int = 50) -> list[dict[str, Any]]:
+    """Most recent correlation ids with span count and wall-clock extent."""
+    summary: dict[str, dict[str, Any]] = {}
+    with _buffer_lock:
+        spans = list(_buffer)
+    for item in reversed(spans):
+        if not item.correlation_id:
+            continue
+        entry = summary.get(item.correlation_id)
+        if entry is None:
+            if len(summary) >= limit:
+                continue
+            entry = summary[item.correlation_id] = {
+                "correlation_id": item.correlation_id,
+                "spans": 0,
+                "errors": 0,
+                "start_ns": item.start_ns,
+                "end_ns": item.end_ns,
+            }
+        entry["spans"] += 1
+        entry["errors"] += 1 if item.error else 0
+        entry["start_ns"] = min(entry["start_ns"], item.start_ns)
+        entry["end_ns"] = max(entry["end_ns"], item.end_ns)
+    return [
+        {
+            "correlation_id": entry["correlation_id"],
+            "spans": entry["spans"],
+            "errors": entry["errors"],
+            "start": entry["start_ns"] / 1e9,
+            "duration_ms": round((entry["end_ns"] - entry["start_ns"]) / 1e6, 3),
+        }
+        for entry in summary.values()
+    ]
+
+
+def clear_spans() -> None:
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[Span]) -> dict[str, Any]:
+    """OTLP/HTTP JSON ``ExportTraceServiceRequest`` for the given spans."""
+    items = []
+    for item in spans:
+        attrs = dict(item.attrs)
+        if item.correlation_id:
+            attrs["correlation_id"] = item.correlation_id
+        entry: dict[str, Any] = {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": 1,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attrs.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 0},
+        }
+        if item.parent_id:
+            entry["parentSpanId"] = item.parent_id
+        items.append(entry)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "janus"}}]},
+                "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": items}],
+            }
+        ]
+    }
+
+
+class OtlpExporter:
+    """
+    Batches finished spans and POSTs them to ``<endpoint>/v1/traces`` off the request path.
+    The queue is bounded: when the collector is slow or down, new spans are dropped
+    (and counted) instead of piling up in memory.
+    """
+
+    def __init__(self, endpoint: str, max_queue: int = EXPORT_QUEUE_SIZE) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.url = self.endpoint if self.endpoint.endswith("/v1/traces") else f"{self.endpoint}/v1/traces"
+        self.dropped = 0
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=max(1, max_queue))
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, item: Span) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            TRACING_SPANS_DROPPED.labels().inc()
+
+    def _drain(self, first: Span) -> list[Span]:
+        batch = [first]
+        deadline = time.monotonic() + EXPORT_INTERVAL
+        while len(batch) < EXPORT_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, client: httpx.Client, batch: list[Span]) -> None:
+        # Anything escaping here would kill the thread and silently stop all exports.
+        try:
+            client.post(self.url, json=otlp_payload(batch))
+        except Exception:  # noqa: BLE001
+            logger.debug("tracing.export_failed", exc_info=True)
+
+    def _run(self) -> None:
+        with httpx.Client(timeout=5.0) as client:
+            while True:
+                self._export(client, self._drain(self._queue.get()))
+
+
+_exporters: dict[str, OtlpExporter] = {}
+_exporters_lock = threading.Lock()
+
+
+def _exporter(endpoint: str) -> OtlpExporter:
+    with _exporters_lock:
+        exporter = _exporters.get(endpoint)
+        if exporter is None:
+            exporter = _exporters[endpoint] = OtlpExporter(endpoint)
+            exporter.start()
+        return exporter
@@ -3,6 +3,7 @@ import uuid
 from typing import Dict, List
 
 from . import settings
+from .tracing import traced
 
 
 def normalize_domains(domains: List[str]) -> List[str]:
@@ -178,6 +179,7 @@ def validate_webdav(value: Dict) -> Dict | None:
     return {"enabled": True, "root": root, "username": username, "password": password, "methods": methods}
 
 
+@traced("routes.validate")
 def validate_route_payload(payload: Dict) -> Dict:
     domains = normalize_domains(payload.get("domains") or [])
     if not domains:
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from backend.cloudflare.cache import InventoryCache
+
+
+@pytest.mark.asyncio
+async def test_inventory_cache_single_flight_and_stale_while_revalidate():
+    cache = InventoryCache(base_ttl=10)
+    calls: list[int] = []
+
+    async def loader():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    key = ("fp", "tunnels", "acc")
+
+    def age_by(seconds: float) -> None:
+        cache._entries[key].stored_at -= seconds
+
+    results = await asyncio.gather(*(cache.get(key, loader) for _ in range(5)))
+    assert results == [(1, 0.0)] * 5
+    assert len(calls) == 1
+
+    age_by(5)
+    value, age = await cache.get(key, loader)
+    assert value == 1 and 5 <= age < 10
+
+    # Past the TTL the stale value is served while one refresh runs in the background.
+    age_by(10)
+    assert (await cache.get(key, loader))[0] == 1
+    assert (await cache.get(key, loader))[0] == 1
+    await asyncio.sleep(0.05)
+    assert len(calls) == 2
+    assert (await cache.get(key, loader))[0] == 2
+
+    # Past twice the TTL the caller waits for a fresh value.
+    age_by(25)
+    assert await cache.get(key, loader) == (3, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_inventory_cache_targeted_invalidation():
+    cache = InventoryCache(base_ttl=10)
+
+    async def value():
+        return "v"
+
+    for key in (
+        ("fp", "tunnels", "acc1"),
+        ("fp", "tunnels", "acc2"),
+        ("fp", "config", "acc1", "t1"),
+        ("fp", "config", "acc1", "t2"),
+        ("other", "records", "zone"),
+    ):
+        await cache.get(key, value)
+
+    assert cache.invalidate("config", "acc1", "t1") == 1
+    assert cache.invalidate("tunnels", "acc1") == 1
+    cache.forget_token("other")
+    assert set(cache._entries) == {("fp", "tunnels", "acc2"), ("fp", "config", "acc1", "t2")}
+
+    cache.base_ttl = 0
+    assert await cache.get(("fp", "tunnels", "acc2"), value) == ("v", 0.0)
@@ -78,7 +78,7 @@ async def test_cloudflare_client_core(monkeypatch, tmp_path):
             self.dns = DummyDNS()
 
     monkeypatch.setattr(cf_client, "CloudflareTokenCheckerSDK", DummyChecker)
-    monkeypatch.setattr(cf_client, "AsyncCloudflare", DummyAsyncCF)
+    monkeypatch.setattr(cf_client, "get_cloudflare_client", DummyAsyncCF)
 
     state = tmp_path / "state.json"
     cf = cf_client.CloudFlare(state_file=state)
@@ -271,17 +271,11 @@ async def test_cloudflare_client_dns_and_tunnel(monkeypatch, tmp_path):
             self.dns = DummyDNS()
 
     monkeypatch.setattr(cf_client, "CloudflareTokenCheckerSDK", DummyChecker)
-    monkeypatch.setattr(cf_client, "AsyncCloudflare", DummyAsyncCF)
+    monkeypatch.setattr(cf_client, "get_cloudflare_client", DummyAsyncCF)
 
     cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
     await cf.set_token("tok", persist=False)
 
-    # _dns_upsert updates existing
-    await cf._dns_upsert(zone_id="z1", record_type="A", name="x", content="1.1.1.1", proxied=True)
-    # _dns_upsert create
-    cf._cf.dns.records._records = []
-    await cf._dns_upsert(zone_id="z1", record_type="A", name="y", content="1.1.1.1", proxied=True)
-
     # list_tunnels
     tunnels = await cf.list_tunnels(account_id="a1")
     assert isinstance(tunnels, list)
@@ -489,7 +483,7 @@ async def test_provision_all_to_caddy(monkeypatch, tmp_path):
             self.dns = DummyDNS()
 
     monkeypatch.setattr(cf_client, "CloudflareTokenCheckerSDK", DummyChecker)
-    monkeypatch.setattr(cf_client, "AsyncCloudflare", DummyAsyncCF)
+    monkeypatch.setattr(cf_client, "get_cloudflare_client", DummyAsyncCF)
 
     cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
     await cf.set_token("tok", persist=False)
@@ -568,7 +562,7 @@ async def test_cloudflare_client_branches(monkeypatch, tmp_path):
             self.dns = DummyDNS()
 
     monkeypatch.setattr(cf_client, "CloudflareTokenCheckerSDK", DummyChecker)
-    monkeypatch.setattr(cf_client, "AsyncCloudflare", DummyAsyncCF)
+    monkeypatch.setattr(cf_client, "get_cloudflare_client", DummyAsyncCF)
 
     cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
     await cf.set_token("tok", persist=False)
@@ -643,11 +637,11 @@ async def test_cloudflare_client_branches(monkeypatch, tmp_path):
     async def ensure_ingress(**kwargs):
         return {"tunnel_id": "tid", "recreated": False}
 
-    async def dns_upsert(**kwargs):
-        return None
+    async def reconcile_dns(**kwargs):
+        return {"created": 0, "updated": 0, "unchanged": 3}
 
     cf.ensure_ingress_for_zone = ensure_ingress  # type: ignore[assignment]
-    cf._dns_upsert = dns_upsert  # type: ignore[assignment]
+    cf.reconcile_dns = reconcile_dns  # type: ignore[assignment]
     res2 = await cf.provision_all_to_caddy(
         zone="example.com",
         caddy_url="http://caddy",
@@ -766,3 +760,315 @@ def test_sdk_import_path_exceptions(monkeypatch, tmp_path):
             sys.path.remove("")
         while "boom" in sys.path:
             sys.path.remove("boom")
+
+
+@pytest.mark.asyncio
+async def test_reconcile_dns_batches_only_changes(tmp_path):
+    from backend.cloudflare import client as cf_client
+    from backend.cloudflare.constants import DnsRecord
+
+    records = [
+        {"id": "r1", "type": "CNAME", "name": "example.com", "content": "tid.cfargotunnel.com", "proxied": True, "ttl": 1},
+        {"id": "r2", "type": "CNAME", "name": "*.example.com", "content": "old.cfargotunnel.com", "proxied": True, "ttl": 1},
+        {"id": "r3", "type": "A", "name": "ssh.example.com", "content": "1.2.3.4", "proxied": False, "ttl": 120},
+        {"id": "r4", "type": "A", "name": "ssh.example.com", "content": "9.9.9.9", "proxied": False, "ttl": 120},
+        {"id": "r5", "type": "TXT", "name": "*.example.com", "content": "v=spf1 -all", "ttl": 300},
+        {"id": "r6", "type": "MX", "name": "example.com", "content": "mx.example.com", "ttl": 300},
+    ]
+    calls: list[tuple[str, str, dict | None]] = []
+
+    class DummyHTTP:
+        async def request(self, method, path, headers=None, json=None):
+            calls.append((method, path, json))
+            if method == "GET":
+                page = int(path.split("page=")[1].split("&")[0])
+                result = records[(page - 1) * 4 : page * 4]
+                return types.SimpleNamespace(
+                    json=lambda: {"success": True, "result": result, "result_info": {"page": page, "total_pages": 2}}
+                )
+            return types.SimpleNamespace(json=lambda: {"success": True, "result": {}})
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    cf._cf = types.SimpleNamespace(_client=DummyHTTP())
+    cf.ready = True
+
+    desired = [
+        DnsRecord(name="example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+        DnsRecord(name="*.example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+        DnsRecord(name="ssh.example.com", record_type="A", content="1.2.3.4"),
+        DnsRecord(name="new.example.com", record_type="AAAA", content="::1"),
+    ]
+    with pytest.raises(cf_client.CloudflareError) as exc:
+        await cf.reconcile_dns(zone_id="z1", desired=desired)
+
+    # The second A record at ssh.example.com (round-robin) is reported, not deleted.
+    assert "A ssh.example.com (9.9.9.9) blocks A" in str(exc.value)
+    assert [c[0] for c in calls] == ["GET", "GET", "POST"]
+    method, path, payload = calls[-1]
+    assert path == "/zones/z1/dns_records/batch"
+    assert "deletes" not in payload
+    assert payload["patches"] == [
+        {"id": "r2", "type": "CNAME", "name": "*.example.com", "content": "tid.cfargotunnel.com", "ttl": 1, "proxied": True}
+    ]
+    assert payload["posts"] == [{"type": "AAAA", "name": "new.example.com", "content": "::1", "ttl": 120, "proxied": False}]
+
+    # A zone that already matches needs no write at all.
+    calls.clear()
+    records[:] = [records[0]]
+    assert (await cf.reconcile_dns(zone_id="z1", desired=desired[:1]))["unchanged"] == 1
+    assert [c[0] for c in calls] == ["GET", "GET"]
+
+
+def test_plan_dns_changes_reports_conflicts_instead_of_deleting():
+    from backend.cloudflare.constants import DnsRecord
+    from backend.cloudflare.dns_reconcile import plan_dns_changes
+
+    existing = [
+        # An apex A record made by hand in the Cloudflare dashboard.
+        {"id": "r1", "type": "A", "name": "example.com", "content": "203.0.113.7", "proxied": False, "ttl": 300},
+        {"id": "r2", "type": "CNAME", "name": "ssh.example.com", "content": "box.example.net", "proxied": False},
+    ]
+    desired = [
+        DnsRecord(name="example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+        DnsRecord(name="*.example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+        DnsRecord(name="ssh.example.com", record_type="A", content="1.2.3.4"),
+    ]
+    plan = plan_dns_changes(existing, desired)
+
+    assert plan.patches == []
+    assert [post["name"] for post in plan.posts] == ["*.example.com"]
+    assert plan.conflicts == [
+        {"name": "example.com", "type": "A", "content": "203.0.113.7", "blocks": "CNAME"},
+        {"name": "ssh.example.com", "type": "CNAME", "content": "box.example.net", "blocks": "A"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_dns_applies_the_rest_and_raises_on_conflicts(tmp_path):
+    from backend.cloudflare import client as cf_client
+    from backend.cloudflare.constants import DnsRecord
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    calls: list[tuple[str, str, dict | None]] = []
+
+    async def fake_raw(method, path, payload=None):
+        calls.append((method, path, payload))
+        if method == "GET":
+            apex = {"id": "r1", "type": "A", "name": "example.com", "content": "203.0.113.7", "ttl": 300}
+            return {"success": True, "result": [apex], "result_info": {"total_pages": 1}}
+        return {"success": True}
+
+    cf._raw = fake_raw  # type: ignore[assignment]
+    desired = [
+        DnsRecord(name="example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+        DnsRecord(name="*.example.com", record_type="CNAME", content="tid.cfargotunnel.com", proxied=True),
+    ]
+    with pytest.raises(cf_client.CloudflareError) as exc:
+        await cf.reconcile_dns(zone_id="z1", desired=desired)
+
+    assert "A example.com (203.0.113.7) blocks CNAME" in str(exc.value)
+    method, path, payload = calls[-1]
+    assert (method, path) == ("POST", "/zones/z1/dns_records/batch")
+    assert payload == {"posts": [{"type": "CNAME", "name": "*.example.com", "content": "tid.cfargotunnel.com", "ttl": 1, "proxied": True}]}
+
+
+@pytest.mark.asyncio
+async def test_ensure_ingress_for_zone_skips_unchanged_writes(tmp_path):
+    from backend.cloudflare import client as cf_client
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    current = [
+        {"hostname": "example.com", "service": "http://caddy", "originRequest": {}},
+        {"hostname": "*.example.com", "service": "http://caddy"},
+        {"service": "http_status:404"},
+    ]
+    calls: list[str] = []
+
+    async def fake_raw(method, path, payload=None):
+        calls.append(method)
+        if method == "GET":
+            return {"success": True, "result": {"config": {"ingress": current}}}
+        current[:] = payload["config"]["ingress"]
+        return {"success": True}
+
+    cf._raw = fake_raw  # type: ignore[assignment]
+    kwargs = dict(account_id="a1", tunnel_id="tid", zone="example.com", service="http://caddy", tunnel_name="t1")
+
+    res = await cf.ensure_ingress_for_zone(**kwargs)
+    assert res["changed"] is False
+    assert calls == ["GET"]
+    assert cf._state.get_ingress("tid")["hash"]
+
+    # Same inputs inside the TTL: neither GET nor PUT.
+    res = await cf.ensure_ingress_for_zone(**kwargs)
+    assert res["cached"] is True
+    assert calls == ["GET"]
+
+    # New inputs change the ingress and are written once.
+    res = await cf.ensure_ingress_for_zone(**{**kwargs, "service": "http://caddy:80"})
+    assert res["changed"] is True
+    assert calls == ["GET", "GET", "PUT"]
+
+    # After the TTL the ingress is re-read, but not re-written.
+    cf.INGRESS_VERIFY_TTL = 0
+    res = await cf.ensure_ingress_for_zone(**{**kwargs, "service": "http://caddy:80"})
+    assert res["changed"] is False
+    assert calls == ["GET", "GET", "PUT", "GET"]
+
+
+@pytest.mark.asyncio
+async def test_ensure_ingress_for_zone_converges_for_zones_sharing_a_tunnel(tmp_path):
+    from backend.cloudflare import client as cf_client
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    cf.INGRESS_VERIFY_TTL = 0
+    current: list[dict] = [
+        {"hostname": "manual.example.org", "service": "http://manual"},
+        {"service": "http_status:404"},
+    ]
+    calls: list[str] = []
+
+    async def fake_raw(method, path, payload=None):
+        calls.append(method)
+        if method == "GET":
+            return {"success": True, "result": {"config": {"ingress": list(current)}}}
+        current[:] = payload["config"]["ingress"]
+        return {"success": True}
+
+    cf._raw = fake_raw  # type: ignore[assignment]
+    kwargs = dict(account_id="a1", tunnel_id="tid", service="http://caddy", tunnel_name="t1")
+    extra = [{"hostname": "app.b.com", "service": "http://app"}]
+
+    for zone in ("b.com", "a.com"):
+        res = await cf.ensure_ingress_for_zone(zone=zone, extra_ingress=extra if zone == "b.com" else (), **kwargs)
+        assert res["changed"] is True
+    assert calls == ["GET", "PUT", "GET", "PUT"]
+    assert [rule.get("hostname") for rule in current] == [
+        "manual.example.org",
+        "app.b.com",
+        "b.com",
+        "*.b.com",
+        "a.com",
+        "*.a.com",
+        None,
+    ]
+
+    calls.clear()
+    for zone in ("a.com", "b.com", "a.com"):
+        res = await cf.ensure_ingress_for_zone(zone=zone, extra_ingress=extra if zone == "b.com" else (), **kwargs)
+        assert res["changed"] is False
+    assert calls == ["GET", "GET", "GET"]
+
+
+@pytest.mark.asyncio
+async def test_ensure_ingress_for_zone_places_new_hosts_before_covering_wildcards(tmp_path):
+    from backend.cloudflare import client as cf_client
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    current: list[dict] = [
+        {"hostname": "example.com", "service": "http://caddy"},
+        {"hostname": "*.example.com", "service": "http://caddy"},
+        {"service": "http_status:404"},
+    ]
+
+    async def fake_raw(method, path, payload=None):
+        if method == "GET":
+            return {"success": True, "result": {"config": {"ingress": list(current)}}}
+        current[:] = payload["config"]["ingress"]
+        return {"success": True}
+
+    cf._raw = fake_raw  # type: ignore[assignment]
+    await cf.ensure_ingress_for_zone(
+        account_id="a1",
+        tunnel_id="tid",
+        zone="example.com",
+        service="http://caddy",
+        tunnel_name="t1",
+        extra_ingress=[{"hostname": "api.example.com", "service": "http://api"}],
+    )
+    assert [rule.get("hostname") for rule in current] == ["example.com", "api.example.com", "*.example.com", None]
+
+
+@pytest.mark.asyncio
+async def test_resolve_zone_for_hostname_uses_one_zone_listing(tmp_path):
+    from backend.cloudflare import client as cf_client
+
+    zones = [
+        {"id": "z1", "name": "example.com", "account": {"id": "a1"}},
+        {"id": "z2", "name": "sub.example.com", "account": {"id": "a1"}},
+        {"id": "z3", "name": "example.org", "account": {"id": "a2"}},
+    ]
+    calls: list[str] = []
+
+    async def fake_raw(method, path, payload=None):
+        calls.append(path)
+        page = int(path.split("page=")[1].split("&")[0])
+        return {"success": True, "result": zones[(page - 1) * 2 : page * 2], "result_info": {"total_pages": 2}}
+
+    cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+    cf._raw = fake_raw  # type: ignore[assignment]
+
+    results = await asyncio.gather(
+        cf.resolve_zone_for_hostname("a.sub.example.com"),
+        cf.resolve_zone_for_hostname("b.example.com"),
+        cf.resolve_zone_for_hostname("example.org"),
+    )
+    assert [r["zone"] for r in results] == ["sub.example.com", "example.com", "example.org"]
+    assert results[2] == {"zone": "example.org", "zone_id": "z3", "account_id": "a2"}
+    with pytest.raises(cf_client.CloudflareError):
+        await cf.resolve_zone_for_hostname("x.example.net")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_zone_index_persists_across_clients(tmp_path):
+    from backend.cloudflare import client as cf_client
+    from backend.cloudflare.zones import ZoneIndex
+
+    zones = [
+        {"id": "z1", "name": "example.co.uk", "account": {"id": "a1"}},
+        {"id": "z2", "name": "deep.example.co.uk", "account": {"id": "a1"}},
+    ]
+    calls: list[str] = []
+
+    async def fake_raw(method, path, payload=None):
+        calls.append(path)
+        return {"success": True, "result": list(zones), "result_info": {"total_pages": 1}}
+
+    def make_client():
+        cf = cf_client.CloudFlare(state_file=tmp_path / "state.json")
+        cf._token = "tok"
+        cf._raw = fake_raw  # type: ignore[assignment]
+        return cf
+
+    first = await make_client().resolve_zone_for_hostname("a.b.deep.example.co.uk")
+    assert first == {"zone": "deep.example.co.uk", "zone_id": "z2", "account_id": "a1"}
+    assert (tmp_path / "zones.json").exists()
+
+    # A new client (as created by every sync) resolves from disk without listing again.
+    second = make_client()
+    assert (await second.resolve_zone_for_hostname("www.example.co.uk"))["zone_id"] == "z1"
+    assert (await second._resolve_zone("example.co.uk"))["zone_id"] == "z1"
+    assert len(calls) == 1
+
+    # A miss against a recent listing does not re-list, not even from a fresh client.
+    zones.append({"id": "z3", "name": "new.org", "account": {"id": "a2"}})
+    for cf in (second, make_client()):
+        with pytest.raises(cf_client.CloudflareError):
+            await cf.resolve_zone_for_hostname("x.new.org")
+    assert len(calls) == 1
+
+    # Once the listing is older than ZONE_MISS_REFRESH, a miss re-lists once and picks up the new zone.
+    stored = json.loads((tmp_path / "zones.json").read_text())
+    stored["fetched_at"] -= cf_client.CloudFlare.ZONE_MISS_REFRESH + 1
+    (tmp_path / "zones.json").write_text(json.dumps(stored))
+    third = make_client()
+    assert (await third.resolve_zone_for_hostname("x.new.org"))["zone_id"] == "z3"
+    with pytest.raises(cf_client.CloudflareError):
+        await third.resolve_zone_for_hostname("x.other.net")
+    assert len(calls) == 2
+
+    index = ZoneIndex(tmp_path / "zones.json", ttl=0)
+    assert index.lookup("q.deep.example.co.uk")[0] == "deep.example.co.uk"
+    assert index.lookup("example.com") is None
+    assert index.fresh(cf_client.token_fingerprint("tok")) is False
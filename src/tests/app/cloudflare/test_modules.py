@@ -1,3 +1,4 @@
+import asyncio
 import importlib
 import json
 import types
@@ -333,6 +334,50 @@ async def test_cf_flow_sync(monkeypatch, tmp_path, cf_env):
     assert "cname.example.com" in exc
 
 
+@pytest.mark.asyncio
+async def test_cf_flow_provisions_zones_concurrently_and_isolates_errors(monkeypatch, cf_env):
+    from backend.cloudflare import flow
+
+    in_flight = 0
+    peak = 0
+
+    class DummyCF:
+        def __init__(self, state_file):
+            self.ready = True
+
+        async def bootstrap(self):
+            return True
+
+        async def resolve_zone_for_hostname(self, hostname):
+            if hostname.endswith(".missing"):
+                raise flow.CloudflareError("no zone")
+            return {"zone": hostname.split(".", 1)[1], "zone_id": "z", "account_id": "a"}
+
+        async def provision_all_to_caddy(self, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if kwargs["zone"] == "broken.com":
+                raise RuntimeError("ingress failed")
+            return {"zone": kwargs["zone"], "tunnel_id": "tid"}
+
+    cf_env(CLOUDFLARE_API_TOKEN="")
+    monkeypatch.setattr(flow, "CloudFlare", DummyCF)
+    monkeypatch.setattr(flow.settings, "CLOUDFLARE_PROVISION_CONCURRENCY", 2)
+    domains = ["a.one.com", "b.one.com", "a.two.com", "a.three.com", "a.broken.com", "a.x.missing"]
+    monkeypatch.setattr(flow, "load_routes", lambda: {"routes": [{"domains": domains}]})
+
+    res = await flow.sync_cloudflare_from_routes()
+
+    assert res["status"] == "partial"
+    assert sorted(z["zone"] for z in res["zones"]) == ["one.com", "three.com", "two.com"]
+    assert res["errors"] == [{"zone": "broken.com", "error": "ingress failed"}]
+    assert res["domains"] == 6
+    assert peak == 2
+
+
 @pytest.mark.asyncio
 async def test_cf_apply_errors(monkeypatch, tmp_path, cf_env):
     from backend.cloudflare import hostnames
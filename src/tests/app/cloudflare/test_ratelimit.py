@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.cloudflare.ratelimit import (
+    BACKGROUND,
+    INTERACTIVE,
+    RateLimitScheduler,
+    ScheduledTransport,
+    background_priority,
+    current_priority,
+    retry_after_seconds,
+)
+
+
+def _client(handler, scheduler, **kwargs) -> httpx.AsyncClient:
+    transport = ScheduledTransport(httpx.MockTransport(handler), scheduler=scheduler, backoff_base=0.0, **kwargs)
+    return httpx.AsyncClient(base_url="https://api.cloudflare.com/client/v4", transport=transport)
+
+
+@pytest.mark.asyncio
+async def test_scheduled_transport_retries_429_and_idempotent_5xx():
+    scheduler = RateLimitScheduler(capacity=100, period=100)
+    statuses = {"GET": [429, 503, 200], "POST": [502, 200]}
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.method)
+        status = statuses[request.method].pop(0)
+        headers = {"Retry-After": "0"} if status == 429 else {}
+        return httpx.Response(status, json={"success": status == 200}, headers=headers)
+
+    async with _client(handler, scheduler, max_retries=3) as client:
+        assert (await client.get("/zones")).status_code == 200
+        # POST is not repeated on 5xx: the first attempt may have been applied.
+        assert (await client.post("/accounts/a/cfd_tunnel", json={})).status_code == 502
+
+    assert seen == ["GET", "GET", "GET", "POST"]
+    snap = scheduler.snapshot()
+    assert snap["retries"] == 2
+    assert snap["throttled"] == 1
+    assert snap["requests"] == 4
+    assert snap["remaining"] <= 97
+
+
+@pytest.mark.asyncio
+async def test_scheduled_transport_gives_up_after_max_retries():
+    scheduler = RateLimitScheduler(capacity=100, period=100)
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    async with _client(handler, scheduler, max_retries=2) as client:
+        assert (await client.get("/zones")).status_code == 503
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_background_requests_leave_reserve_to_interactive():
+    # 10 tokens, 5 reserved for interactive calls, refilling 10 tokens/sec.
+    scheduler = RateLimitScheduler(capacity=10, period=1, reserve=0.5)
+
+    async def take(priority):
+        await scheduler.acquire(priority)
+        return asyncio.get_running_loop().time()
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    background = [await take(BACKGROUND) for _ in range(5)]
+    assert max(background) - started < 0.05
+    interactive = [await take(INTERACTIVE) for _ in range(5)]
+    assert max(interactive) - started < 0.05
+    # The bucket is now below the reserve: background waits for a refill.
+    assert await take(BACKGROUND) - started >= 0.05
+
+
+def test_priority_context_and_retry_after_parsing():
+    assert current_priority() == INTERACTIVE
+    with background_priority():
+        assert current_priority() == BACKGROUND
+    assert current_priority() == INTERACTIVE
+
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(httpx.Response(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_scheduled_transport_reports_auth_errors():
+    scheduler = RateLimitScheduler(capacity=100, period=100)
+    auth_errors: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(401 if request.url.path.endswith("/verify") else 200)
+
+    async with _client(handler, scheduler, on_auth_error=lambda: auth_errors.append(1)) as client:
+        await client.get("/zones")
+        assert auth_errors == []
+        assert (await client.get("/user/tokens/verify")).status_code == 401
+    assert auth_errors == [1]
@@ -94,6 +94,75 @@ def test_correlation_id_filter():
         reset_correlation_id(token)
 
 
+def test_json_formatter_timestamp_and_queue_pipeline():
+    import io
+    import json
+    import logging
+    from datetime import datetime, timezone
+    from backend.core import logging as core_logging
+    from backend.core.context import reset_correlation_id, set_correlation_id
+
+    formatter = core_logging.JsonFormatter()
+    created = 1_700_000_000.123456
+    assert formatter._timestamp(created) == datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
+
+    root = logging.getLogger()
+    saved = list(root.handlers), root.level
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(formatter)
+    for existing in saved[0]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    token = set_correlation_id("cid-queue")
+    try:
+        core_logging._install_queue()
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("test").exception("failed %s", "op")
+        core_logging._stop_listener()
+    finally:
+        reset_correlation_id(token)
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        for existing in saved[0]:
+            root.addHandler(existing)
+        root.setLevel(saved[1])
+
+    payload = json.loads(stream.getvalue())
+    assert payload["msg"] == "failed op"
+    assert payload["correlation_id"] == "cid-queue"
+    assert "ValueError: boom" in payload["exc_info"]
+
+
+def test_json_formatter_timestamp_matches_datetime_rounding():
+    import random
+    from datetime import datetime, timezone
+    from backend.core import logging as core_logging
+
+    formatter = core_logging.JsonFormatter()
+    rng = random.Random(46)
+    samples = [1_700_000_000.0, 1_700_000_000.9999995, 1_700_000_000.0000005, 1_700_000_001.5e-6]
+    samples += [rng.uniform(0, 4_000_000_000) for _ in range(20_000)]
+    samples += [float(rng.randrange(0, 4_000_000_000)) for _ in range(200)]
+    samples += [rng.randrange(1_600_000_000, 1_800_000_000) + rng.randrange(1_000_000) / 1e6 for _ in range(5_000)]
+    for created in samples:
+        assert formatter._timestamp(created) == datetime.fromtimestamp(created, tz=timezone.utc).isoformat(), created
+
+
+def test_json_formatter_keeps_startup_step_field():
+    import json
+    import logging
+    from backend.core import logging as core_logging
+
+    record = logging.LogRecord("backend.services.lifespan", logging.WARNING, __file__, 1, "startup.step.failed", None, None)
+    record.event = "startup.step.failed"
+    record.step = "vpn_reconcile"
+    payload = json.loads(core_logging.JsonFormatter().format(record))
+    assert payload["step"] == "vpn_reconcile"
+
 def test_correlation_context_sets_and_resets():
     from backend.core.context import correlation_context, get_correlation_id, reset_correlation_id, set_correlation_id
 
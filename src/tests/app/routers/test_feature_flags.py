@@ -84,3 +84,33 @@ def test_inbound_feature_disabled_when_both_sources_disabled(client_factory):
 
     assert client.get("/api/inbound/cloudflare").status_code == 404
     assert client.get("/api/inbound/vpn").status_code == 404
+
+
+def test_feature_snapshot_reads_do_not_touch_file(client_factory, monkeypatch):
+    import json
+
+    client, tmp_path = client_factory()
+    from backend.services import features as features_service
+
+    settings_file = tmp_path / "app_settings.json"
+    features_service.ensure_runtime_settings_file()
+    assert client.get("/api/cf/hostnames").status_code == 200
+    mtime = settings_file.stat().st_mtime_ns
+
+    reads = []
+    original = features_service._read_settings_payload
+    monkeypatch.setattr(
+        features_service, "_read_settings_payload", lambda path: reads.append(path) or original(path)
+    )
+    for _ in range(5):
+        assert client.get("/api/cf/hostnames").status_code == 200
+    assert reads == []
+    assert settings_file.stat().st_mtime_ns == mtime
+
+    # An external edit is picked up once the stat interval has passed.
+    payload = json.loads(settings_file.read_text(encoding="utf-8"))
+    payload["feature_tunnel_enabled"] = False
+    settings_file.write_text(json.dumps(payload), encoding="utf-8")
+    monkeypatch.setattr(features_service, "_STAT_INTERVAL", 0)
+    assert client.get("/api/cf/hostnames").status_code == 404
+    assert len(reads) == 1
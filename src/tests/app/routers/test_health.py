@@ -0,0 +1,113 @@
+import asyncio
+
+
+def test_health_live_and_ready_follow_startup_progress(client_factory, monkeypatch):
+    client, _ = client_factory()
+    from backend.services import lifespan as service
+
+    assert client.get("/api/health/live").json() == {"status": "ok"}
+    pending = client.get("/api/health/ready")
+    assert pending.status_code == 503
+    assert pending.json()["state"] == "pending"
+
+    def broken():
+        raise RuntimeError("docker unavailable")
+
+    calls = []
+    monkeypatch.setattr(
+        service,
+        "STARTUP_STEPS",
+        [("caddy_config", lambda: calls.append("caddy_config")), ("caddy_runtime", broken), ("last", lambda: calls.append("last"))],
+    )
+    result = asyncio.run(service.run_startup_reconcile())
+
+    assert calls == ["caddy_config", "last"]
+    assert result["state"] == "degraded"
+    assert [step["status"] for step in result["steps"]] == ["done", "failed", "done"]
+    assert result["steps"][1]["error"] == "docker unavailable"
+    assert (result["completed"], result["total"]) == (3, 3)
+
+    degraded = client.get("/api/health/ready")
+    assert degraded.status_code == 503
+    assert degraded.json()["ready"] is False
+
+    monkeypatch.setattr(service, "STARTUP_STEPS", [("caddy_config", lambda: None)])
+    assert asyncio.run(service.run_startup_reconcile())["state"] == "ready"
+    ready = client.get("/api/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["ready"] is True
+
+
+def test_mutations_wait_for_startup_provisioning_steps(client_factory, monkeypatch):
+    import threading
+
+    client_factory()
+    from backend.core.middleware import StartupGateMiddleware
+    from backend.services import lifespan as service
+
+    release = threading.Event()
+    monkeypatch.setattr(
+        service,
+        "STARTUP_STEPS",
+        [("caddy_config", lambda: None), ("vpn_reconcile", release.wait), ("caddy_runtime", lambda: None)],
+    )
+
+    async def downstream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call(gate, method, path):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await gate({"type": "http", "method": method, "path": path, "headers": []}, None, send)
+        return sent[0]["status"]
+
+    async def scenario():
+        assert await service.wait_for_startup_provisioning(0.01)
+        service.start_startup_reconcile()
+        await asyncio.sleep(0)
+        gate = StartupGateMiddleware(downstream, timeout=0.05)
+        held = await call(gate, "POST", "/api/routes")
+        reads = await call(gate, "GET", "/api/routes")
+        login = await call(gate, "POST", "/api/auth/login")
+        release.set()
+        assert await service.wait_for_startup_provisioning(5)
+        after = await call(gate, "POST", "/api/routes")
+        await service.stop_startup_reconcile()
+        return held, reads, login, after
+
+    assert asyncio.run(scenario()) == (503, 200, 200, 200)
+
+
+def test_health_is_public_when_auth_enabled(client_factory):
+    client, tmp_path = client_factory()
+    (tmp_path / "auth.txt").write_text("secret", encoding="utf-8")
+
+    assert client.get("/api/routes").status_code == 401
+    assert client.get("/api/health/live").status_code == 200
+
+
+def test_health_ready_hides_step_errors_without_a_session(client_factory, monkeypatch):
+    client, tmp_path = client_factory()
+    from backend.services import lifespan as service
+
+    def broken():
+        raise RuntimeError("docker socket /var/run/docker.sock: permission denied")
+
+    monkeypatch.setattr(service, "STARTUP_STEPS", [("caddy_runtime", broken)])
+    asyncio.run(service.run_startup_reconcile())
+    (tmp_path / "auth.txt").write_text("secret", encoding="utf-8")
+
+    anonymous = client.get("/api/health/ready")
+    assert anonymous.status_code == 503
+    assert anonymous.json()["state"] == "degraded"
+    assert [(step["name"], step["status"]) for step in anonymous.json()["steps"]] == [("caddy_runtime", "failed")]
+    assert all("error" not in step for step in anonymous.json()["steps"])
+    assert "docker.sock" not in anonymous.text
+
+    assert client.post("/api/auth/login", json={"password": "secret"}).status_code == 200
+    authorized = client.get("/api/health/ready")
+    assert authorized.json()["steps"][0]["error"] == "docker socket /var/run/docker.sock: permission denied"
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from tests.support.cloudflare_api import FakeCloudflareAPI
+
+
+@pytest.fixture(autouse=True)
+def _fresh_inventory_cache(monkeypatch):
+    from backend.cloudflare import cache
+    from backend.cloudflare.verification import token_verifications
+
+    monkeypatch.setattr(cache, "_cache", None)
+    token_verifications.clear()
+
+
+@pytest.mark.asyncio
+async def test_fetch_tunnels_and_domains_concurrent_crawl(monkeypatch):
+    from backend.cloudflare import clients
+    from backend.services import inbound
+
+    api = FakeCloudflareAPI(accounts=2, tunnels=3, zones=3, per_page=2, latency=0.01)
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_new_client", api.sdk_factory())
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_CONCURRENCY", 4)
+
+    tunnels = await inbound._fetch_tunnels_and_domains("tok")
+
+    assert [t["id"] for t in tunnels] == [f"acc{a}-t{t}" for a in range(2) for t in range(3)]
+    first = tunnels[0]
+    assert first["account_name"] == "Account 0"
+    assert first["domains"] == sorted(
+        [f"ingress.acc0-t0.example.com"] + [f"acc0-t0.acc0-z{z}.example.com" for z in range(3)]
+    )
+    # accounts(1) + per account: tunnels(2 pages) + configs(3) + zones(2 pages) + records(3 zones * 2 pages)
+    assert sum(api.requests.values()) == 1 + 2 * (2 + 3 + 2 + 6)
+    assert 1 < api.max_in_flight <= 4
+
+
+@pytest.mark.asyncio
+async def test_cloudflare_client_from_another_loop_is_closed_on_replace(monkeypatch):
+    from backend.cloudflare import clients
+
+    old, new, closed = object(), object(), []
+    other_loop = object()
+    monkeypatch.setattr(clients, "_clients", {clients.token_fingerprint("tok"): (old, other_loop)})
+    monkeypatch.setattr(clients, "_new_client", lambda _token: new)
+    monkeypatch.setattr(clients, "_schedule_close", lambda client, loop: closed.append((client, loop)))
+
+    assert clients.get_cloudflare_client("tok") is new
+    assert clients.get_cloudflare_client("tok") is new
+    assert closed == [(old, other_loop)]
+
+
+@pytest.mark.asyncio
+async def test_cloudflare_client_shared_per_token_and_closed_on_rotation(monkeypatch, tmp_path):
+    from backend.cloudflare import clients
+    from backend.services import inbound
+
+    api = FakeCloudflareAPI(accounts=1, tunnels=1, zones=1)
+    made: list = []
+
+    def _make(api_token: str):
+        made.append(api.sdk_factory()(api_token))
+        return made[-1]
+
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_new_client", _make)
+
+    await inbound._fetch_tunnels_and_domains("tok")
+    await inbound._fetch_tunnels_and_domains("tok")
+    assert len(made) == 1
+    assert clients.get_cloudflare_client("other") is not made[0]
+    assert len(made) == 2
+
+    class _Check:
+        token_active = True
+
+    class _Checker:
+        def __init__(self, token):
+            pass
+
+        async def check(self):
+            return _Check()
+
+    monkeypatch.setattr(inbound, "CloudflareTokenCheckerSDK", _Checker)
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_TOKEN_FILE", str(tmp_path / "token"))
+    monkeypatch.setattr(inbound.settings, "CF_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_TOKEN", "")
+
+    async def _status():
+        return {}
+
+    monkeypatch.setattr(inbound, "get_cloudflare_status", _status)
+    (tmp_path / "token").write_text("tok")
+    await inbound.set_cloudflare_token("rotated")
+    await asyncio.sleep(0)
+
+    assert clients.token_fingerprint("tok") not in clients._clients
+    assert made[0].is_closed()
+
+    await clients.close_cloudflare_clients()
+    assert clients._clients == {}
+    assert made[1].is_closed()
+
+
+@pytest.mark.asyncio
+async def test_cloudflare_status_served_from_inventory_cache(monkeypatch, tmp_path):
+    from backend.cloudflare import cache, clients
+    from backend.services import inbound
+
+    api = FakeCloudflareAPI(accounts=2, tunnels=2, zones=2)
+    monkeypatch.setattr(clients, "_clients", {})
+    monkeypatch.setattr(clients, "_new_client", api.sdk_factory())
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_CACHE_TTL", 60)
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_TOKEN_FILE", str(tmp_path / "token"))
+    (tmp_path / "token").write_text("tok")
+    checks: list[str] = []
+
+    class _Check:
+        token_active = True
+
+    class _Checker:
+        def __init__(self, token):
+            checks.append(token)
+
+        async def check(self):
+            return _Check()
+
+    monkeypatch.setattr(inbound, "CloudflareTokenCheckerSDK", _Checker)
+
+    first = await inbound.get_cloudflare_status()
+    crawled = sum(api.requests.values())
+    second = await inbound.get_cloudflare_status()
+
+    assert second["tunnels"] == first["tunnels"]
+    assert sum(api.requests.values()) == crawled
+    assert checks == ["tok"]
+    assert first["cache"]["age_sec"] == 0
+    assert second["cache"]["ttl_sec"] == 60
+
+    cache.invalidate_tunnel("acc0", "acc0-t1")
+    api.requests.clear()
+    await inbound.get_cloudflare_status()
+    assert set(api.requests) == {
+        "/client/v4/accounts/acc0/cfd_tunnel",
+        "/client/v4/accounts/acc0/cfd_tunnel/acc0-t1/configurations",
+    }
+
+
+@pytest.mark.asyncio
+async def test_token_verification_cached_until_rotation_or_auth_error(monkeypatch, tmp_path):
+    from backend.cloudflare import clients
+    from backend.services import inbound
+
+    checks: list[str] = []
+
+    class _Check:
+        token_active = True
+
+    class _Checker:
+        def __init__(self, token):
+            checks.append(token)
+
+        async def check(self):
+            return _Check()
+
+    async def _no_tunnels(token, ages=None):
+        return []
+
+    monkeypatch.setattr(inbound, "CloudflareTokenCheckerSDK", _Checker)
+    monkeypatch.setattr(inbound, "_fetch_tunnels_and_domains", _no_tunnels)
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_VERIFY_TTL", 60)
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_TOKEN_FILE", str(tmp_path / "token"))
+    monkeypatch.setattr(inbound.settings, "CF_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(inbound.settings, "CLOUDFLARE_API_TOKEN", "")
+    monkeypatch.setattr(clients, "_clients", {})
+
+    # Saving a token always verifies it; the following status polls reuse that result.
+    await inbound.set_cloudflare_token("tok")
+    await inbound.get_cloudflare_status()
+    await inbound.get_cloudflare_status()
+    assert checks == ["tok"]
+
+    # A 401/403 from any call made with the token's shared client drops the cached result.
+    client = clients._new_client("tok")
+    client._client._transport._on_auth_error()
+    await inbound.get_cloudflare_status()
+    assert checks == ["tok", "tok"]
+    await client.close()
+
+    await inbound.set_cloudflare_token("rotated")
+    await inbound.get_cloudflare_status()
+    assert checks == ["tok", "tok", "rotated"]
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def reconciler(monkeypatch):
+    from backend.services import reconciler
+
+    monkeypatch.setattr(reconciler, "DEBOUNCE_SEC", 0)
+    monkeypatch.setattr(reconciler, "cf_configured", lambda: True)
+    monkeypatch.setattr(reconciler.settings, "CLOUDFLARE_RECONCILE_INTERVAL", 3600)
+    return reconciler
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_once_records_errors(monkeypatch, reconciler):
+    from backend.cloudflare.ratelimit import BACKGROUND, current_priority
+    from backend.services.errors import ServiceError
+
+    seen = []
+
+    async def _sync(data=None):
+        seen.append(current_priority())
+        raise ServiceError(502, "zone failed")
+
+    monkeypatch.setattr(reconciler.cloudflare_service, "sync_from_routes", _sync)
+    result = await reconciler.reconcile_once(["create"])
+    assert result["status"] == "error"
+    assert seen == [BACKGROUND]
+    status = reconciler.reconciler_status()
+    assert status["last_error"] == "zone failed"
+    assert status["last_reasons"] == ["create"]
+
+    monkeypatch.setattr(reconciler, "cf_configured", lambda: False)
+    assert (await reconciler.reconcile_once())["reason"] == "cf_not_configured"
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_route_changes(monkeypatch, reconciler):
+    from backend.services import provisioning
+
+    calls = []
+    release = asyncio.Event()
+
+    async def _sync(data=None):
+        calls.append(reconciler.reconciler_status()["last_reasons"])
+        if len(calls) == 1:
+            await release.wait()
+        return {"status": "ok"}
+
+    def _inline(_data):
+        raise AssertionError("route changes must not sync inline while the worker runs")
+
+    monkeypatch.setattr(reconciler.cloudflare_service, "sync_from_routes", _sync)
+    monkeypatch.setattr(provisioning, "write_and_validate_config", lambda _d, **_kw: None)
+    monkeypatch.setattr(provisioning, "cf_configured", lambda: True)
+    monkeypatch.setattr(provisioning, "ensure_tunnel_running", lambda: {"status": "running"})
+    monkeypatch.setattr(provisioning, "sync_cloudflare_from_routes", _inline)
+
+    assert reconciler.enqueue_reconcile("create")["status"] == "skipped"
+    reconciler.start_reconciler()
+    try:
+        await _wait_for(lambda: len(calls) == 1)
+        # Both changes land while the startup pass is busy and share the next pass.
+        res = await provisioning.provision_after_routes_change({"routes": []}, provisioning.TRIGGER_CREATE)
+        assert res == {"status": "queued", "reason": "create"}
+        await provisioning.provision_after_routes_change({"routes": []}, provisioning.TRIGGER_DELETE)
+        release.set()
+        await _wait_for(lambda: len(calls) == 2)
+        await asyncio.sleep(0.05)
+    finally:
+        await reconciler.stop_reconciler()
+
+    assert calls == [["startup"], ["create", "delete"]]
+    assert reconciler.is_running() is False
+
+
+@pytest.mark.asyncio
+async def test_second_pass_over_a_shared_tunnel_writes_nothing(monkeypatch, tmp_path, reconciler):
+    from backend.cloudflare import flow
+    from backend.cloudflare.client import CloudFlare
+
+    ingress: list[dict] = []
+    records: dict[str, list[dict]] = {"za": [], "zb": []}
+    writes: list[str] = []
+
+    async def _bootstrap(self):
+        self._token, self._cf, self.ready = "test-token", object(), True
+        return True
+
+    async def _raw(self, method, path, payload=None):
+        if method != "GET":
+            writes.append(f"{method} {path}")
+        if path.startswith("/zones?"):
+            zones = [{"id": "za", "name": "a.com", "account": {"id": "acc"}}, {"id": "zb", "name": "b.com", "account": {"id": "acc"}}]
+            return {"success": True, "result": zones, "result_info": {"total_pages": 1}}
+        if path == "/accounts/acc/cfd_tunnel":
+            if method == "POST":
+                return {"success": True, "result": {"id": "tid", "token": "tt"}}
+            return {"success": True, "result": []}
+        if path == "/accounts/acc/cfd_tunnel/tid":
+            return {"success": True, "result": {"id": "tid"}}
+        if path.endswith("/configurations"):
+            if method == "PUT":
+                ingress[:] = payload["config"]["ingress"]
+            return {"success": True, "result": {"config": {"ingress": list(ingress)}}}
+        zone_id = path.split("/")[2]
+        if method == "POST":
+            for i, body in enumerate(payload.get("posts") or []):
+                records[zone_id].append({"id": f"{zone_id}-{len(records[zone_id])}-{i}", **body})
+            return {"success": True}
+        return {"success": True, "result": records[zone_id], "result_info": {"total_pages": 1}}
+
+    monkeypatch.setattr(reconciler.settings, "CF_STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(reconciler.cloudflare_service, "sync_cf_hostnames_from_routes", lambda _data: {"status": "ok"})
+    monkeypatch.setattr(flow, "resolve_cf_token", lambda: "")
+    monkeypatch.setattr(CloudFlare, "bootstrap", _bootstrap)
+    monkeypatch.setattr(CloudFlare, "_raw", _raw)
+    # Re-read the tunnel on every pass, so drift would be seen and repaired.
+    monkeypatch.setattr(CloudFlare, "INGRESS_VERIFY_TTL", 0)
+    routes = {"routes": [{"domains": ["a.com"]}, {"domains": ["www.b.com"]}]}
+    monkeypatch.setattr(reconciler.cloudflare_service, "load_routes", lambda: routes)
+
+    assert (await reconciler.reconcile_once(["startup"]))["status"] == "ok"
+    assert writes
+    assert sorted(rule.get("hostname") for rule in ingress[:-1]) == ["*.a.com", "*.b.com", "a.com", "b.com"]
+
+    writes.clear()
+    result = await reconciler.reconcile_once(["interval"])
+    assert result["status"] == "ok"
+    assert writes == []
+    assert all(zone["dns"]["unchanged"] == 2 for zone in result["zones"])
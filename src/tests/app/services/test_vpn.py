@@ -62,15 +62,14 @@ def test_start_container_uses_bridge_with_udp_port_mapping(monkeypatch):
     assert "network_mode" not in captured
 
 
-def test_create_server_retries_on_port_bind_conflict(monkeypatch):
+def test_create_server_retries_on_port_bind_conflict(monkeypatch, tmp_path):
     from backend.services import vpn
     from backend.services.errors import ServiceError
 
-    state: dict[str, object] = {"version": 1, "servers": []}
     calls = {"start": 0}
 
-    monkeypatch.setattr(vpn, "_load_state", lambda: state)
-    monkeypatch.setattr(vpn, "_save_state", lambda _state: None)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path)
     monkeypatch.setattr(vpn, "_generate_keypair", lambda: ("priv", "pub"))
     monkeypatch.setattr(vpn, "_next_free_subnet", lambda _servers: ("10.66.10.0/24", "10.66.10.1/24"))
     monkeypatch.setattr(vpn, "_next_free_port", lambda _servers: 51820)
@@ -88,8 +87,10 @@ def test_create_server_retries_on_port_bind_conflict(monkeypatch):
     result = vpn.create_server("retry")
     assert result["status"] == "configured"
     assert calls["start"] == 2
-    server = state["servers"][0]
+    server = vpn._state().servers()[0]
     assert server["listen_port"] == 51821
+    vpn.reload_state()
+    assert vpn._find_server(server["id"])["listen_port"] == 51821
 
 
 def test_is_port_bind_conflict_variants():
@@ -98,3 +99,598 @@ def test_is_port_bind_conflict_variants():
     assert vpn._is_port_bind_conflict(Exception("address already in use"))
     assert vpn._is_port_bind_conflict(Exception("failed to bind host port"))
     assert vpn._is_port_bind_conflict(Exception("port is already allocated"))
+
+
+def test_state_store_shards_and_migrates_legacy(monkeypatch, tmp_path):
+    import json
+
+    from backend.services import vpn
+    from backend.services.errors import ServiceError
+
+    legacy = tmp_path / "state.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "servers": [{"id": "s1", "clients": [{"id": "c1", "address": "10.66.10.2/32"}]}],
+                "links": [{"id": "l1", "interface": "jwgl1"}],
+            }
+        )
+    )
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", legacy)
+    vpn.reload_state()
+
+    assert vpn._find_client("s1", "c1")["address"] == "10.66.10.2/32"
+    assert vpn._find_link("l1")["interface"] == "jwgl1"
+    shard_dir = tmp_path / "state.d"
+    assert json.loads((shard_dir / "index.json").read_text())["servers"] == ["s1"]
+    assert (shard_dir / "servers" / "s1.json").exists()
+    assert not legacy.exists()
+
+    link_shard = shard_dir / "links" / "l1.json"
+    before = (shard_dir / "servers" / "s1.json").stat().st_mtime_ns
+    link = vpn._find_link("l1")
+    link["running"] = True
+    vpn._state().save_link(link)
+    assert json.loads(link_shard.read_text())["running"] is True
+    assert (shard_dir / "servers" / "s1.json").stat().st_mtime_ns == before
+
+    vpn._state().remove_server("s1")
+    vpn.reload_state()
+    try:
+        vpn._find_server("s1")
+        raise AssertionError("server should be removed")
+    except ServiceError as exc:
+        assert exc.status_code == 404
+    vpn.reload_state()
+
+
+def test_state_store_keeps_cache_on_failed_mutation(monkeypatch, tmp_path):
+    from backend.services import vpn
+    from backend.services.errors import ServiceError
+
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    vpn.reload_state()
+    vpn._state().save_server({"id": "s1", "running": False, "clients": []})
+
+    def broken_start(server):
+        server["running"] = True
+        raise ServiceError(500, "docker down")
+
+    monkeypatch.setattr(vpn, "_start_container", broken_start)
+    try:
+        vpn.start_server("s1")
+        raise AssertionError("start_server should fail")
+    except ServiceError:
+        pass
+
+    assert vpn._find_server("s1")["running"] is False
+    vpn._find_server("s1")["clients"].append({"id": "leak"})
+    assert vpn._state().get_client("s1", "leak") is None
+    assert vpn._find_server("s1")["clients"] == []
+    vpn.reload_state()
+
+
+def test_vpn_host_root_is_resolved_once(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    calls = {"resolve": 0}
+
+    def fake_resolve(root):
+        calls["resolve"] += 1
+        return tmp_path / "host"
+
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path / "vpn")
+    monkeypatch.setattr(vpn, "_resolve_vpn_host_root", fake_resolve)
+    vpn.reload_host_root()
+
+    assert vpn._to_host_path(tmp_path / "vpn" / "servers" / "a") == tmp_path / "host" / "servers" / "a"
+    assert vpn._to_host_path(tmp_path / "vpn" / "links" / "b") == tmp_path / "host" / "links" / "b"
+    assert calls["resolve"] == 1
+    assert vpn.get_host_path_mapping() == {"container_root": str(tmp_path / "vpn"), "host_root": str(tmp_path / "host")}
+
+    vpn.reload_host_root()
+    vpn._to_host_path(tmp_path / "vpn" / "servers" / "a")
+    assert calls["resolve"] == 2
+    vpn.reload_host_root()
+
+
+def test_vpn_host_root_failure_is_not_cached(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    results = [None, tmp_path / "host"]
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path / "vpn")
+    monkeypatch.setattr(vpn, "_resolve_vpn_host_root", lambda _root: results.pop(0))
+    vpn.reload_host_root()
+
+    assert vpn._to_host_path(tmp_path / "vpn" / "a") == tmp_path / "vpn" / "a"
+    assert vpn._to_host_path(tmp_path / "vpn" / "a") == tmp_path / "host" / "a"
+    assert vpn._to_host_path(tmp_path / "vpn" / "b") == tmp_path / "host" / "b"
+    vpn.reload_host_root()
+
+
+def test_reconcile_skips_matching_containers(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    vpn.reload_state()
+    store = vpn._state()
+    healthy = {"id": "s1", "listen_port": 51820, "running": True, "clients": []}
+    healthy["config_hash"] = vpn._server_config_hash(healthy)
+    drifted = {"id": "s2", "listen_port": 51821, "running": True, "clients": [], "config_hash": "old"}
+    stopped = {"id": "s3", "listen_port": 51822, "running": False, "clients": []}
+    for server in (healthy, drifted, stopped):
+        store.save_server(server)
+
+    containers = {
+        vpn._container_name("s1"): (True, "running", healthy["config_hash"]),
+        vpn._container_name("s2"): (True, "running", "old"),
+    }
+    started: list[str] = []
+    monkeypatch.setattr(vpn, "_inspect_wg_container", lambda name: containers.get(name, (False, "", "")))
+    monkeypatch.setattr(vpn, "_start_container", lambda server: started.append(server["id"]))
+    monkeypatch.setattr(vpn, "_stop_container", lambda server: (_ for _ in ()).throw(AssertionError("no stop")))
+
+    summary = vpn.reconcile_on_startup()
+
+    assert started == ["s2"]
+    assert summary["unchanged"] == 2
+    assert summary["started"] == 1
+    assert summary["duration_ms"] >= 0
+    vpn.reload_state()
+
+
+def test_telemetry_parses_dump_and_reports_rates(monkeypatch, tmp_path):
+    from backend.services import vpn
+    from backend.services.vpn_telemetry import PeerTelemetry, parse_wg_dump
+
+    dump = (
+        "wg0\tpriv\tsrvpub\t51820\toff\n"
+        "wg0\tpeerpub\t(none)\t203.0.113.5:40000\t10.66.10.2/32\t1700000000\t1000\t2000\t25\n"
+        "wg0\tidlepub\t(none)\t(none)\t10.66.10.3/32\t0\t0\t0\toff\n"
+    )
+    peers = parse_wg_dump(dump)
+    assert [p["public_key"] for p in peers] == ["peerpub", "idlepub"]
+    assert peers[1]["endpoint"] == ""
+
+    telemetry = PeerTelemetry(max_samples=3)
+    telemetry.record("s1", peers, ts=100.0)
+    telemetry.record("s1", [dict(peers[0], rx_bytes=3000, tx_bytes=2500)], ts=110.0)
+    stats = telemetry.peer_stats("peerpub", now=1700000030)
+    assert stats["rx_rate_bps"] == 200.0
+    assert stats["tx_rate_bps"] == 50.0
+    assert stats["handshake_age_sec"] == 30
+    assert telemetry.peer_stats("idlepub", now=0)["last_handshake_at"] is None
+    for ts in (120.0, 130.0, 140.0):
+        telemetry.record("s1", [peers[0]], ts=ts)
+    assert telemetry.peer_stats("peerpub", now=0)["samples"] == 3
+
+    class FakeContainer:
+        def exec_run(self, cmd):
+            assert cmd == ["wg", "show", "all", "dump"]
+            return (0, dump.encode())
+
+    class FakeDocker:
+        class containers:
+            @staticmethod
+            def get(name):
+                return FakeContainer()
+
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    monkeypatch.setattr(vpn, "_telemetry", PeerTelemetry())
+    vpn.reload_state()
+    vpn._state().save_server(
+        {"id": "s1", "running": True, "clients": [{"id": "c1", "public_key": "peerpub", "address": "10.66.10.2/32"}]}
+    )
+    assert vpn.collect_telemetry() == 1
+    payload = vpn.get_status()["servers"][0]
+    assert payload["clients"][0]["telemetry"]["endpoint"] == "203.0.113.5:40000"
+    assert payload["telemetry"]["collected_at"] is not None
+    vpn.reload_state()
+
+
+def test_consolidated_mode_hosts_interfaces_in_one_container(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    scripts: list[str] = []
+    runs: list[dict] = []
+
+    class HostContainer:
+        id = "host"
+        status = "running"
+
+        def exec_run(self, cmd):
+            scripts.append(cmd[-1])
+            return (0, b"")
+
+        def reload(self):
+            return None
+
+    class FakeContainers:
+        def __init__(self):
+            self.host = None
+
+        def get(self, name):
+            if name == vpn._host_container_name() and self.host is not None:
+                return self.host
+            raise vpn.NotFound("missing")
+
+        def run(self, **kwargs):
+            runs.append(kwargs)
+            self.host = HostContainer()
+            return self.host
+
+    class FakeDocker:
+        containers = FakeContainers()
+
+    monkeypatch.setattr(vpn.settings, "VPN_CONSOLIDATED", True)
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn.settings, "VPN_PORT_BASE", 51820)
+    monkeypatch.setattr(vpn.settings, "VPN_HOST_PORT_SPAN", 4)
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    monkeypatch.setattr(vpn, "_remove_container", lambda _name: {"status": "not_found"})
+    monkeypatch.setattr(vpn, "_render_server_files", lambda _server: None)
+    monkeypatch.setattr(vpn, "_vpn_host_root", lambda: tmp_path)
+    vpn.reload_state()
+
+    servers = [{"id": f"s{i}", "listen_port": 51820 + i, "clients": []} for i in range(2)]
+    for server in servers:
+        vpn._state().save_server(server)
+        info = vpn._start_container(server)
+        assert info["container_name"] == vpn._host_container_name()
+
+    assert len(runs) == 1
+    assert set(runs[0]["ports"]) == {f"{port}/udp" for port in range(51820, 51824)}
+    assert [s["interface"] for s in servers] == ["wg0", "wg1"]
+    assert "install -m 600 /data/servers/s1/wg0.conf /run/janus/wg1.conf" in scripts[-1]
+    assert "wg-quick up /run/janus/wg1.conf" in scripts[-1]
+
+    vpn._stop_container(servers[0])
+    assert "wg-quick down /run/janus/wg0.conf" in scripts[-1]
+    assert servers[0]["running"] is False
+    vpn.reload_state()
+
+
+def test_consolidated_reconcile_migrates_dedicated_containers(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    from backend.services import vpn
+
+    events: list[str] = []
+
+    class HostContainer:
+        id = "host"
+        status = "running"
+
+        def exec_run(self, cmd):
+            script = cmd[-1]
+            if "ip link show" in script:
+                return (1, b"")
+            return (0, b"")
+
+        def reload(self):
+            return None
+
+    class FakeContainers:
+        def __init__(self):
+            self.host = None
+            self.dedicated = {vpn._container_name("s0"), vpn._container_name("s1"), vpn._link_container_name("l0")}
+
+        def get(self, name):
+            if name == vpn._host_container_name() and self.host is not None:
+                return self.host
+            raise vpn.NotFound("missing")
+
+        def run(self, **kwargs):
+            # Docker refuses to publish ports a dedicated container still holds.
+            assert not self.dedicated, f"ports still held by {sorted(self.dedicated)}"
+            time.sleep(0.05)
+            events.append("run")
+            self.host = HostContainer()
+            return self.host
+
+    containers = FakeContainers()
+
+    class FakeDocker:
+        pass
+
+    FakeDocker.containers = containers
+    lock = threading.Lock()
+
+    def _remove(name):
+        with lock:
+            if name in containers.dedicated:
+                containers.dedicated.discard(name)
+                events.append(f"rm {name}")
+                return {"status": "removed", "container_name": name}
+        return {"status": "not_found", "container_name": name}
+
+    monkeypatch.setattr(vpn.settings, "VPN_CONSOLIDATED", True)
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn.settings, "VPN_PORT_BASE", 51820)
+    monkeypatch.setattr(vpn.settings, "VPN_HOST_PORT_SPAN", 4)
+    monkeypatch.setattr(vpn.settings, "VPN_RECONCILE_WORKERS", 4)
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    monkeypatch.setattr(vpn, "_remove_container", _remove)
+    monkeypatch.setattr(vpn, "_render_server_files", lambda _server: None)
+    monkeypatch.setattr(vpn, "_vpn_host_root", lambda: tmp_path)
+    vpn.reload_state()
+    store = vpn._state()
+    # s1 is stopped but its pre-consolidation container still runs and holds its port.
+    for i, running in enumerate((True, False, True, True)):
+        server = {"id": f"s{i}", "listen_port": 51820 + i, "running": running, "clients": []}
+        server["container_name"] = vpn._container_name(server["id"])
+        store.save_server(server)
+    store.save_link({"id": "l0", "interface": "jwgl0", "running": False, "raw_config": ""})
+
+    summary = vpn.reconcile_on_startup()
+
+    assert summary["migrated"] == 3
+    assert summary["started"] == 3
+    assert summary["failed"] == 0
+    assert events.count("run") == 1
+    assert events[-1] == "run"
+    assert all(store.get_server(f"s{i}")["running"] for i in (0, 2, 3))
+    vpn.reload_state()
+
+
+def test_reconcile_restarts_link_when_caddy_address_changes(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    vpn.reload_state()
+    raw = "[Interface]\nAddress = 10.70.0.2/32\nPrivateKey = k\n\n[Peer]\nPublicKey = p\nAllowedIPs = 0.0.0.0/0\n"
+    link = {"id": "l1", "interface": "jwgl1", "raw_config": raw, "running": True}
+    target = ["172.18.0.5"]
+    monkeypatch.setattr(vpn, "_caddy_target", lambda: (target[0], 80))
+    link["config_hash"] = vpn._link_config_hash(link)
+    vpn._state().save_link(link)
+
+    started: list[str] = []
+    monkeypatch.setattr(
+        vpn, "_inspect_wg_container", lambda name: (True, "running", vpn._state().get_link("l1")["config_hash"])
+    )
+    monkeypatch.setattr(vpn, "_start_link_container", lambda item: started.append(vpn._render_link_config(item)))
+
+    assert vpn.reconcile_on_startup()["unchanged"] == 1
+    # janus-caddy was recreated with a new address; the DNAT rules must follow it.
+    target[0] = "172.18.0.9"
+    assert vpn.reconcile_on_startup()["started"] == 1
+    assert "--to-destination 172.18.0.9:80" in started[0]
+    vpn.reload_state()
+
+
+def test_consolidated_telemetry_never_allocates_interfaces(monkeypatch, tmp_path):
+    from backend.services import vpn
+    from backend.services.vpn_telemetry import PeerTelemetry
+
+    dump = "wg1\tpriv\tsrvpub\t51821\toff\nwg1\tpeerpub\t(none)\t(none)\t10.66.11.2/32\t0\t10\t20\toff\n"
+
+    class FakeContainer:
+        def exec_run(self, cmd):
+            return (0, dump.encode())
+
+    class FakeDocker:
+        class containers:
+            @staticmethod
+            def get(name):
+                return FakeContainer()
+
+    monkeypatch.setattr(vpn.settings, "VPN_CONSOLIDATED", True)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    monkeypatch.setattr(vpn, "_telemetry", PeerTelemetry())
+    vpn.reload_state()
+    store = vpn._state()
+    host = vpn._host_container_name()
+    store.save_server({"id": "s0", "running": True, "container_name": host, "clients": []})
+    store.save_server({"id": "s1", "running": True, "container_name": host, "interface": "wg1", "clients": []})
+    saves: list[str] = []
+    monkeypatch.setattr(store, "save_server", lambda server: saves.append(server["id"]))
+
+    assert vpn.collect_telemetry() == 1
+    assert saves == []
+    assert "interface" not in store.get_server("s0")
+    assert vpn._peer_telemetry().peer_stats("peerpub", now=0)["rx_bytes"] == 10
+    vpn.reload_state()
+
+
+def test_consolidated_server_ports_stay_inside_the_host_window(monkeypatch, tmp_path):
+    import pytest
+
+    from backend.services import vpn
+    from backend.services.errors import ServiceError
+
+    monkeypatch.setattr(vpn.settings, "VPN_CONSOLIDATED", True)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path)
+    monkeypatch.setattr(vpn.settings, "VPN_PORT_BASE", 51820)
+    monkeypatch.setattr(vpn.settings, "VPN_HOST_PORT_SPAN", 2)
+    monkeypatch.setattr(vpn, "_generate_keypair", lambda: ("priv", "pub"))
+    monkeypatch.setattr(vpn, "add_client", lambda *_a, **_k: {"id": "client"})
+    vpn.reload_state()
+
+    starts: list[int] = []
+
+    def fake_start(server_id: str):
+        starts.append(vpn._find_server(server_id)["listen_port"])
+        raise ServiceError(500, "Failed to start VPN host container: port is already allocated")
+
+    monkeypatch.setattr(vpn, "start_server", fake_start)
+    # A host container bind conflict is not retried as a per-server port bump.
+    with pytest.raises(ServiceError):
+        vpn.create_server("first")
+    assert starts == [51820]
+
+    vpn._state().save_server({"id": "s2", "listen_port": 51821, "subnet_cidr": "10.66.11.0/24", "clients": []})
+    with pytest.raises(ServiceError) as exc:
+        vpn.create_server("third")
+    assert exc.value.status_code == 409
+    assert len(vpn._state().servers()) == 2
+    vpn.reload_state()
+
+
+def test_consolidated_link_refuses_routes_shared_with_servers_and_links(monkeypatch, tmp_path):
+    import pytest
+
+    from backend.services import vpn
+    from backend.services.errors import ServiceError
+
+    monkeypatch.setattr(vpn.settings, "VPN_CONSOLIDATED", True)
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn, "_ensure_host_container", lambda: (_ for _ in ()).throw(AssertionError("no host changes")))
+    vpn.reload_state()
+    store = vpn._state()
+    store.save_server({"id": "s1", "name": "local", "subnet_cidr": "10.66.10.0/24", "server_address": "10.66.10.1/24"})
+
+    def link(link_id: str, address: str, running: bool = False) -> dict:
+        raw = f"[Interface]\nAddress = {address}/32\nPrivateKey = k\n\n[Peer]\nPublicKey = p\nAllowedIPs = 0.0.0.0/0\n"
+        item = {"id": link_id, "name": link_id, "interface": f"jwg{link_id}", "raw_config": raw, "running": running}
+        store.save_link(item)
+        return item
+
+    # A link to another Janus instance whose peers live in the same 10.66.10.0/24 as the local server.
+    with pytest.raises(ServiceError) as exc:
+        vpn._start_link_container(link("l1", "10.66.10.2"))
+    assert exc.value.status_code == 409
+    assert "overlaps VPN server local" in str(exc.value.detail)
+
+    link("l2", "10.70.0.2", running=True)
+    with pytest.raises(ServiceError) as exc:
+        vpn._start_link_container(link("l3", "10.70.0.3"))
+    assert "already used by VPN link l2" in str(exc.value.detail)
+
+    # New servers skip the /24s links route through the shared table.
+    assert vpn._next_free_subnet([{"subnet_cidr": "10.66.10.0/24"}]) == ("10.66.11.0/24", "10.66.11.1/24")
+    link("l4", "10.66.11.2")
+    assert vpn._next_free_subnet([{"subnet_cidr": "10.66.10.0/24"}])[0] == "10.66.12.0/24"
+    vpn.reload_state()
+
+
+def test_vpn_host_root_caches_permanent_outcomes(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    calls = {"get": 0}
+    outcome: dict = {}
+
+    class FakeContainers:
+        def get(self, name):
+            calls["get"] += 1
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome["container"]
+
+    class FakeDocker:
+        containers = FakeContainers()
+
+    hostname = tmp_path / "hostname"
+    hostname.write_text("abc123\n", encoding="utf-8")
+    real_path = vpn.Path
+
+    def fake_path(*args):
+        return hostname if args == ("/etc/hostname",) else real_path(*args)
+
+    monkeypatch.setattr(vpn, "Path", fake_path)
+    monkeypatch.setattr(vpn.settings, "VPN_DATA_DIR", tmp_path / "vpn")
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    root = tmp_path / "vpn"
+
+    # Not in a container: the hostname names no container. Asked once, then cached.
+    outcome["error"] = vpn.NotFound("no such container")
+    vpn.reload_host_root()
+    assert vpn._vpn_host_root() == root
+    assert vpn._vpn_host_root() == root
+    assert calls["get"] == 1
+
+    # A container without a matching mount maps to the root itself, also cached.
+    outcome.clear()
+    outcome["container"] = type("C", (), {"attrs": {"Mounts": [{"Source": "/srv/x", "Destination": "/other"}]}})()
+    vpn.reload_host_root()
+    assert vpn._vpn_host_root() == root
+    assert vpn._vpn_host_root() == root
+    assert calls["get"] == 2
+
+    # Transport failures are retried on the next call.
+    outcome["error"] = vpn.APIError("socket timeout")
+    vpn.reload_host_root()
+    assert vpn._vpn_host_root() == root
+    assert vpn._vpn_host_root() == root
+    assert calls["get"] == 4
+
+    hostname.write_text("", encoding="utf-8")
+    vpn.reload_host_root()
+    assert vpn._vpn_host_root() == root
+    assert calls["get"] == 4
+    vpn.reload_host_root()
+
+
+def test_reconcile_defers_links_until_caddy_is_resolved_and_isolates_failures(monkeypatch, tmp_path):
+    from backend.services import vpn
+
+    monkeypatch.setattr(vpn.settings, "VPN_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(vpn, "CADDY_RESOLVE_DELAY", 0)
+    vpn.reload_state()
+    store = vpn._state()
+    raw = "[Interface]\nAddress = 10.70.0.2/32\nPrivateKey = k\n\n[Peer]\nPublicKey = p\nAllowedIPs = 0.0.0.0/0\n"
+    store.save_link({"id": "l1", "interface": "jwgl1", "raw_config": raw, "running": True, "config_hash": "h"})
+    # A broken record must not take the rest of the pass down with it.
+    store.save_link({"id": "l2", "raw_config": raw, "running": True})
+    server = {"id": "s1", "listen_port": 51820, "running": True, "clients": []}
+    server["config_hash"] = vpn._server_config_hash(server)
+    store.save_server(server)
+
+    lookups: list[int] = []
+    targets: list = [None] * vpn.CADDY_RESOLVE_ATTEMPTS
+    monkeypatch.setattr(vpn, "_caddy_target", lambda: lookups.append(1) or (targets.pop(0) if targets else ("172.18.0.5", 80)))
+    monkeypatch.setattr(
+        vpn, "_inspect_wg_container", lambda name: (True, "running", server["config_hash"] if "s1" in name else "h")
+    )
+    started: list[str] = []
+    monkeypatch.setattr(vpn, "_start_link_container", lambda item: started.append(item["id"]))
+    monkeypatch.setattr(vpn, "_start_container", lambda item: started.append(item["id"]))
+    monkeypatch.setattr(vpn.settings, "VPN_RECONCILE_WORKERS", 1)
+
+    summary = vpn.reconcile_on_startup()
+    # janus-caddy has no address yet: l1 keeps its current config instead of moving to the fallback target.
+    assert (summary["deferred"], summary["failed"], summary["unchanged"]) == (1, 1, 1)
+    assert started == []
+    assert store.get_link("l1")["running"] is True
+    assert store.get_link("l1")["config_hash"] == "h"
+    assert store.get_link("l2")["running"] is False
+
+    monkeypatch.setattr(vpn, "_stop_link_container", lambda item: None)
+    summary = vpn.reconcile_on_startup()
+    assert summary["started"] == 1
+    assert started == ["l1"]
+    vpn.reload_state()
+
+
+def test_caddy_target_distinguishes_missing_from_unknown(monkeypatch):
+    from backend.services import vpn
+
+    outcome: dict = {}
+
+    class FakeContainers:
+        def get(self, name):
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome["container"]
+
+    class FakeDocker:
+        containers = FakeContainers()
+
+    monkeypatch.setattr(vpn, "_docker_client", lambda: FakeDocker())
+    outcome["error"] = vpn.NotFound("no janus-caddy")
+    assert vpn._caddy_target() == ("host.docker.internal", 18080)
+    outcome["error"] = vpn.APIError("daemon busy")
+    assert vpn._caddy_target() is None
+    outcome.clear()
+    outcome["container"] = type("C", (), {"attrs": {"NetworkSettings": {"Networks": {"janus": {"IPAddress": ""}}}}})()
+    assert vpn._caddy_target() is None
+    assert vpn._resolve_caddy_target() == ("host.docker.internal", 18080)
+    outcome["container"].attrs["NetworkSettings"]["Networks"]["janus"]["IPAddress"] = "172.18.0.5"
+    assert vpn._caddy_target() == ("172.18.0.5", 80)
@@ -1,5 +1,7 @@
 from pathlib import Path
 
+import pytest
+
 
 def test_auth_status_disabled(client_factory):
     client, _ = client_factory()
@@ -53,6 +55,20 @@ def test_auth_login_and_logout(client_factory, tmp_path):
     assert status2.json()["authorized"] is False
 
 
+def test_auth_logout_fails_when_denylist_cannot_be_written(client_factory, monkeypatch, tmp_path):
+    password_file = tmp_path / "auth.txt"
+    client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file))
+    assert client.put("/api/auth/config", json={"enabled": True, "password": "secret"}).status_code == 200
+
+    from backend import auth
+
+    # A path under a regular file cannot be created.
+    monkeypatch.setattr(auth, "_revoked_path", lambda: password_file / "revoked.json")
+    logout = client.post("/api/auth/logout")
+    assert logout.status_code == 500
+    assert client.get("/api/auth/status").json()["authorized"] is True
+
+
 def test_auth_login_payload_validation(client_factory, tmp_path):
     password_file = tmp_path / "auth.txt"
     client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file))
@@ -176,3 +192,154 @@ def test_set_password_unlink_error(monkeypatch, tmp_path):
     monkeypatch.setattr(Path, "write_text", _write_text)
     auth.set_password("")
     assert auth._cache["value"] == ""
+
+
+def test_auth_login_throttles_failed_attempts(client_factory, tmp_path):
+    password_file = tmp_path / "auth.txt"
+    client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file), AUTH_LOGIN_ATTEMPTS="2")
+    client.put("/api/auth/config", json={"enabled": True, "password": "secret"})
+    client.post("/api/auth/logout")
+
+    assert client.post("/api/auth/login", json={"password": "nope"}).status_code == 401
+    assert client.post("/api/auth/login", json={"password": "nope"}).status_code == 401
+    throttled = client.post("/api/auth/login", json={"password": "secret"})
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) >= 1
+
+
+def test_auth_login_rehashes_to_configured_cost(client_factory, tmp_path):
+    password_file = tmp_path / "auth.txt"
+    password_file.write_text("secret", encoding="utf-8")
+    client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file), AUTH_PASSWORD_ITERATIONS="1000")
+
+    assert client.post("/api/auth/login", json={"password": "secret"}).status_code == 200
+    upgraded = password_file.read_text(encoding="utf-8")
+    assert upgraded.startswith("pbkdf2_sha256$1000$")
+
+    client.post("/api/auth/logout")
+    assert client.post("/api/auth/login", json={"password": "secret"}).status_code == 200
+    assert password_file.read_text(encoding="utf-8") == upgraded
+
+
+def test_rehash_keeps_existing_sessions(monkeypatch, tmp_path):
+    from backend import auth, settings
+
+    password_file = tmp_path / "auth.txt"
+    password_file.write_text("secret", encoding="utf-8")
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_FILE", password_file)
+    monkeypatch.setattr(settings, "AUTH_REHASH", True)
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_ITERATIONS", 1000)
+
+    before = auth.issue_session_token()
+    assert auth._check_and_upgrade("secret", auth.get_password())
+    assert auth.get_password().startswith("pbkdf2_sha256$1000$")
+    assert auth.is_session_token_valid(before)
+
+    # A second upgrade carries the older key along.
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_ITERATIONS", 2000)
+    middle = auth.issue_session_token()
+    assert auth._check_and_upgrade("secret", auth.get_password())
+    assert auth.is_session_token_valid(before)
+    assert auth.is_session_token_valid(middle)
+
+    # Changing the password, through the API or by hand, still signs everyone out.
+    latest = auth.issue_session_token()
+    password_file.write_text(auth._hash_password("other"), encoding="utf-8")
+    auth._cache["mtime"] = None
+    assert not auth.is_session_token_valid(before)
+    assert not auth.is_session_token_valid(latest)
+
+
+def test_rehash_is_skipped_when_the_key_cannot_be_carried(monkeypatch, tmp_path):
+    from backend import auth, settings
+
+    password_file = tmp_path / "auth.txt"
+    password_file.write_text("secret", encoding="utf-8")
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_FILE", password_file)
+    monkeypatch.setattr(settings, "AUTH_REHASH", True)
+
+    def _fail(_stored, _hashed):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(auth, "_carry_signing_key", _fail)
+    token = auth.issue_session_token()
+    assert auth._check_and_upgrade("secret", "secret")
+    assert password_file.read_text(encoding="utf-8") == "secret"
+    assert auth.is_session_token_valid(token)
+
+
+def test_login_limiter_concurrency_and_reset():
+    from backend.auth import LoginLimiter, LoginThrottled
+
+    limiter = LoginLimiter(attempts=3, window=60)
+    limiter.acquire("10.0.0.1")
+    with pytest.raises(LoginThrottled) as exc:
+        limiter.acquire("10.0.0.1")
+    assert exc.value.retry_after == 1
+    limiter.acquire("10.0.0.2")
+    limiter.release("10.0.0.2", False)
+    limiter.release("10.0.0.1", True)
+    assert list(limiter._states) == ["10.0.0.2"]
+
+
+def test_login_limiter_caps_tracked_addresses():
+    from backend.auth import LoginLimiter
+
+    limiter = LoginLimiter(attempts=3, window=60, max_tracked=8)
+    for idx in range(50):
+        limiter.acquire(f"10.0.1.{idx}")
+        limiter.release(f"10.0.1.{idx}", False)
+        assert len(limiter._states) <= 8
+    # The most recently failing addresses are the ones still throttled.
+    assert "10.0.1.49" in limiter._states
+    assert "10.0.1.0" not in limiter._states
+
+
+def test_expiring_set_prunes_by_expiry(monkeypatch):
+    from backend import auth
+
+    store = auth.ExpiringSet()
+    now = 1_000.0
+    monkeypatch.setattr(auth.time, "time", lambda: now)
+    store.add("old", now + 10)
+    store.add("new", now + 100)
+    assert "old" in store and "new" in store
+
+    now = 1_050.0
+    assert "old" not in store
+    store.add("newer", now + 100)
+    assert len(store) == 2
+    assert store._expiry[0] == (1_100.0, "new")
+
+    for idx in range(store.PRUNE_BATCH * 3):
+        store.add(f"t{idx}", now + 100)
+        store.discard(f"t{idx}")
+    assert len(store._expiry) <= 2 * len(store) + store.PRUNE_BATCH
+    assert "new" in store and "newer" in store
+
+
+def test_signed_session_tokens(monkeypatch, tmp_path):
+    from backend import auth, settings
+
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_FILE", tmp_path / "auth.txt")
+    monkeypatch.setattr(settings, "AUTH_PASSWORD_ITERATIONS", 1000)
+    auth.set_password("secret")
+
+    token = auth.issue_session_token()
+    other = auth.issue_session_token()
+    assert auth.is_session_token_valid(token)
+    head, sig = token.rsplit(".", 1)
+    assert not auth.is_session_token_valid(f"{head}.{sig[::-1]}")
+    assert not auth.is_session_token_valid("v1.9999999999.nonce.sig")
+
+    # Revocations go through the shared file, so a fresh worker sees them too.
+    auth.revoke_session_token(token)
+    assert (tmp_path / "auth.revoked.json").exists()
+    auth._revoked.clear()
+    auth._revoked_cache["mtime"] = None
+    assert not auth.is_session_token_valid(token)
+    assert auth.is_session_token_valid(other)
+
+    auth.set_password("changed")
+    assert not auth.is_session_token_valid(other)
+    assert not (tmp_path / "auth.revoked.json").exists()
@@ -0,0 +1,64 @@
+def test_histogram_and_counter_rendering():
+    from backend import metrics
+
+    registry = metrics.Registry()
+    saved = metrics.REGISTRY
+    metrics.REGISTRY = registry
+    try:
+        hist = metrics.Histogram("t_seconds", "Test latency.", ("op",), buckets=(0.1, 1.0))
+        counter = metrics.Counter("t_total", "Test count.", ("kind",))
+    finally:
+        metrics.REGISTRY = saved
+    hist.labels("a").observe(0.05)
+    hist.labels("a").observe(0.5)
+    hist.labels("a").observe(5)
+    counter.labels('we"ird').inc()
+
+    text = registry.render()
+    assert "# TYPE t_seconds histogram" in text
+    assert 't_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{op="a",le="1"} 2' in text
+    assert 't_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{op="a"} 3' in text
+    assert 't_total{kind="we\\"ird"} 1' in text
+
+
+def test_docker_endpoint_labels():
+    from backend.metrics import _docker_endpoint
+
+    assert _docker_endpoint("/v1.43/containers/abc123/start") == "containers/start"
+    assert _docker_endpoint("/v1.43/containers/json?all=1") == "containers/json"
+    assert _docker_endpoint("/version") == "version"
+
+
+def test_metrics_endpoint_reports_route_templates(client_factory):
+    client, _ = client_factory()
+    assert client.get("/api/routes").status_code == 200
+    assert client.get("/api/routes/missing-id").status_code in {404, 405}
+
+    resp = client.get("/api/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'janus_http_request_duration_seconds_count{method="GET",route="/api/routes",status="200"} 1' in body
+    assert "/api/routes/missing-id" not in body
+    assert 'janus_http_requests_in_flight{method="GET"} 1' in body
+    assert "janus_cloudflare_rate_limit_remaining" in body
+
+
+def test_metrics_scrape_token_and_public_flag(client_factory, tmp_path):
+    password_file = tmp_path / "auth.txt"
+    client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file), METRICS_TOKEN="scrape-secret")
+    assert client.put("/api/auth/config", json={"enabled": True, "password": "secret"}).status_code == 200
+    assert client.post("/api/auth/logout").status_code == 200
+
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+    # The metrics token is not a session token for the rest of the API.
+    assert client.get("/api/routes", headers={"Authorization": "Bearer scrape-secret"}).status_code == 401
+    assert client.get("/api/routes", headers={"X-Auth-Token": "scrape-secret"}).status_code == 401
+
+    client, _ = client_factory(AUTH_PASSWORD_FILE=str(password_file), METRICS_PUBLIC="true")
+    assert client.get("/api/metrics").status_code == 200
+    assert client.get("/api/routes").status_code == 401
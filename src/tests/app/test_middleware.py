@@ -30,3 +30,70 @@ def test_correlation_id_middleware_error_log(capsys):
 
     captured = capsys.readouterr().err
     assert "request.error" in captured
+
+
+def test_correlation_id_streaming_response_passthrough():
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+    app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n", b"data: 2\n\n"]), media_type="text/event-stream")
+
+    client = TestClient(app)
+    resp = client.get("/events", headers={"X-Correlation-Id": "sse-1"})
+    assert resp.headers["X-Correlation-Id"] == "sse-1"
+    assert resp.text == "data: 1\n\ndata: 2\n\n"
+
+
+def test_auth_middleware_scope_level_check(monkeypatch):
+    from backend.core import middleware
+
+    monkeypatch.setattr(middleware, "auth_enabled", lambda: True)
+    monkeypatch.setattr(middleware, "is_session_token_valid", lambda token: token == "good")
+
+    app = FastAPI()
+    app.add_middleware(middleware.AuthMiddleware)
+
+    @app.get("/api/private")
+    def private():
+        return {"ok": True}
+
+    @app.get("/static/app.js")
+    def static():
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.get("/api/private").status_code == 401
+    assert client.get("/static/app.js").status_code == 200
+    assert client.get("/api/private", headers={"X-Auth-Token": "good"}).status_code == 200
+    client.cookies.set(middleware.settings.AUTH_COOKIE_NAME, "good")
+    assert client.get("/api/private").status_code == 200
+
+
+def test_correlation_id_request_log_sampling(monkeypatch, caplog):
+    monkeypatch.setenv("LOG_REQUEST_SAMPLE_RATE", "0")
+    monkeypatch.setenv("LOG_REQUEST_START", "0")
+
+    app = FastAPI()
+    app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/ok")
+    def ok():
+        return {"ok": True}
+
+    @app.get("/fail")
+    def fail():
+        from fastapi import HTTPException
+
+        raise HTTPException(status_code=503, detail="down")
+
+    client = TestClient(app)
+    with caplog.at_level("INFO", logger="backend.request"):
+        assert client.get("/ok").headers.get("X-Correlation-Id")
+        assert client.get("/fail").status_code == 503
+
+    events = [(rec.getMessage(), rec.status_code) for rec in caplog.records if rec.name == "backend.request"]
+    assert events == [("request.end", 503)]
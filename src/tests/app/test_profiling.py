@@ -0,0 +1,88 @@
+def test_profile_store_ring(tmp_path):
+    from backend.profiling import ProfileStore
+
+    store = ProfileStore(tmp_path, keep=2)
+    for idx in range(3):
+        store.save(f"{idx}-req.collapsed", f"MainThread;handler {idx + 1}\n", {"path": "/api/x"})
+
+    names = [entry["name"] for entry in store.list()]
+    assert names == ["2-req.collapsed", "1-req.collapsed"]
+    assert not (tmp_path / "0-req.collapsed").exists()
+    assert store.path_for("1-req.collapsed") is not None
+    assert store.path_for("../index.json") is None
+
+
+def test_stack_sampler_collects_busy_thread():
+    import threading
+    import time
+
+    from backend.profiling import StackSampler, render_collapsed
+
+    stop = threading.Event()
+
+    def busy_loop():
+        while not stop.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_loop, name="busy")
+    sampler = StackSampler(interval=0.001)
+    worker.start()
+    sampler.start()
+    time.sleep(0.05)
+    samples = sampler.stop()
+    stop.set()
+    worker.join()
+
+    report = render_collapsed(samples)
+    assert any(line.startswith("busy;") and "busy_loop" in line for line in report.splitlines())
+
+
+def test_profiled_request_is_listed_and_downloadable(client_factory, tmp_path):
+    client, _ = client_factory(PROFILING_ENABLED="true", PROFILING_DIR=str(tmp_path / "profiles"))
+
+    plain = client.get("/api/routes")
+    assert "X-Profile-Id" not in plain.headers
+
+    resp = client.get("/api/routes", headers={"X-Profile": "1", "X-Correlation-Id": "slow-1"})
+    assert resp.status_code == 200
+    name = resp.headers["X-Profile-Id"]
+    assert name.endswith("-slow-1.collapsed")
+
+    listed = client.get("/api/profiles").json()["profiles"]
+    assert listed[0]["name"] == name
+    assert listed[0]["path"] == "/api/routes"
+    assert listed[0]["status_code"] == 200
+
+    assert client.get(f"/api/profiles/{name}").status_code == 200
+    assert client.get("/api/profiles/missing.collapsed").status_code == 404
+
+
+def test_profiling_disabled_by_default(client_factory):
+    client, _ = client_factory()
+    resp = client.get("/api/routes", headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in resp.headers
+    assert client.get("/api/profiles").status_code == 404
+
+
+def test_profile_slot_held_until_report_saved(client_factory, tmp_path, monkeypatch):
+    client, _ = client_factory(PROFILING_ENABLED="true", PROFILING_DIR=str(tmp_path / "profiles"))
+    from backend import profiling
+
+    assert profiling.profile_store() is profiling.profile_store()
+
+    slot_free_during_save = []
+    original_save = profiling.ProfileStore.save
+
+    def save(self, name, report, meta):
+        free = profiling.try_begin()
+        if free:
+            profiling.end()
+        slot_free_during_save.append(free)
+        return original_save(self, name, report, meta)
+
+    monkeypatch.setattr(profiling.ProfileStore, "save", save)
+    resp = client.get("/api/routes", headers={"X-Profile": "1"})
+    assert resp.status_code == 200
+    assert slot_free_during_save == [False]
+    assert profiling.try_begin()
+    profiling.end()
@@ -0,0 +1,67 @@
+def test_route_create_spans_are_queryable_by_correlation_id(client_factory):
+    client, _ = client_factory()
+    payload = {"domains": ["example.com"], "upstream": {"host": "dashboard", "port": 8080}}
+
+    resp = client.post("/api/routes", json=payload, headers={"X-Correlation-Id": "trace-1"})
+    assert resp.status_code == 200
+
+    trace = client.get("/api/traces/trace-1").json()
+    spans = {item["name"]: item for item in trace["spans"]}
+    assert {"http.request", "routes.validate", "storage.load", "storage.save"} <= set(spans)
+    root = spans["http.request"]
+    assert root["parent_id"] is None
+    assert root["attrs"]["status_code"] == 200
+    assert spans["routes.validate"]["parent_id"] == root["span_id"]
+    assert {item["trace_id"] for item in trace["spans"]} == {root["trace_id"]}
+
+    assert any(item["correlation_id"] == "trace-1" for item in client.get("/api/traces").json()["traces"])
+    assert client.get("/api/traces/unknown").status_code == 404
+
+
+def test_span_buffer_is_bounded_and_exports_otlp(client_factory):
+    client_factory(TRACING_BUFFER_SIZE="3")
+    from backend import tracing
+    from backend.core.context import reset_correlation_id, set_correlation_id
+
+    token = set_correlation_id("bounded")
+    try:
+        for idx in range(5):
+            with tracing.span("work", idx=idx):
+                pass
+        try:
+            with tracing.span("boom"):
+                raise ValueError("bad")
+        except ValueError:
+            pass
+    finally:
+        reset_correlation_id(token)
+
+    spans = tracing.spans_for("bounded")
+    assert [item["name"] for item in spans] == ["work", "work", "boom"]
+    assert spans[-1]["error"] == "ValueError: bad"
+
+    exported = tracing.otlp_payload(list(tracing._buffer))["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert exported[-1]["status"] == {"code": 2, "message": "ValueError: bad"}
+    assert {"key": "idx", "value": {"intValue": "4"}} in exported[1]["attributes"]
+    assert len(exported[0]["traceId"]) == 32 and len(exported[0]["spanId"]) == 16
+
+
+def test_otlp_exporter_queue_is_bounded_and_survives_errors(client_factory):
+    client_factory()
+    from backend import tracing
+    from backend.metrics import TRACING_SPANS_DROPPED
+
+    before = TRACING_SPANS_DROPPED.labels().value
+    exporter = tracing.OtlpExporter("http://collector.invalid:4318", max_queue=2)
+    spans = [tracing.Span("work", "0" * 32, None, "cid", {}) for _ in range(5)]
+    for item in spans:
+        exporter.submit(item)
+    assert exporter.dropped == 3
+    assert TRACING_SPANS_DROPPED.labels().value - before == 3
+    assert exporter.url == "http://collector.invalid:4318/v1/traces"
+
+    class BrokenClient:
+        def post(self, url, json):
+            raise RuntimeError("not an httpx error")
+
+    exporter._export(BrokenClient(), spans[:2])
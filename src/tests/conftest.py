@@ -1,4 +1,5 @@
 import importlib
+import os
 import sys
 from pathlib import Path
 
@@ -9,6 +10,12 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+# Background pollers stay off unless a test starts them explicitly.
+os.environ.setdefault("VPN_TELEMETRY_INTERVAL", "0")
+os.environ.setdefault("CLOUDFLARE_RECONCILE_INTERVAL", "0")
+# Tests read log output synchronously right after a request.
+os.environ.setdefault("LOG_QUEUE", "0")
+
 
 # Lightweight stub for docker package so imports succeed without docker-py installed.
 if "docker" not in sys.modules:
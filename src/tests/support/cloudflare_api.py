@@ -0,0 +1,87 @@
+"""In-process Cloudflare v4 API shared by the inbound tests and scripts/bench_cloudflare_discovery.py."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import Counter
+
+import httpx
+
+
+class FakeCloudflareAPI:
+    """In-process Cloudflare v4 API with paging, request counting and optional latency."""
+
+    def __init__(self, accounts: int = 2, tunnels: int = 3, zones: int = 3, per_page: int = 2, latency: float = 0.0):
+        self.per_page = per_page
+        self.latency = latency
+        self.requests: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.accounts = [{"id": f"acc{a}", "name": f"Account {a}"} for a in range(accounts)]
+        self.tunnels = {
+            acc["id"]: [{"id": f"{acc['id']}-t{t}", "name": f"tunnel-{acc['id']}-{t}"} for t in range(tunnels)]
+            for acc in self.accounts
+        }
+        self.zones = {
+            acc["id"]: [{"id": f"{acc['id']}-z{z}", "account": {"id": acc["id"]}} for z in range(zones)]
+            for acc in self.accounts
+        }
+
+    def _page(self, items: list[dict], request: httpx.Request) -> dict:
+        page = int(request.url.params.get("page") or 1)
+        start = (page - 1) * self.per_page
+        total_pages = max(1, -(-len(items) // self.per_page))
+        return {
+            "success": True,
+            "result": items[start : start + self.per_page],
+            "result_info": {"page": page, "total_pages": total_pages},
+        }
+
+    def _route(self, request: httpx.Request) -> dict:
+        parts = request.url.path.split("/client/v4/", 1)[-1].strip("/").split("/")
+        if parts == ["accounts"]:
+            return self._page(self.accounts, request)
+        if parts[0] == "accounts" and parts[2:] == ["cfd_tunnel"]:
+            return self._page(self.tunnels.get(parts[1], []), request)
+        if parts[0] == "accounts" and parts[-1] == "configurations":
+            tunnel_id = parts[3]
+            ingress = [{"hostname": f"ingress.{tunnel_id}.example.com", "service": "http://caddy:80"}, {"service": "http_status:404"}]
+            return {"success": True, "result": {"config": {"ingress": ingress}}}
+        if parts == ["zones"]:
+            account_id = request.url.params.get("account.id")
+            zones = self.zones.get(account_id, []) if account_id else [z for zs in self.zones.values() for z in zs]
+            return self._page(zones, request)
+        if parts[0] == "zones" and parts[2:] == ["dns_records"]:
+            zone_id = parts[1]
+            account_id = zone_id.split("-", 1)[0]
+            records = [
+                {"type": "CNAME", "name": f"{t['id']}.{zone_id}.example.com", "content": f"{t['id']}.cfargotunnel.com"}
+                for t in self.tunnels[account_id]
+            ]
+            return self._page(records, request)
+        return {"success": False, "errors": [{"message": f"unknown path {request.url.path}"}]}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests[request.url.path] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return httpx.Response(200, content=json.dumps(self._route(request)))
+        finally:
+            self.in_flight -= 1
+
+    def sdk_factory(self):
+        # The SDK package itself: test_client_sdk reloads backend.cloudflare.sdk with dummy modules.
+        from cloudflare import AsyncCloudflare
+
+        def _make(api_token: str):
+            http_client = httpx.AsyncClient(
+                base_url="https://api.cloudflare.com/client/v4",
+                transport=httpx.MockTransport(self.handler),
+            )
+            return AsyncCloudflare(api_token=api_token, http_client=http_client)
+
+        return _make